@@ -1,34 +1,71 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context, send_file, abort
 from flask_login import LoginManager, login_user, login_required, logout_user, current_user
-from database import db, login_manager
-from models import User, Nasabah, Kriteria, NilaiNasabah
+from database import db, login_manager, pasang_profil_sqlite, baca_saja, ulangi_jika_terkunci
+from models import User, Nasabah, Kriteria, NilaiNasabah, NormalisasiKriteria, Pekerjaan, SnapshotRanking
+from matriks import muat_matriks, simpan_nilai
+from saw import KATEGORI, NILAI_IDEAL, hitung_saw, kategori_skor, skor_persen
+from cache import json_bercache
+from indeks_ranking import pastikan_indeks, commit_dan_perbarui
+from skor import query_ranking, distribusi_kategori, sinkronkan_skor_awal, siapkan_distribusi, ringkasan_dashboard
+from paginasi import UKURAN_MAKS, ukuran_halaman, halaman_id, halaman_skor
+from ekspor import stream_csv, stream_ndjson
+from impor import ImporError, baca_file, impor_nasabah
+from pencarian import siapkan_pencarian, halaman_pencarian
+from aset import pasang_aset, unduh_vendor
+from sensitivitas import analisis as analisis_sensitivitas
+from rubrik import RubrikError, kompilasi as kompilasi_rubrik, konversi_nilai
+from statistik import MODE_NORMALISASI, siapkan_statistik, nilai_acuan, statistik_kriteria, simpan_normalisasi, mode_default
+from metode import bandingkan as bandingkan_metode
+from ranking_bertahap import ranking_bertahap
+from sesi_user import muat_user, siapkan_login, naikkan_versi_user, cache_user
+from pekerjaan import pasang_pekerjaan, antrikan, status_pekerjaan, folder_pekerjaan
+from metrik import pasang_metrik
+from snapshot import (buat_snapshot, muat_snapshot, info_snapshot, distribusi_snapshot, halaman_snapshot,
+                      bandingkan_snapshot, bandingkan_bobot, cache_snapshot)
 import os
-import time
+import uuid
+import click
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'spk-koperasi-secret-key-change-this-in-production'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///spk_koperasi.db'
+# SPK_DATABASE_URI dipakai benchmark.py untuk database sementara
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('SPK_DATABASE_URI', 'sqlite:///spk_koperasi.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 # Inisialisasi database dan login manager
 db.init_app(app)
+pasang_profil_sqlite(app)  # WAL, pragma, busy timeout dan pool read-only (lihat database.py)
+pasang_metrik(app)  # Server-Timing, histogram per endpoint dan /metrics (lihat metrik.py)
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 login_manager.login_message = 'Silakan login untuk mengakses halaman ini.'
 login_manager.login_message_category = 'warning'
 
-# User loader untuk Flask-Login
+# Aset statis ber-fingerprint (statics/, lihat aset.py)
+pasang_aset(app)
+
+# Pekerjaan latar: hitung ulang skor, impor dan ekspor besar (lihat pekerjaan.py)
+pasang_pekerjaan(app)
+
+# Buat tabel yang belum ada (misalnya tabel baru setelah update aplikasi)
+with app.app_context():
+    db.create_all()
+    siapkan_statistik()
+    siapkan_distribusi()
+    sinkronkan_skor_awal()
+    siapkan_pencarian()
+
+# User loader untuk Flask-Login (memakai cache, lihat sesi_user.py)
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return muat_user(user_id)
 
 # ========== CONTEXT PROCESSOR ==========
 @app.context_processor
-def inject_user_and_version():
-    """Inject user data dan version ke semua template"""
+def inject_user():
+    """Inject user data ke semua template"""
     return {
-        'current_user': current_user,
-        'css_version': int(time.time())
+        'current_user': current_user
     }
 
 # ========== ROUTES AUTHENTIKASI ==========
@@ -49,7 +86,7 @@ def login():
         
         if user and user.check_password(password):
             if user.is_active:
-                login_user(user, remember=remember)
+                login_user(siapkan_login(user), remember=remember)
                 flash('Login berhasil! Selamat datang.', 'success')
                 next_page = request.args.get('next')
                 return redirect(next_page or url_for('dashboard'))
@@ -76,6 +113,7 @@ def profile():
 
 @app.route('/ubah-password', methods=['POST'])
 @login_required
+@ulangi_jika_terkunci
 def ubah_password():
     """Ubah password user"""
     password_lama = request.form.get('password_lama')
@@ -89,8 +127,13 @@ def ubah_password():
     elif len(password_baru) < 6:
         flash('Password baru minimal 6 karakter!', 'danger')
     else:
-        current_user.set_password(password_baru)
+        user = current_user._get_current_object()
+        user.set_password(password_baru)
+        # Session lain milik user ini (termasuk di worker lain) ikut dicabut
+        user.versi_sesi = naikkan_versi_user(user.id)
         db.session.commit()
+        ingat = app.config.get('REMEMBER_COOKIE_NAME', 'remember_token') in request.cookies
+        login_user(user, remember=ingat)
         flash('Password berhasil diubah!', 'success')
     
     return redirect(url_for('profile'))
@@ -102,24 +145,33 @@ def ubah_password():
 # ========== ROUTES UTAMA ==========
 @app.route('/')
 @login_required
+@baca_saja
 def dashboard():
-    total_nasabah = Nasabah.query.count()
-    total_kriteria = Kriteria.query.count()
-    kriterias = Kriteria.query.all()
+    # Angka dari tabel agregat; grafik dan top-N dimuat lewat /api/dashboard/ringkasan
+    ringkasan = ringkasan_dashboard(top=0)
     return render_template('dashboard.html', 
-                         total_nasabah=total_nasabah,
-                         total_kriteria=total_kriteria,
-                         kriterias=kriterias)
+                         total_nasabah=ringkasan['total_nasabah'],
+                         total_kriteria=ringkasan['total_kriteria'])
 
 # ========== DATA ALTERNATIF ==========
 @app.route('/alternatif')
 @login_required
 def alternatif():
-    nasabahs = Nasabah.query.all()
-    return render_template('alternatif.html', nasabahs=nasabahs)
+    q = request.args.get('q', '').strip()
+    if q:
+        halaman = halaman_pencarian(q, request.args.get('after'), ukuran_halaman(request.args))
+    else:
+        halaman = halaman_id(Nasabah.query, Nasabah.id,
+                             request.args.get('after'), ukuran_halaman(request.args))
+    return render_template('alternatif.html',
+                         nasabahs=halaman.items,
+                         halaman=halaman,
+                         q=q,
+                         mulai=request.args.get('mulai', 0, type=int))
 
 @app.route('/alternatif/tambah', methods=['GET', 'POST'])
 @login_required
+@ulangi_jika_terkunci
 def tambah_alternatif():
     kriterias = Kriteria.query.all()
     
@@ -136,14 +188,14 @@ def tambah_alternatif():
         
         nasabah = Nasabah(kode=kode, nama=nama, alamat=alamat, telepon=telepon)
         db.session.add(nasabah)
-        db.session.commit()
+        db.session.flush()
         
         # Input nilai untuk kriteria C1-C5
         for kriteria in kriterias:
             nilai_key = f'nilai_{kriteria.kode}'
             if nilai_key in request.form and request.form[nilai_key]:
                 try:
-                    nilai = float(request.form[nilai_key])
+                    nilai = konversi_nilai(kriteria, request.form[nilai_key])
                     nilai_nasabah = NilaiNasabah(
                         nasabah_id=nasabah.id,
                         kriteria_id=kriteria.id,
@@ -153,14 +205,40 @@ def tambah_alternatif():
                 except ValueError:
                     flash(f'Nilai untuk {kriteria.nama} tidak valid!', 'warning')
         
-        db.session.commit()
+        commit_dan_perbarui(nasabah.id)
         flash('Nasabah berhasil ditambahkan!', 'success')
         return redirect(url_for('alternatif'))
     
     return render_template('alternatif_form.html', action='Tambah', kriterias=kriterias)
 
+@app.route('/alternatif/impor', methods=['GET', 'POST'])
+@login_required
+def impor_alternatif():
+    """Impor massal nasabah + nilai dari file CSV/XLSX (dijalankan sebagai pekerjaan latar)"""
+    if request.method == 'POST':
+        file = request.files.get('file')
+        if not file or not file.filename:
+            flash('Pilih file CSV atau XLSX terlebih dahulu!', 'warning')
+            return redirect(url_for('impor_alternatif'))
+        
+        ekstensi = os.path.splitext(file.filename)[1].lower()
+        if ekstensi not in ('.csv', '.xlsx'):
+            flash('Format file harus CSV atau XLSX', 'danger')
+            return redirect(url_for('impor_alternatif'))
+        
+        berkas = f'impor-{uuid.uuid4().hex}{ekstensi}'
+        file.save(os.path.join(folder_pekerjaan(), berkas))
+        pekerjaan_id = antrikan('impor-nasabah', {'berkas': berkas, 'nama_file': file.filename},
+                                user_id=current_user.id)
+        flash(f'Impor dijalankan di latar (pekerjaan #{pekerjaan_id}).', 'info')
+        return redirect(url_for('impor_alternatif', pekerjaan=pekerjaan_id))
+    
+    kriterias = Kriteria.query.order_by(Kriteria.kode).all()
+    return render_template('impor.html', kriterias=kriterias)
+
 @app.route('/alternatif/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
+@ulangi_jika_terkunci
 def edit_alternatif(id):
     nasabah = Nasabah.query.get_or_404(id)
     kriterias = Kriteria.query.all()
@@ -171,31 +249,18 @@ def edit_alternatif(id):
         nasabah.alamat = request.form['alamat']
         nasabah.telepon = request.form['telepon']
         
-        # Update nilai untuk kriteria
+        # Update nilai untuk kriteria (satu upsert untuk semua kriteria)
+        perubahan = []
         for kriteria in kriterias:
             nilai_key = f'nilai_{kriteria.kode}'
             if nilai_key in request.form and request.form[nilai_key]:
                 try:
-                    nilai = float(request.form[nilai_key])
-                    # Cek apakah nilai sudah ada
-                    nilai_nasabah = NilaiNasabah.query.filter_by(
-                        nasabah_id=nasabah.id,
-                        kriteria_id=kriteria.id
-                    ).first()
-                    
-                    if nilai_nasabah:
-                        nilai_nasabah.nilai = nilai
-                    else:
-                        nilai_nasabah = NilaiNasabah(
-                            nasabah_id=nasabah.id,
-                            kriteria_id=kriteria.id,
-                            nilai=nilai
-                        )
-                        db.session.add(nilai_nasabah)
+                    perubahan.append((nasabah.id, kriteria.id, konversi_nilai(kriteria, request.form[nilai_key])))
                 except ValueError:
                     flash(f'Nilai untuk {kriteria.nama} tidak valid!', 'warning')
         
-        db.session.commit()
+        simpan_nilai(perubahan)
+        commit_dan_perbarui(nasabah.id)
         flash('Nasabah berhasil diupdate!', 'success')
         return redirect(url_for('alternatif'))
     
@@ -208,10 +273,11 @@ def edit_alternatif(id):
 
 @app.route('/alternatif/hapus/<int:id>')
 @login_required
+@ulangi_jika_terkunci
 def hapus_alternatif(id):
     nasabah = Nasabah.query.get_or_404(id)
     db.session.delete(nasabah)
-    db.session.commit()
+    commit_dan_perbarui(id)
     flash('Nasabah berhasil dihapus!', 'success')
     return redirect(url_for('alternatif'))
 
@@ -220,10 +286,35 @@ def hapus_alternatif(id):
 @login_required
 def kriteria():
     kriterias = Kriteria.query.order_by(Kriteria.kode).all()
-    return render_template('kriteria.html', kriterias=kriterias)
+    return render_template('kriteria.html', kriterias=kriterias,
+                         acuan=nilai_acuan(),
+                         statistik=statistik_kriteria(),
+                         mode_normalisasi=MODE_NORMALISASI)
+
+def _simpan_normalisasi_form(kriteria):
+    """Baca pengaturan normalisasi dari form kriteria (ValueError jika tidak valid)"""
+    simpan_normalisasi(kriteria,
+                       request.form.get('normalisasi', mode_default(kriteria.kode)),
+                       request.form.get('skala_min'),
+                       request.form.get('skala_max'))
+
+def _periksa_rubrik(keterangan):
+    """Rubrik yang tidak bisa dikompilasi tetap disimpan, tapi konversi nilai mentah nonaktif"""
+    try:
+        kompilasi_rubrik(keterangan or '')
+    except RubrikError as e:
+        flash(f'{e}. Konversi nilai mentah untuk kriteria ini tidak aktif.', 'warning')
+
+def _form_kriteria(kriteria=None, action='Tambah'):
+    pengaturan = db.session.get(NormalisasiKriteria, kriteria.id) if kriteria else None
+    return render_template('kriteria_form.html', kriteria=kriteria, action=action,
+                         normalisasi=pengaturan,
+                         mode_normalisasi=MODE_NORMALISASI,
+                         acuan_bawaan=NILAI_IDEAL)
 
 @app.route('/kriteria/tambah', methods=['GET', 'POST'])
 @login_required
+@ulangi_jika_terkunci
 def tambah_kriteria():
     if request.method == 'POST':
         kode = request.form['kode']
@@ -245,15 +336,24 @@ def tambah_kriteria():
             keterangan=keterangan
         )
         db.session.add(kriteria)
+        db.session.flush()
+        try:
+            _simpan_normalisasi_form(kriteria)
+        except ValueError as e:
+            db.session.rollback()
+            flash(str(e), 'danger')
+            return redirect(url_for('tambah_kriteria'))
         db.session.commit()
+        _periksa_rubrik(keterangan)
         
         flash('Kriteria berhasil ditambahkan!', 'success')
         return redirect(url_for('kriteria'))
     
-    return render_template('kriteria_form.html', action='Tambah')
+    return _form_kriteria()
 
 @app.route('/kriteria/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
+@ulangi_jika_terkunci
 def edit_kriteria(id):
     kriteria = Kriteria.query.get_or_404(id)
     
@@ -263,15 +363,23 @@ def edit_kriteria(id):
         kriteria.atribut = request.form['atribut']
         kriteria.bobot = float(request.form['bobot'])
         kriteria.keterangan = request.form.get('keterangan', '')
+        try:
+            _simpan_normalisasi_form(kriteria)
+        except ValueError as e:
+            db.session.rollback()
+            flash(str(e), 'danger')
+            return redirect(url_for('edit_kriteria', id=id))
         
         db.session.commit()
+        _periksa_rubrik(kriteria.keterangan)
         flash('Kriteria berhasil diupdate!', 'success')
         return redirect(url_for('kriteria'))
     
-    return render_template('kriteria_form.html', kriteria=kriteria, action='Edit')
+    return _form_kriteria(kriteria, 'Edit')
 
 @app.route('/kriteria/hapus/<int:id>')
 @login_required
+@ulangi_jika_terkunci
 def hapus_kriteria(id):
     kriteria = Kriteria.query.get_or_404(id)
     # Cek apakah kriteria digunakan
@@ -283,6 +391,19 @@ def hapus_kriteria(id):
         flash('Kriteria berhasil dihapus!', 'success')
     return redirect(url_for('kriteria'))
 
+@app.route('/api/kriteria/<int:id>/konversi')
+@login_required
+@baca_saja
+def konversi_kriteria(id):
+    """Pratinjau konversi nilai mentah (``?nilai=75jt``) menjadi skor lewat rubrik kriteria"""
+    kriteria = Kriteria.query.get_or_404(id)
+    teks = request.args.get('nilai', '')
+    try:
+        skor = konversi_nilai(kriteria, teks)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'success': True, 'kode': kriteria.kode, 'nilai': teks, 'skor': skor})
+
 # ========== BOBOT KRITERIA ==========
 @app.route('/bobot')
 @login_required
@@ -291,8 +412,34 @@ def bobot():
     total_bobot = sum([k.bobot for k in kriterias])
     return render_template('bobot.html', kriterias=kriterias, total_bobot=total_bobot)
 
+@app.route('/api/bobot/sensitivitas', methods=['POST'])
+@login_required
+@baca_saja
+def sensitivitas_bobot():
+    """What-if bobot: nilai banyak vektor bobot sekaligus tanpa menyimpan apa pun.
+
+    Body JSON: ``bobot_dasar`` (usulan), ``skenario`` (daftar vektor bobot)
+    dan/atau ``monte_carlo`` ({jumlah, sebaran, seed}), ``top``, ``tampil``.
+    """
+    data = request.get_json(silent=True) or {}
+    monte_carlo = data.get('monte_carlo')
+    if monte_carlo is not None and not isinstance(monte_carlo, dict):
+        return jsonify({'error': 'monte_carlo harus berupa objek'}), 400
+    
+    try:
+        hasil = analisis_sensitivitas(bobot_dasar=data.get('bobot_dasar'),
+                                      skenario=data.get('skenario'),
+                                      monte_carlo=monte_carlo,
+                                      top=data.get('top', 10),
+                                      tampil=data.get('tampil', 20))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'success': True, **hasil})
+
 @app.route('/bobot/update', methods=['POST'])
 @login_required
+@ulangi_jika_terkunci
 def update_bobot():
     if request.method == 'POST':
         kriterias = Kriteria.query.all()
@@ -301,61 +448,106 @@ def update_bobot():
             if bobot_key in request.form:
                 kriteria.bobot = float(request.form[bobot_key])
         
-        db.session.commit()
-        flash('Bobot kriteria berhasil diupdate!', 'success')
-        return redirect(url_for('bobot'))
+        # Skor seluruh nasabah dihitung ulang di latar; dua update beruntun digabung.
+        # Bobot ikut di-commit oleh antrikan, jadi tidak ada saat bobot baru tanpa
+        # pekerjaan hitung ulang yang tercatat (lihat snapshot.buat_snapshot)
+        db.session.info['tunda_hitung_ulang'] = True
+        try:
+            pekerjaan_id = antrikan('hitung-ulang-skor', kunci='hitung-ulang-skor', user_id=current_user.id)
+        finally:
+            db.session.info.pop('tunda_hitung_ulang', None)
+        flash('Bobot kriteria berhasil diupdate! Ranking sedang dihitung ulang.', 'success')
+        return redirect(url_for('bobot', pekerjaan=pekerjaan_id))
 
 # ========== NILAI ALTERNATIF ==========
 @app.route('/nilai')
 @login_required
 def nilai_alternatif():
-    nasabahs = Nasabah.query.all()
-    kriterias = Kriteria.query.order_by(Kriteria.kode).all()
+    halaman = halaman_id(db.session.query(Nasabah.id), Nasabah.id,
+                         request.args.get('after'), ukuran_halaman(request.args))
+    matriks = muat_matriks(nasabah_ids=[row.id for row in halaman])
+    kriterias = matriks.kriterias
     
-    # Buat dictionary untuk nilai
+    # Buat dictionary untuk nilai (hanya sel yang sudah terisi)
     nilai_dict = {}
-    for nasabah in nasabahs:
-        nilai_dict[nasabah.id] = {}
-        for nilai in nasabah.nilai:
-            nilai_dict[nasabah.id][nilai.kriteria_id] = nilai.nilai
+    for nasabah, baris in zip(matriks.nasabahs, matriks.nilai):
+        nilai_dict[nasabah.id] = {
+            kriteria_id: nilai
+            for kriteria_id, nilai in zip(matriks.kriteria_ids, baris)
+            if nilai is not None
+        }
     
     return render_template('nilai_alternatif.html', 
-                         nasabahs=nasabahs, 
+                         nasabahs=matriks.nasabahs, 
                          kriterias=kriterias,
-                         nilai_dict=nilai_dict)
+                         nilai_dict=nilai_dict,
+                         halaman=halaman,
+                         mulai=request.args.get('mulai', 0, type=int))
+
+@app.route('/nilai/grid', methods=['POST'])
+@login_required
+@ulangi_jika_terkunci
+def simpan_grid_nilai():
+    """Simpan sel-sel grid nilai yang berubah (field ``nilai_<nasabah_id>_<kriteria_id>``)"""
+    kriterias = {k.id: k for k in Kriteria.query.all()}
+    perubahan = []
+    tidak_valid = 0
+    for key, teks in request.form.items():
+        bagian = key.split('_')
+        if len(bagian) != 3 or bagian[0] != 'nilai' or not teks.strip():
+            continue
+        try:
+            nasabah_id, kriteria_id = int(bagian[1]), int(bagian[2])
+        except ValueError:
+            tidak_valid += 1
+            continue
+        kriteria = kriterias.get(kriteria_id)
+        if kriteria is None:
+            continue
+        # Sama dengan /nilai/edit: angka di luar rentang skor dikonversi lewat rubrik
+        try:
+            perubahan.append((nasabah_id, kriteria_id, konversi_nilai(kriteria, teks)))
+        except ValueError:
+            tidak_valid += 1
+
+    # Foreign key tidak ditegakkan SQLite: buang sel dengan nasabah yang tidak ada
+    nasabah_ids = {row.id for row in db.session.query(Nasabah.id)
+                   .filter(Nasabah.id.in_({p[0] for p in perubahan}))}
+    perubahan = [p for p in perubahan if p[0] in nasabah_ids]
+
+    berubah = simpan_nilai(perubahan)
+    if berubah:
+        commit_dan_perbarui(*berubah)
+
+    if tidak_valid:
+        flash(f'{tidak_valid} nilai tidak valid dan dilewati!', 'warning')
+    flash(f'{len(perubahan)} nilai untuk {len(berubah)} nasabah berhasil disimpan!', 'success')
+
+    # Kembali ke halaman grid yang sama (hanya path lokal)
+    kembali = request.form.get('kembali', '')
+    if not kembali.startswith('/') or kembali.startswith('//'):
+        kembali = url_for('nilai_alternatif')
+    return redirect(kembali)
 
 @app.route('/nilai/edit/<int:nasabah_id>', methods=['GET', 'POST'])
 @login_required
+@ulangi_jika_terkunci
 def edit_nilai(nasabah_id):
     nasabah = Nasabah.query.get_or_404(nasabah_id)
     kriterias = Kriteria.query.order_by(Kriteria.kode).all()
     
     if request.method == 'POST':
+        perubahan = []
         for kriteria in kriterias:
             nilai_key = f'nilai_{kriteria.id}'
             if nilai_key in request.form:
                 try:
-                    nilai = float(request.form[nilai_key])
-                    
-                    # Cek apakah nilai sudah ada
-                    nilai_nasabah = NilaiNasabah.query.filter_by(
-                        nasabah_id=nasabah_id,
-                        kriteria_id=kriteria.id
-                    ).first()
-                    
-                    if nilai_nasabah:
-                        nilai_nasabah.nilai = nilai
-                    else:
-                        nilai_nasabah = NilaiNasabah(
-                            nasabah_id=nasabah_id,
-                            kriteria_id=kriteria.id,
-                            nilai=nilai
-                        )
-                        db.session.add(nilai_nasabah)
+                    perubahan.append((nasabah_id, kriteria.id, konversi_nilai(kriteria, request.form[nilai_key])))
                 except ValueError:
                     flash(f'Nilai untuk {kriteria.nama} tidak valid!', 'warning')
         
-        db.session.commit()
+        simpan_nilai(perubahan)
+        commit_dan_perbarui(nasabah_id)
         flash('Nilai nasabah berhasil diupdate!', 'success')
         return redirect(url_for('nilai_alternatif'))
     
@@ -372,241 +564,290 @@ def edit_nilai(nasabah_id):
 # ========== PERHITUNGAN SAW ==========
 @app.route('/saw')
 @login_required
+@baca_saja
 def perhitungan_saw():
-    nasabahs = Nasabah.query.all()
+    """Kerangka halaman saja; baris matriks diambil per potongan dari /api/saw/baris"""
+    total = Nasabah.query.count()
     kriterias = Kriteria.query.order_by(Kriteria.kode).all()
     
-    if not nasabahs or not kriterias:
+    if not total or not kriterias:
         flash('Data belum lengkap!', 'warning')
         return redirect(url_for('dashboard'))
     
-    # Ambil semua nilai
-    semua_nilai = []
-    for nasabah in nasabahs:
-        nilai_row = {'nasabah': nasabah}
-        for kriteria in kriterias:
-            nilai_nasabah = NilaiNasabah.query.filter_by(
-                nasabah_id=nasabah.id,
-                kriteria_id=kriteria.id
-            ).first()
-            nilai_row[kriteria.id] = nilai_nasabah.nilai if nilai_nasabah else 0
-        semua_nilai.append(nilai_row)
-    
-    # NILAI IDEAL dari SKALA VERSI BARU
-    nilai_ideal = {
-        'C1': {'max': 90, 'min': 60},  # Skala 60-90
-        'C2': {'max': 85, 'min': 60},  # Skala 60-85  
-        'C3': {'max': 70, 'min': 50},  # Skala 50-70 (COST)
-        'C4': {'max': 75, 'min': 55},  # Skala 55-75
-        'C5': {'max': 80, 'min': 60}   # Skala 60-80
-    }
-    
-    # Normalisasi matriks
-    matriks_normalisasi = []
-    for row in semua_nilai:
-        normalized_row = {'nasabah': row['nasabah']}
-        for kriteria in kriterias:
-            nilai = row[kriteria.id]
-            ideal = nilai_ideal.get(kriteria.kode)
-            
-            if not ideal or nilai == 0:
-                normalized_row[kriteria.id] = 0
-            else:
-                if kriteria.atribut == 'benefit':
-                    # Benefit: r_ij = x_ij / max_ideal
-                    max_val = ideal['max']
-                    normalized_row[kriteria.id] = nilai / max_val if max_val > 0 else 0
-                else:  # cost
-                    # Cost: r_ij = min_ideal / x_ij
-                    min_val = ideal['min']
-                    normalized_row[kriteria.id] = min_val / nilai if nilai > 0 else 0
-        
-        matriks_normalisasi.append(normalized_row)
-    
-    # Hitung nilai preferensi
-    hasil_perhitungan = []
-    for i, row in enumerate(matriks_normalisasi):
-        nasabah = row['nasabah']
-        total_preferensi = 0
-        
-        for kriteria in kriterias:
-            normalized = row[kriteria.id]
-            preferensi = normalized * kriteria.bobot
-            total_preferensi += preferensi
-        
-        hasil_perhitungan.append({
-            'nasabah': nasabah,
-            'nilai_akhir': total_preferensi,
-            'matriks': semua_nilai[i],
-            'normalisasi': row
-        })
-    
     return render_template('perhitungan_saw.html',
-                         nasabahs=nasabahs,
+                         total=total,
                          kriterias=kriterias,
-                         semua_nilai=semua_nilai,
-                         matriks_normalisasi=matriks_normalisasi,
-                         nilai_ideal=nilai_ideal,
-                         hasil_perhitungan=hasil_perhitungan)
+                         nilai_ideal=nilai_acuan())
+
+@app.route('/api/saw/baris')
+@login_required
+@baca_saja
+@json_bercache('saw-baris')
+def saw_baris():
+    """Potongan baris matriks keputusan, normalisasi dan preferensi (urut id nasabah)"""
+    mulai = max(request.args.get('mulai', 0, type=int), 0)
+    ids = [row.id for row in db.session.query(Nasabah.id).order_by(Nasabah.id)
+           .offset(mulai).limit(ukuran_halaman(request.args))]
+    
+    # Acuan normalisasi dibaca dari tabel statistik, jadi tiap baris bisa dihitung terpisah
+    matriks = muat_matriks(nasabah_ids=ids)
+    hasil = hitung_saw(matriks, nilai_acuan())
+    
+    return {
+        'total': Nasabah.query.count(),
+        'mulai': mulai,
+        'baris': [{
+            'kode': nasabah.kode,
+            'nama': nasabah.nama,
+            'nilai': nilai,
+            'normalisasi': normal,
+            'preferensi': nilai_akhir
+        } for nasabah, nilai, normal, nilai_akhir in zip(matriks.nasabahs, hasil.nilai.tolist(),
+                                                         hasil.normalisasi.tolist(),
+                                                         hasil.preferensi.tolist())]
+    }
 
 # ========== HASIL RANKING (HTML) ==========
 @app.route('/ranking')
 @login_required
+@baca_saja
 def hasil_ranking():
-    nasabahs = Nasabah.query.all()
     kriterias = Kriteria.query.order_by(Kriteria.kode).all()
+    kategori = request.args.get('kategori')
+    cursor = request.args.get('after')
     
-    if not nasabahs:
-        flash('Belum ada data nasabah!', 'warning')
-        return redirect(url_for('dashboard'))
-    
-    # NILAI IDEAL
-    nilai_ideal = {
-        'C1': {'max': 90, 'min': 60},
-        'C2': {'max': 85, 'min': 60},  
-        'C3': {'max': 70, 'min': 50},
-        'C4': {'max': 75, 'min': 55},
-        'C5': {'max': 80, 'min': 60}
-    }
+    try:
+        query = query_ranking(kategori)
+    except ValueError:
+        flash('Kategori tidak dikenal!', 'warning')
+        return redirect(url_for('hasil_ranking'))
     
-    # Hitung ranking
-    semua_nilai = []
-    for nasabah in nasabahs:
-        nilai_row = {'nasabah': nasabah}
-        for kriteria in kriterias:
-            nilai_nasabah = NilaiNasabah.query.filter_by(
-                nasabah_id=nasabah.id,
-                kriteria_id=kriteria.id
-            ).first()
-            nilai_row[kriteria.id] = nilai_nasabah.nilai if nilai_nasabah else 0
-        semua_nilai.append(nilai_row)
-    
-    # Normalisasi dan hitung nilai preferensi
-    hasil_perhitungan = []
-    for row in semua_nilai:
-        nasabah = row['nasabah']
-        total_preferensi = 0
-        
-        for kriteria in kriterias:
-            nilai = row[kriteria.id]
-            ideal = nilai_ideal.get(kriteria.kode)
-            
-            if not ideal or nilai == 0:
-                normalized = 0
-            else:
-                if kriteria.atribut == 'benefit':
-                    max_val = ideal['max']
-                    normalized = nilai / max_val if max_val > 0 else 0
-                else:  # cost
-                    min_val = ideal['min']
-                    normalized = min_val / nilai if nilai > 0 else 0
-            
-            preferensi = normalized * kriteria.bobot
-            total_preferensi += preferensi
-        
-        hasil_perhitungan.append({
-            'nasabah': nasabah,
-            'nilai_akhir': total_preferensi
-        })
+    # Urutan diambil langsung dari skor tersimpan (ORDER BY di SQL), per halaman
+    halaman = halaman_skor(query, cursor, ukuran_halaman(request.args))
+    hasil_perhitungan = [
+        {'nasabah': row, 'nilai_akhir': row.skor}
+        for row in halaman
+    ]
     
-    # Urutkan dari nilai tertinggi ke terendah
-    hasil_perhitungan.sort(key=lambda x: x['nilai_akhir'], reverse=True)
+    if not hasil_perhitungan and not kategori and not cursor:
+        flash('Belum ada data nasabah!', 'warning')
+        return redirect(url_for('dashboard'))
     
     return render_template('hasil_ranking.html',
                          hasil_perhitungan=hasil_perhitungan,
-                         kriterias=kriterias)
+                         kriterias=kriterias,
+                         kategori=kategori,
+                         kategori_list=KATEGORI,
+                         halaman=halaman,
+                         mulai=request.args.get('mulai', 0, type=int))
+
+@app.route('/ranking/lengkap', methods=['POST'])
+@login_required
+def ranking_lengkap():
+    """Tulis urutan ranking lengkap ke file CSV di latar (memori terbatas)"""
+    pekerjaan_id = antrikan('ranking-lengkap', kunci='ranking-lengkap', user_id=current_user.id)
+    return redirect(url_for('hasil_ranking', pekerjaan=pekerjaan_id))
 
 # ========== LAPORAN ==========
 @app.route('/laporan')
 @login_required
 def laporan():
     total_nasabah = Nasabah.query.count()
-    return render_template('laporan.html', total_nasabah=total_nasabah)
+    # ?snapshot=<id>: laporan dibaca dari snapshot, bukan data yang sedang berjalan
+    snapshot = None
+    snapshot_id = request.args.get('snapshot', type=int)
+    if snapshot_id:
+        snapshot = db.session.get(SnapshotRanking, snapshot_id)
+        if snapshot is None:
+            abort(404)
+    snapshots = SnapshotRanking.query.order_by(SnapshotRanking.id.desc()).limit(50).all()
+    return render_template('laporan.html', total_nasabah=total_nasabah,
+                         snapshot=info_snapshot(snapshot) if snapshot else None,
+                         snapshots=snapshots)
+
+# ========== SNAPSHOT RANKING ==========
+@app.route('/snapshot', methods=['POST'])
+@login_required
+@ulangi_jika_terkunci
+def simpan_snapshot():
+    """Bekukan ranking saat ini untuk laporan periodik"""
+    try:
+        snapshot = buat_snapshot(request.form.get('nama'), user_id=current_user.id)
+    except ValueError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('laporan'))
+    db.session.commit()
+    flash(f'Snapshot "{snapshot.nama}" disimpan ({snapshot.jumlah} nasabah).', 'success')
+    return redirect(url_for('laporan', snapshot=snapshot.id))
+
+@app.route('/snapshot/hapus/<int:id>')
+@login_required
+@ulangi_jika_terkunci
+def hapus_snapshot(id):
+    snapshot = SnapshotRanking.query.get_or_404(id)
+    db.session.delete(snapshot)
+    db.session.commit()
+    cache_snapshot.kosongkan()
+    flash('Snapshot berhasil dihapus!', 'success')
+    return redirect(url_for('laporan'))
+
+@app.route('/api/snapshot')
+@login_required
+def daftar_snapshot():
+    snapshots = SnapshotRanking.query.order_by(SnapshotRanking.id.desc()).limit(100)
+    return jsonify({'success': True, 'data': [info_snapshot(s) for s in snapshots]})
+
+@app.route('/api/snapshot/<int:id>')
+@login_required
+def data_snapshot(id):
+    """Info, distribusi kategori dan baris peringkat ``mulai``..``mulai+limit`` dari satu snapshot"""
+    snapshot = db.session.get(SnapshotRanking, id)
+    if snapshot is None:
+        return jsonify({'error': 'Snapshot tidak ditemukan'}), 404
+    data = muat_snapshot(snapshot)
+    mulai = max(request.args.get('mulai', 0, type=int), 0)
+    limit = ukuran_halaman(request.args)
+    return jsonify({
+        'success': True,
+        **info_snapshot(snapshot),
+        'distribusi': distribusi_snapshot(data),
+        'mulai': mulai,
+        'next': mulai + limit if mulai + limit < snapshot.jumlah else None,
+        'data': halaman_snapshot(data, mulai, limit),
+    })
+
+@app.route('/api/snapshot/<int:lama>/banding/<int:baru>')
+@login_required
+def banding_snapshot(lama, baru):
+    """Perpindahan peringkat, nasabah masuk/keluar dan perubahan kategori antar dua snapshot"""
+    snapshot_lama = db.session.get(SnapshotRanking, lama)
+    snapshot_baru = db.session.get(SnapshotRanking, baru)
+    if snapshot_lama is None or snapshot_baru is None:
+        return jsonify({'error': 'Snapshot tidak ditemukan'}), 404
+    top = min(max(request.args.get('top', 20, type=int), 1), UKURAN_MAKS)
+    info_lama, info_baru = info_snapshot(snapshot_lama), info_snapshot(snapshot_baru)
+    return jsonify({
+        'success': True,
+        'lama': {k: v for k, v in info_lama.items() if k != 'bobot'},
+        'baru': {k: v for k, v in info_baru.items() if k != 'bobot'},
+        'bobot': bandingkan_bobot(info_lama['bobot'], info_baru['bobot']),
+        **bandingkan_snapshot(muat_snapshot(snapshot_lama), muat_snapshot(snapshot_baru), top),
+    })
+
+# ========== EKSPOR DATA ==========
+@app.route('/ekspor/nasabah.<format>')
+@login_required
+def ekspor_nasabah(format):
+    """Ekspor seluruh nasabah secara streaming (memori tetap berapapun jumlahnya)"""
+    if format == 'csv':
+        generator, mimetype = stream_csv(), 'text/csv'
+    elif format == 'ndjson':
+        generator, mimetype = stream_ndjson(), 'application/x-ndjson'
+    else:
+        return jsonify({'error': 'Format harus csv atau ndjson'}), 404
+    
+    return Response(
+        stream_with_context(generator),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=nasabah.{format}'}
+    )
+
+@app.route('/ekspor/nasabah.<format>/pekerjaan', methods=['POST'])
+@login_required
+def ekspor_nasabah_latar(format):
+    """Ekspor ke file di latar; hasilnya diunduh lewat /api/jobs/<id>/berkas"""
+    if format not in ('csv', 'ndjson'):
+        return jsonify({'error': 'Format harus csv atau ndjson'}), 404
+    
+    pekerjaan_id = antrikan('ekspor-nasabah', {'format': format}, user_id=current_user.id)
+    return redirect(url_for('laporan', pekerjaan=pekerjaan_id))
+
+# ========== PEKERJAAN LATAR ==========
+@app.route('/api/jobs')
+@login_required
+def daftar_job():
+    """Pekerjaan terbaru (maks. 50), opsional difilter ?status=antri|jalan|selesai|gagal"""
+    query = Pekerjaan.query
+    status = request.args.get('status')
+    if status:
+        query = query.filter_by(status=status)
+    jumlah = min(max(request.args.get('jumlah', 20, type=int), 1), 50)
+    return jsonify({'jobs': [status_pekerjaan(p) for p in query.order_by(Pekerjaan.id.desc()).limit(jumlah)]})
+
+@app.route('/api/jobs/<int:id>')
+@login_required
+def status_job(id):
+    pekerjaan = db.session.get(Pekerjaan, id)
+    if pekerjaan is None:
+        return jsonify({'error': 'Pekerjaan tidak ditemukan'}), 404
+    return jsonify(status_pekerjaan(pekerjaan))
+
+@app.route('/api/jobs/<int:id>/berkas')
+@login_required
+def berkas_job(id):
+    """Unduh file hasil pekerjaan ekspor"""
+    pekerjaan = db.session.get(Pekerjaan, id)
+    hasil = status_pekerjaan(pekerjaan)['hasil'] if pekerjaan and pekerjaan.status == 'selesai' else None
+    if not isinstance(hasil, dict) or not hasil.get('berkas'):
+        abort(404)
+    path = os.path.join(folder_pekerjaan(), os.path.basename(hasil['berkas']))
+    if not os.path.exists(path):
+        abort(404)
+    return send_file(path, as_attachment=True, download_name=hasil['nama_unduhan'])
 
 # ========== API UNTUK VISUALISASI DIAGRAM ==========
 @app.route('/api/ranking-visual')
 @login_required
+@baca_saja
+@json_bercache('ranking-visual')
 def ranking_visual():
     """API untuk data visualisasi ranking di dashboard"""
-    nasabahs = Nasabah.query.all()
-    kriterias = Kriteria.query.all()
+    total = Nasabah.query.count()
     
-    if not nasabahs:
-        return jsonify({'error': 'Belum ada data nasabah'})
+    if not total:
+        return {'error': 'Belum ada data nasabah'}
     
-    # Nilai ideal VERSI BARU
-    nilai_ideal = {
-        'C1': 90, 'C2': 85, 'C3': 50, 'C4': 75, 'C5': 80
-    }
-    
-    bobot = {
-        'C1': 0.25, 'C2': 0.15, 'C3': 0.15, 'C4': 0.20, 'C5': 0.25
-    }
-    
-    # Hitung skor setiap nasabah
+    # Ambil 10 teratas langsung dengan ORDER BY ... LIMIT pada skor tersimpan
     results = []
-    for nasabah in nasabahs:
-        total_score = 0
-        
-        for kriteria in kriterias:
-            nilai_obj = NilaiNasabah.query.filter_by(
-                nasabah_id=nasabah.id,
-                kriteria_id=kriteria.id
-            ).first()
-            
-            nilai = nilai_obj.nilai if nilai_obj else 0
-            
-            if nilai > 0:
-                ideal = nilai_ideal.get(kriteria.kode, 1)
-                
-                if kriteria.atribut == 'benefit':
-                    # Benefit: nilai / max
-                    normalized = nilai / ideal
-                else:  # cost (C3)
-                    # Cost: min / nilai
-                    normalized = ideal / nilai
-                
-                total_score += normalized * bobot.get(kriteria.kode, 0)
-        
-        # Konversi ke persen
-        score_percent = min(total_score * 100, 100)
-        
-        # Tentukan kategori
-        if score_percent >= 85:
-            kategori = "Sangat Baik 🏆"
-        elif score_percent >= 70:
-            kategori = "Baik 👍"
-        elif score_percent >= 55:
-            kategori = "Cukup ✅"
-        else:
-            kategori = "Perlu Perbaikan ⚠️"
-        
+    for nasabah in query_ranking().limit(10):
+        score_percent = float(skor_persen(nasabah.skor))
         results.append({
             'id': nasabah.id,
             'nama': nasabah.nama,
             'kode': nasabah.kode,
             'skor': round(score_percent, 1),
-            'kategori': kategori
+            'kategori': kategori_skor(score_percent)
         })
     
-    # Urutkan dari tertinggi
-    results.sort(key=lambda x: x['skor'], reverse=True)
-    
-    return jsonify({
+    return {
         'success': True,
-        'data': results[:10],  # Ambil 10 teratas
-        'total': len(results)
-    })
+        'data': results,
+        'total': total
+    }
+
+@app.route('/api/dashboard/ringkasan')
+@login_required
+@baca_saja
+@json_bercache('dashboard-ringkasan')
+def api_ringkasan_dashboard():
+    """Total nasabah/kriteria, distribusi empat kategori (seluruh nasabah) dan top-N (``top``, maks 100)"""
+    top = min(max(request.args.get('top', 10, type=int), 0), 100)
+    return {'success': True, **ringkasan_dashboard(top)}
 
 @app.route('/api/laporan-data')
 @login_required
+@baca_saja
+@json_bercache('laporan-data')
 def laporan_data():
-    nasabahs = Nasabah.query.all()
-    kriterias = Kriteria.query.order_by(Kriteria.kode).all()
+    halaman = halaman_id(db.session.query(Nasabah.id), Nasabah.id,
+                         request.args.get('after'), ukuran_halaman(request.args))
+    matriks = muat_matriks(nasabah_ids=[row.id for row in halaman])
+    kriterias = matriks.kriterias
 
     data = {
         'nasabahs': [],
-        'kriterias': []
+        'kriterias': [],
+        'next': halaman.next_cursor
     }
 
     for kriteria in kriterias:
@@ -618,7 +859,7 @@ def laporan_data():
             'keterangan': kriteria.keterangan
         })
 
-    for nasabah in nasabahs:
+    for nasabah, baris in zip(matriks.nasabahs, matriks.nilai):
         nasabah_data = {
             'kode': nasabah.kode,
             'nama': nasabah.nama,
@@ -627,22 +868,134 @@ def laporan_data():
             'nilai': {}
         }
 
-        for kriteria in kriterias:
-            nilai_nasabah = NilaiNasabah.query.filter_by(
-                nasabah_id=nasabah.id,
-                kriteria_id=kriteria.id
-            ).first()
-            nasabah_data['nilai'][kriteria.kode] = nilai_nasabah.nilai if nilai_nasabah else 0
+        for kriteria, nilai in zip(kriterias, baris):
+            nasabah_data['nilai'][kriteria.kode] = nilai if nilai is not None else 0
 
         data['nasabahs'].append(nasabah_data)
 
-    return jsonify(data)
+    return data
+
+@app.route('/api/ranking/grafik')
+@login_required
+@baca_saja
+@json_bercache('ranking-grafik')
+def ranking_grafik():
+    """Data diagram halaman ranking: N teratas (dibatasi) + distribusi kategori agregat"""
+    kategori = request.args.get('kategori')
+    jumlah = min(request.args.get('jumlah', 20, type=int), 50)
+    try:
+        query = query_ranking(kategori)
+    except ValueError:
+        return {'error': 'Kategori tidak dikenal'}
+    
+    teratas = []
+    for nasabah in query.limit(max(jumlah, 1)):
+        score_percent = float(skor_persen(nasabah.skor))
+        teratas.append({
+            'nama': nasabah.nama,
+            'kode': nasabah.kode,
+            'skor': round(score_percent, 2),
+            'kategori': kategori_skor(score_percent)
+        })
+    
+    return {
+        'teratas': teratas,
+        'distribusi': [
+            {'kode': kode, 'label': label, 'jumlah': jumlah_kategori}
+            for kode, label, jumlah_kategori in distribusi_kategori()
+        ]
+    }
+
+@app.route('/api/metode/banding')
+@login_required
+@baca_saja
+@json_bercache('metode-banding')
+def banding_metode():
+    """Peringkat berdampingan SAW/TOPSIS/WP/MOORA + korelasi peringkat antar metode.
+
+    ``metode`` dipisah koma (default semua), ``top`` jumlah baris (maks 500).
+    """
+    kode_metode = [kode.strip() for kode in request.args.get('metode', '').split(',') if kode.strip()]
+    top = min(max(request.args.get('top', 20, type=int), 1), UKURAN_MAKS)
+    try:
+        return {'success': True, **bandingkan_metode(kode_metode, top)}
+    except ValueError as e:
+        return {'error': str(e)}
+
+@app.route('/api/ranking/bertahap')
+@login_required
+@baca_saja
+@json_bercache('ranking-bertahap')
+def api_ranking_bertahap():
+    """Top-N + histogram skor dihitung langsung dari matriks per potongan (tanpa skor tersimpan).
+
+    ``top`` jumlah baris (maks 500), ``bobot`` opsional dipisah koma (urut kode kriteria).
+    """
+    top = min(max(request.args.get('top', 20, type=int), 1), UKURAN_MAKS)
+    bobot = request.args.get('bobot')
+    try:
+        if bobot:
+            bobot = [float(b) for b in bobot.split(',')]
+        hasil = ranking_bertahap(bobot=bobot, top=top)
+    except ValueError as e:
+        return {'error': str(e)}
+    hasil['distribusi'] = [{'kode': kode, 'label': label, 'jumlah': jumlah}
+                           for kode, label, jumlah in hasil['distribusi']]
+    return {'success': True, **hasil}
 
 @app.route('/api/ranking')
 @login_required
+@baca_saja
 def api_ranking():
     return ranking_visual()
 
+@app.route('/api/nasabah/search')
+@login_required
+@baca_saja
+def cari_nasabah():
+    """Pencarian nasabah (awalan kata) pada kode, nama, alamat dan telepon"""
+    halaman = halaman_pencarian(request.args.get('q', ''), request.args.get('after'),
+                                ukuran_halaman(request.args, default=20))
+    return jsonify({
+        'success': True,
+        'data': [{
+            'id': nasabah.id,
+            'kode': nasabah.kode,
+            'nama': nasabah.nama,
+            'alamat': nasabah.alamat,
+            'telepon': nasabah.telepon
+        } for nasabah in halaman],
+        'next': halaman.next_cursor
+    })
+
+@app.route('/api/nasabah/<int:id>/rank')
+@login_required
+@baca_saja
+def rank_nasabah(id):
+    """Posisi dan persentil satu nasabah tanpa memindai seluruh ranking"""
+    nasabah = Nasabah.query.get_or_404(id)
+    indeks = pastikan_indeks()
+    posisi = indeks.posisi(nasabah.id)
+    
+    if posisi is None:
+        return jsonify({'error': 'Nasabah belum masuk ranking'}), 404
+    
+    total = len(indeks)
+    score_percent = float(skor_persen(indeks.skor(nasabah.id)))
+    persentil = 100.0 if total == 1 else 100 * (total - posisi) / (total - 1)
+    
+    return jsonify({
+        'success': True,
+        'id': nasabah.id,
+        'kode': nasabah.kode,
+        'nama': nasabah.nama,
+        'posisi': posisi,
+        'total': total,
+        'skor': round(score_percent, 1),
+        'kategori': kategori_skor(score_percent),
+        'persentil': round(persentil, 1)
+    })
+
 # ========== MANAJEMEN USER (OPSIONAL) ==========
 @app.route('/users')
 @login_required
@@ -657,6 +1010,7 @@ def list_users():
 
 @app.route('/users/tambah', methods=['GET', 'POST'])
 @login_required
+@ulangi_jika_terkunci
 def tambah_user():
     """Tambah user baru (hanya admin)"""
     if current_user.role != 'admin':
@@ -688,6 +1042,8 @@ def tambah_user():
         
         db.session.add(user)
         db.session.commit()
+        # SQLite bisa memakai ulang id user yang sudah dihapus
+        cache_user.hapus(user.id)
         flash(f'User {username} berhasil ditambahkan!', 'success')
         return redirect(url_for('list_users'))
     
@@ -695,6 +1051,7 @@ def tambah_user():
 
 @app.route('/users/hapus/<int:id>')
 @login_required
+@ulangi_jika_terkunci
 def hapus_user(id):
     """Hapus user (hanya admin)"""
     if current_user.role != 'admin':
@@ -708,12 +1065,75 @@ def hapus_user(id):
     
     user = User.query.get_or_404(id)
     db.session.delete(user)
+    naikkan_versi_user(user.id)
     db.session.commit()
     flash(f'User {user.username} berhasil dihapus!', 'success')
     return redirect(url_for('list_users'))
 
+# ========== PERINTAH CLI ==========
+@app.cli.command('impor-nasabah')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def impor_nasabah_command(path):
+    """Impor nasabah dari file CSV/XLSX: flask --app app impor-nasabah data.csv"""
+    try:
+        with open(path, 'rb') as f:
+            hasil = impor_nasabah(baca_file(f, path))
+    except ImporError as e:
+        db.session.rollback()
+        raise click.ClickException(str(e))
+    
+    for nomor, pesan in hasil.kesalahan:
+        click.echo(f'Baris {nomor}: {pesan}', err=True)
+    click.echo(f'{hasil.jumlah_berhasil} nasabah diimpor, {len(hasil.kesalahan)} baris gagal.')
+
+@app.cli.command('isi-sintetis')
+@click.argument('jumlah', type=int)
+@click.option('--kriteria', type=int, default=None, help='Tambah kriteria sintetis sampai sejumlah ini')
+@click.option('--seed', type=int, default=0)
+@click.option('--mentah', is_flag=True, help='Isi nilai mentah (75jt, Sering) lewat rubrik')
+def isi_sintetis_command(jumlah, kriteria, seed, mentah):
+    """Tambah nasabah sintetis untuk uji performa: flask --app app isi-sintetis 100000"""
+    from data_sintetis import isi_sintetis
+    hasil = isi_sintetis(jumlah, kriteria=kriteria, seed=seed, mentah=mentah)
+    click.echo(f'{hasil.jumlah_berhasil} nasabah sintetis ditambahkan, {len(hasil.kesalahan)} baris gagal.')
+
+@app.cli.command('pekerjaan-jalankan')
+def pekerjaan_jalankan_command():
+    """Jalankan semua pekerjaan yang masih antri di proses ini lalu keluar"""
+    from pekerjaan import pelari
+    jumlah = 0
+    while pelari.jalankan_satu():
+        jumlah += 1
+    click.echo(f'{jumlah} pekerjaan dijalankan.')
+
+@app.cli.command('ranking-ekspor')
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+def ranking_ekspor_command(path):
+    """Tulis urutan ranking lengkap ke CSV dengan memori terbatas: flask --app app ranking-ekspor ranking.csv"""
+    hasil = ranking_bertahap(top=1, berkas=path)
+    click.echo(f'{hasil["total"]} nasabah ditulis ke {path}.')
+
+@app.cli.command('snapshot-buat')
+@click.argument('nama')
+def snapshot_buat_command(nama):
+    """Bekukan ranking saat ini (mis. dari cron bulanan): flask --app app snapshot-buat Januari-2026"""
+    try:
+        snapshot = buat_snapshot(nama)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    db.session.commit()
+    click.echo(f'Snapshot {snapshot.id} "{snapshot.nama}": {snapshot.jumlah} nasabah, {snapshot.ukuran // 1024} KB.')
+
+@app.cli.command('aset-unduh')
+@click.option('--timpa', is_flag=True, help='Unduh ulang file yang sudah ada')
+def aset_unduh_command(timpa):
+    """Unduh library vendor (Bootstrap, ECharts, jQuery) ke statics/vendor"""
+    for nama, ukuran in unduh_vendor(timpa=timpa):
+        click.echo(f'{nama} ({ukuran // 1024} KB)')
+    click.echo('Selesai. Commit folder statics/vendor agar ikut ter-deploy.')
+
 # ========== JALANKAN APLIKASI ==========
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()   # CUMA BUAT TABEL
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
@@ -0,0 +1,163 @@
+"""Pipeline aset statis: library vendor lokal, fingerprint hash isi dan varian gzip"""
+import gzip
+import hashlib
+import io
+import mimetypes
+import os
+import threading
+import urllib.request
+
+from flask import abort, request, send_file, url_for
+
+FOLDER_ASET = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'statics')
+
+# Path lokal (relatif ke statics/) -> sumber resmi dengan versi dipin.
+# Selama file belum diunduh (`flask aset-unduh`), template memakai URL sumber.
+VENDOR = {
+    'vendor/bootstrap/bootstrap.min.css':
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css',
+    'vendor/bootstrap/bootstrap.bundle.min.js':
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js',
+    'vendor/bootstrap-icons/bootstrap-icons.css':
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.8.1/font/bootstrap-icons.css',
+    'vendor/bootstrap-icons/fonts/bootstrap-icons.woff2':
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.8.1/font/fonts/bootstrap-icons.woff2',
+    'vendor/bootstrap-icons/fonts/bootstrap-icons.woff':
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.8.1/font/fonts/bootstrap-icons.woff',
+    'vendor/echarts/echarts.min.js':
+        'https://cdn.jsdelivr.net/npm/echarts@5.4.3/dist/echarts.min.js',
+    'vendor/jquery/jquery.min.js':
+        'https://code.jquery.com/jquery-3.6.0.min.js',
+}
+
+EKSTENSI_GZIP = {'.css', '.js', '.svg', '.json', '.txt', '.map'}
+CACHE_IMMUTABLE = 'public, max-age=31536000, immutable'
+PANJANG_HASH = 10
+
+
+class ManifestAset:
+    """Peta nama file -> nama ber-hash (``style.css`` -> ``style.1a2b3c4d5e.css``).
+
+    Hash dihitung dari isi file dan disimpan per (mtime, ukuran), sehingga
+    pemindaian ulang hanya membaca file yang berubah.
+    """
+
+    def __init__(self, folder=FOLDER_ASET):
+        self.folder = folder
+        self._hash = {}      # nama -> (mtime, ukuran, hash)
+        self._asli = {}      # nama ber-hash -> nama
+        self._gzip = {}      # hash -> bytes gzip
+        self._lock = threading.Lock()
+
+    def pindai(self):
+        with self._lock:
+            hash_baru = {}
+            for akar, _, files in os.walk(self.folder):
+                for file in files:
+                    path = os.path.join(akar, file)
+                    nama = os.path.relpath(path, self.folder).replace(os.sep, '/')
+                    stat = os.stat(path)
+                    lama = self._hash.get(nama)
+                    if lama and lama[:2] == (stat.st_mtime, stat.st_size):
+                        hash_baru[nama] = lama
+                    else:
+                        with open(path, 'rb') as f:
+                            isi = hashlib.sha256(f.read()).hexdigest()[:PANJANG_HASH]
+                        hash_baru[nama] = (stat.st_mtime, stat.st_size, isi)
+            self._hash = hash_baru
+            self._asli = {self._nama_hash(nama, h[2]): nama for nama, h in hash_baru.items()}
+
+    @staticmethod
+    def _nama_hash(nama, hash_isi):
+        dasar, ekstensi = os.path.splitext(nama)
+        return f'{dasar}.{hash_isi}{ekstensi}'
+
+    def url(self, nama):
+        """Nama ber-hash untuk ``nama``, atau None jika file tidak ada"""
+        entri = self._hash.get(nama)
+        return None if entri is None else self._nama_hash(nama, entri[2])
+
+    def cari(self, nama_hash):
+        """(nama asli, hash) untuk nama ber-hash, atau None"""
+        nama = self._asli.get(nama_hash)
+        return None if nama is None else (nama, self._hash[nama][2])
+
+    def gzip(self, nama, hash_isi):
+        """Isi gzip satu versi file; dikompresi sekali lalu disimpan di memori"""
+        data = self._gzip.get(hash_isi)
+        if data is None:
+            with open(os.path.join(self.folder, nama), 'rb') as f:
+                data = gzip.compress(f.read(), compresslevel=9, mtime=0)
+            self._gzip[hash_isi] = data
+        return data
+
+
+manifest = ManifestAset()
+
+
+def url_aset(nama):
+    """URL aset untuk template: ber-hash jika ada lokal, URL sumber untuk vendor yang belum diunduh"""
+    nama_hash = manifest.url(nama)
+    if nama_hash is None:
+        if nama in VENDOR:
+            return VENDOR[nama]
+        raise FileNotFoundError(f'Aset tidak ditemukan: {nama}')
+    return url_for('aset', nama=nama_hash)
+
+
+def kirim_aset(nama):
+    """Kirim aset: nama ber-hash di-cache selamanya, nama asli divalidasi ulang (ETag)"""
+    ditemukan = manifest.cari(nama)
+    if ditemukan is None:
+        path = os.path.join(manifest.folder, nama)
+        if manifest.url(nama) is None or not os.path.isfile(path):
+            abort(404)
+        # Nama tanpa hash, mis. font yang dirujuk relatif dari CSS vendor
+        response = send_file(path, conditional=True)
+        response.headers['Cache-Control'] = 'public, no-cache'
+        return response
+
+    nama_asli, hash_isi = ditemukan
+    ekstensi = os.path.splitext(nama_asli)[1].lower()
+    if ekstensi in EKSTENSI_GZIP and 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response = send_file(
+            io.BytesIO(manifest.gzip(nama_asli, hash_isi)),
+            mimetype=mimetypes.guess_type(nama_asli)[0], etag=hash_isi + '-gz',
+            conditional=True
+        )
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = send_file(os.path.join(manifest.folder, nama_asli), etag=hash_isi, conditional=True)
+    response.headers['Cache-Control'] = CACHE_IMMUTABLE
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def pasang_aset(app):
+    """Daftarkan route /aset, helper template ``aset()`` dan pemindaian manifest"""
+    manifest.pindai()
+    app.add_url_rule('/aset/<path:nama>', 'aset', kirim_aset)
+    app.jinja_env.globals['aset'] = url_aset
+
+    @app.before_request
+    def _pindai_saat_debug():
+        # Saat pengembangan file bisa berubah kapan saja
+        if app.debug:
+            manifest.pindai()
+
+
+def unduh_vendor(timpa=False):
+    """Unduh library vendor ke statics/vendor (sekali, lalu di-commit). Mengembalikan daftar file."""
+    hasil = []
+    for nama, url in VENDOR.items():
+        tujuan = os.path.join(FOLDER_ASET, *nama.split('/'))
+        if os.path.exists(tujuan) and not timpa:
+            continue
+        os.makedirs(os.path.dirname(tujuan), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=30) as sumber:
+            data = sumber.read()
+        with open(tujuan, 'wb') as f:
+            f.write(data)
+        hasil.append((nama, len(data)))
+    manifest.pindai()
+    return hasil
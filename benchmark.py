@@ -0,0 +1,284 @@
+"""Benchmark jalur ranking, laporan, impor dan edit lewat Flask test client.
+
+Setiap ukuran populasi dijalankan di proses dan database sementara sendiri
+(diisi ``data_sintetis``), sehingga angka memori dan cache tidak saling
+mempengaruhi. Per skenario dicatat latensi (median dan p95), jumlah query
+SQL dan puncak memori Python (tracemalloc, dijalankan terpisah agar tidak
+memperlambat pengukuran latensi). Hasil dibandingkan dengan baseline JSON.
+
+    python benchmark.py                                  # bandingkan dengan baseline
+    python benchmark.py --ukuran 1000,10000,100000 --simpan-baseline
+    python benchmark.py --skenario ranking,laporan-data --ulang 10
+
+Exit code 1 jika ada regresi: latensi atau memori naik lebih dari
+``--toleransi`` (default 25%), atau jumlah query bertambah.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BASELINE_DEFAULT = 'benchmark_baseline.json'
+UKURAN_DEFAULT = '1000,10000'
+BATAS_DERAU_MS = 10.0    # selisih latensi di bawah ini tidak dianggap regresi
+BARIS_IMPOR = 1000
+
+
+# ========== PROSES ANAK: SATU UKURAN POPULASI ==========
+class Penghitung:
+    """Hitung query SQL di semua engine (termasuk pekerjaan latar yang dijalankan inline)"""
+
+    def __init__(self, engines):
+        from sqlalchemy import event
+        self.jumlah = 0
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', self._tambah)
+
+    def _tambah(self, *args):
+        self.jumlah += 1
+
+
+def _csv_impor(baris):
+    buffer = io.StringIO()
+    header = list(baris[0])
+    writer = csv.DictWriter(buffer, fieldnames=header)
+    writer.writeheader()
+    writer.writerows(baris)
+    return buffer.getvalue().encode()
+
+
+def _skenario(app, client, kriterias, nasabah_ids):
+    """{nama: siapkan}; ``siapkan()`` melakukan persiapan (tidak diukur) lalu mengembalikan aksi yang diukur"""
+    from data_sintetis import baris_sintetis
+    from pekerjaan import pelari
+
+    urutan = {'edit': 0, 'impor': 0}
+
+    def form_nilai():
+        urutan['edit'] += 1
+        nasabah_id = nasabah_ids[urutan['edit'] * 7919 % len(nasabah_ids)]
+        data = {f'nilai_{k.id}': str(60 + (urutan['edit'] + j) % 4 * 10) for j, k in enumerate(kriterias)}
+        return nasabah_id, data
+
+    def edit():
+        nasabah_id, data = form_nilai()
+        _periksa(client.post(f'/nilai/edit/{nasabah_id}', data=data), 302)
+
+    def siapkan_impor():
+        urutan['impor'] += 1
+        with app.app_context():
+            baris = [row for _, row in baris_sintetis(BARIS_IMPOR, seed=urutan['impor'], mentah=True,
+                                                      awalan=f'B{urutan["impor"]:02d}')]
+        berkas = _csv_impor(baris)
+
+        def aksi():
+            _periksa(client.post('/alternatif/impor', data={'file': (io.BytesIO(berkas), 'bench.csv')}), 302)
+            with app.app_context():
+                while pelari.jalankan_satu():
+                    pass
+        return aksi
+
+    def get(url):
+        return lambda: _periksa(client.get(url), 200)
+
+    def dingin(url):
+        def siapkan():
+            edit()   # versi data naik: cache hasil kosong
+            return get(url)
+        return siapkan
+
+    def hangat(url):
+        def siapkan():
+            get(url)()
+            return get(url)
+        return siapkan
+
+    halaman = {
+        'saw': '/saw',
+        'saw-baris': '/api/saw/baris?mulai=0&limit=100',
+        'ranking': '/ranking',
+        'ranking-visual': '/api/ranking-visual',
+        'laporan-data': '/api/laporan-data',
+    }
+    skenario = {}
+    for nama, url in halaman.items():
+        skenario[f'{nama}-dingin'] = dingin(url)
+        skenario[f'{nama}-hangat'] = hangat(url)
+    skenario['edit-nilai'] = lambda: edit
+    skenario['impor'] = siapkan_impor
+    return skenario
+
+
+def _periksa(response, status):
+    if response.status_code != status:
+        raise RuntimeError(f'{response.request.path}: status {response.status_code}, diharapkan {status}')
+    return response
+
+
+def _ukur(siapkan, penghitung, ulang):
+    """Jalankan skenario ``ulang`` kali: latensi tiap putaran dan jumlah query putaran terakhir"""
+    waktu = []
+    query = 0
+    for _ in range(ulang):
+        jalankan = siapkan()
+        sebelum = penghitung.jumlah
+        mulai = time.perf_counter()
+        jalankan()
+        waktu.append((time.perf_counter() - mulai) * 1000)
+        query = penghitung.jumlah - sebelum
+    return waktu, query
+
+
+def _puncak_memori(siapkan):
+    jalankan = siapkan()
+    tracemalloc.start()
+    try:
+        jalankan()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _persentil(nilai, p):
+    nilai = sorted(nilai)
+    return nilai[min(len(nilai) - 1, int(round(p * (len(nilai) - 1))))]
+
+
+def jalankan_anak(ukuran, kriteria, ulang, pilihan):
+    """Isi database sementara lalu ukur semua skenario; hasil dicetak sebagai JSON"""
+    from app import app
+    from database import db
+    from data_sintetis import isi_sintetis
+    from models import Kriteria, Nasabah
+
+    app.testing = True   # pekerjaan latar dijalankan inline, bukan di thread
+    with app.app_context():
+        mulai = time.perf_counter()
+        hasil_isi = isi_sintetis(ukuran, kriteria=kriteria, seed=0)
+        waktu_isi = time.perf_counter() - mulai
+        kriterias = Kriteria.query.order_by(Kriteria.kode).all()
+        nasabah_ids = [row.id for row in db.session.query(Nasabah.id)]
+        engines = [db.engine] + ([app.extensions['sqlite_baca']] if 'sqlite_baca' in app.extensions else [])
+        penghitung = Penghitung(engines)
+        db.session.remove()
+
+    client = app.test_client()
+    _periksa(client.post('/login', data={'username': 'admin', 'password': 'admin123'}), 302)
+
+    hasil = {}
+    for nama, siapkan in _skenario(app, client, kriterias, nasabah_ids).items():
+        if pilihan and nama not in pilihan and nama.rsplit('-', 1)[0] not in pilihan:
+            continue
+        siapkan()()   # pemanasan: import lazy, kompilasi template, koneksi pool
+        waktu, query = _ukur(siapkan, penghitung, ulang)
+        hasil[nama] = {
+            'median_ms': round(_persentil(waktu, 0.5), 2),
+            'p95_ms': round(_persentil(waktu, 0.95), 2),
+            'query': query,
+            'memori_kb': round(_puncak_memori(siapkan) / 1024),
+        }
+    return {'ukuran': ukuran, 'kriteria': len(kriterias), 'isi_detik': round(waktu_isi, 2),
+            'gagal_isi': len(hasil_isi.kesalahan), 'skenario': hasil}
+
+
+# ========== PROSES INDUK ==========
+def jalankan_ukuran(ukuran, args):
+    with tempfile.TemporaryDirectory(prefix='spk-bench-') as folder:
+        env = dict(os.environ, SPK_DATABASE_URI='sqlite:///' + os.path.join(folder, 'bench.db'),
+                   METRIK_LAMBAT_MS='0')
+        perintah = [sys.executable, os.path.abspath(__file__), '--anak', str(ukuran),
+                    '--kriteria', str(args.kriteria), '--ulang', str(args.ulang)]
+        if args.skenario:
+            perintah += ['--skenario', args.skenario]
+        keluaran = subprocess.run(perintah, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                                  capture_output=True, text=True)
+    if keluaran.returncode != 0:
+        sys.stderr.write(keluaran.stderr)
+        raise SystemExit(f'Benchmark ukuran {ukuran} gagal')
+    return json.loads(keluaran.stdout.strip().splitlines()[-1])
+
+
+def bandingkan(hasil, baseline, toleransi):
+    """Daftar regresi (teks) dibanding baseline; skenario/ukuran tanpa baseline dilewati"""
+    regresi = []
+    for ukuran, data in hasil.items():
+        dasar_ukuran = baseline.get(ukuran, {}).get('skenario', {})
+        for nama, angka in data['skenario'].items():
+            dasar = dasar_ukuran.get(nama)
+            if dasar is None:
+                continue
+            if (angka['median_ms'] > dasar['median_ms'] * (1 + toleransi)
+                    and angka['median_ms'] - dasar['median_ms'] > BATAS_DERAU_MS):
+                regresi.append(f'{ukuran} {nama}: latensi {dasar["median_ms"]} -> {angka["median_ms"]} ms')
+            if angka['query'] > dasar['query']:
+                regresi.append(f'{ukuran} {nama}: query {dasar["query"]} -> {angka["query"]}')
+            if angka['memori_kb'] > dasar['memori_kb'] * (1 + toleransi) and angka['memori_kb'] - dasar['memori_kb'] > 256:
+                regresi.append(f'{ukuran} {nama}: memori {dasar["memori_kb"]} -> {angka["memori_kb"]} KB')
+    return regresi
+
+
+def cetak_tabel(hasil, baseline):
+    for ukuran, data in hasil.items():
+        print(f'\n== {ukuran} nasabah x {data["kriteria"]} kriteria (isi {data["isi_detik"]} s) ==')
+        print(f'{"skenario":<22}{"median ms":>11}{"p95 ms":>10}{"query":>7}{"memori KB":>11}{"baseline ms":>13}')
+        dasar_ukuran = baseline.get(ukuran, {}).get('skenario', {})
+        for nama, angka in data['skenario'].items():
+            dasar = dasar_ukuran.get(nama, {}).get('median_ms', '-')
+            print(f'{nama:<22}{angka["median_ms"]:>11}{angka["p95_ms"]:>10}{angka["query"]:>7}'
+                  f'{angka["memori_kb"]:>11}{dasar:>13}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SPK Koperasi')
+    parser.add_argument('--ukuran', default=UKURAN_DEFAULT, help='jumlah nasabah, dipisah koma')
+    parser.add_argument('--kriteria', type=int, default=5, help='jumlah kriteria (ditambah kriteria sintetis)')
+    parser.add_argument('--ulang', type=int, default=5, help='pengulangan per skenario')
+    parser.add_argument('--skenario', default='', help='nama skenario dipisah koma (default semua)')
+    parser.add_argument('--baseline', default=BASELINE_DEFAULT)
+    parser.add_argument('--simpan-baseline', action='store_true', help='tulis hasil sebagai baseline baru')
+    parser.add_argument('--toleransi', type=float, default=0.25)
+    parser.add_argument('--anak', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    pilihan = {nama.strip() for nama in args.skenario.split(',') if nama.strip()}
+
+    if args.anak is not None:
+        print(json.dumps(jalankan_anak(args.anak, args.kriteria, args.ulang, pilihan)))
+        return
+
+    hasil = {}
+    for ukuran in [int(u) for u in args.ukuran.split(',') if u.strip()]:
+        print(f'Mengukur {ukuran} nasabah...', file=sys.stderr)
+        hasil[str(ukuran)] = jalankan_ukuran(ukuran, args)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    cetak_tabel(hasil, baseline)
+
+    if args.simpan_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({**baseline, **hasil}, f, indent=2, sort_keys=True)
+        print(f'\nBaseline disimpan ke {args.baseline}')
+        return
+
+    if not baseline:
+        print(f'\nBelum ada baseline ({args.baseline}); jalankan dengan --simpan-baseline')
+        return
+    regresi = bandingkan(hasil, baseline, args.toleransi)
+    if regresi:
+        print('\nREGRESI:')
+        for baris in regresi:
+            print('  ' + baris)
+        raise SystemExit(1)
+    print('\nTidak ada regresi.')
+
+
+if __name__ == '__main__':
+    main()
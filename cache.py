@@ -0,0 +1,142 @@
+"""Cache hasil ranking berbasis versi data + dukungan ETag / 304"""
+from collections import OrderedDict
+from functools import wraps
+import hashlib
+import threading
+
+from flask import Response, current_app, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from database import db
+from models import Nasabah, Kriteria, NilaiNasabah, NormalisasiKriteria, VersiData
+
+# Model yang memengaruhi hasil ranking
+MODEL_TERPANTAU = (Nasabah, Kriteria, NilaiNasabah, NormalisasiKriteria)
+
+
+# ========== VERSI DATA ==========
+def naikkan_versi(connection):
+    """Naikkan versi data di dalam transaksi yang sedang berjalan"""
+    tabel = VersiData.__table__
+    hasil = connection.execute(
+        tabel.update().where(tabel.c.id == 1).values(versi=tabel.c.versi + 1)
+    )
+    if hasil.rowcount == 0:
+        connection.execute(tabel.insert().values(id=1, versi=1))
+
+
+def naikkan_versi_transaksi(session):
+    """Versi hanya naik satu kali per transaksi.
+
+    Selama transaksi tulis berjalan SQLite memegang write lock, sehingga
+    versi sebelum transaksi ini selalu ``versi baru - 1``.
+    """
+    transaksi = session.get_transaction()
+    if session.info.get('transaksi_versi') is not transaksi:
+        naikkan_versi(session.connection())
+        session.info['transaksi_versi'] = transaksi
+
+
+def versi_data():
+    """Versi data saat ini (dibaca dari database agar konsisten antar worker)"""
+    versi = db.session.query(VersiData.versi).filter_by(id=1).scalar()
+    return versi or 0
+
+
+def _ada_perubahan(session):
+    for obj in session.new:
+        if isinstance(obj, MODEL_TERPANTAU):
+            return True
+    for obj in session.deleted:
+        if isinstance(obj, MODEL_TERPANTAU):
+            return True
+    for obj in session.dirty:
+        if isinstance(obj, MODEL_TERPANTAU) and session.is_modified(obj):
+            return True
+    return False
+
+
+@event.listens_for(Session, 'after_flush')
+def _versi_setelah_flush(session, flush_context):
+    if _ada_perubahan(session):
+        naikkan_versi_transaksi(session)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _versi_operasi_massal(orm_execute_state):
+    """INSERT/UPDATE/DELETE massal tidak melewati flush, tangani di sini"""
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update
+            or orm_execute_state.is_delete):
+        return
+    if any(m.class_ in MODEL_TERPANTAU for m in orm_execute_state.all_mappers):
+        naikkan_versi_transaksi(orm_execute_state.session)
+
+
+# ========== CACHE HASIL ==========
+class CacheHasil:
+    """Cache LRU kecil: kunci -> (versi, nilai). Entri dengan versi lama dianggap kosong."""
+
+    def __init__(self, maks_entri=64):
+        self.maks_entri = maks_entri
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ambil(self, kunci, versi):
+        with self._lock:
+            entri = self._data.get(kunci)
+            if entri is None or entri[0] != versi:
+                return None
+            self._data.move_to_end(kunci)
+            return entri[1]
+
+    def simpan(self, kunci, versi, nilai):
+        with self._lock:
+            self._data[kunci] = (versi, nilai)
+            self._data.move_to_end(kunci)
+            while len(self._data) > self.maks_entri:
+                self._data.popitem(last=False)
+
+    def ambil_atau_hitung(self, kunci, versi, hitung):
+        nilai = self.ambil(kunci, versi)
+        if nilai is None:
+            nilai = hitung()
+            self.simpan(kunci, versi, nilai)
+        return nilai
+
+    def kosongkan(self):
+        with self._lock:
+            self._data.clear()
+
+
+cache_ranking = CacheHasil()
+
+
+def json_bercache(nama):
+    """Decorator untuk API JSON: hasil di-cache per versi data dan diberi ETag.
+
+    View cukup mengembalikan dict. Request dengan ``If-None-Match`` yang cocok
+    dijawab 304 tanpa menghitung ulang. ETag memuat hash parameter request
+    agar jawaban untuk ``?limit=``/``?top=`` lain tidak dianggap sama.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versi = versi_data()
+            kunci = (nama, request.query_string, tuple(sorted(kwargs.items())))
+            parameter = hashlib.sha256(repr(kunci[1:]).encode()).hexdigest()[:12]
+            etag = f'{nama}-{versi}-{parameter}'
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                body = cache_ranking.ambil_atau_hitung(
+                    kunci, versi,
+                    lambda: current_app.json.dumps(view(*args, **kwargs))
+                )
+                response = Response(body, mimetype='application/json')
+            response.set_etag(etag)
+            # Browser wajib validasi ulang, jawabannya cukup 304
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
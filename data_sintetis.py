@@ -0,0 +1,161 @@
+"""Data nasabah sintetis untuk pengujian performa (N nasabah x K kriteria).
+
+Sebaran nilai diturunkan dari rubrik ``Kriteria.keterangan``: kriteria
+berinterval (uang, tahun, kali) diberi nilai mentah acak (log-normal untuk
+uang/tahun, Poisson untuk kali) lalu dikonversi lewat rubrik, sehingga pita
+tengah paling sering muncul seperti data asli. Nilai mentah yang tidak masuk
+interval mana pun jatuh ke kategori teks (mis. 0x tunggakan -> ``Tidak``).
+Rubrik yang hanya berisi kategori memakai bobot binomial (kategori tengah
+paling sering).
+"""
+import math
+
+import numpy as np
+
+from database import db
+from impor import AKHIRAN_MENTAH, impor_nasabah
+from models import Kriteria, Nasabah, User
+from rubrik import rubrik_kriteria
+
+KRITERIA_DEFAULT = [
+    {'kode': 'C1', 'nama': 'Besarnya Jumlah Pinjaman', 'atribut': 'benefit', 'bobot': 0.25,
+     'keterangan': '>50jt:90\n21–50jt:80\n5–20jt:70\n≤5jt:60'},
+    {'kode': 'C2', 'nama': 'Banyak Jumlah Tabungan', 'atribut': 'benefit', 'bobot': 0.15,
+     'keterangan': '≥10jt:85\n5–9jt:70\n<5jt:60'},
+    {'kode': 'C3', 'nama': 'Keaktifan', 'atribut': 'cost', 'bobot': 0.15,
+     'keterangan': 'Sering:70\nJarang:60\nTidak Pernah:50'},
+    {'kode': 'C4', 'nama': 'Lama Keanggotaan', 'atribut': 'benefit', 'bobot': 0.20,
+     'keterangan': '≥5 th:75\n3–4 th:65\n<3 th:55'},
+    {'kode': 'C5', 'nama': 'Riwayat Tunggakan', 'atribut': 'benefit', 'bobot': 0.25,
+     'keterangan': 'Tidak:80\n1x:70\n≥2x:60'},
+]
+
+# Rubrik kriteria tambahan (K > jumlah kriteria yang ada), tanpa satuan
+RUBRIK_TAMBAHAN = '≥80:90\n60–79:75\n40–59:65\n<40:55'
+
+NAMA_DEPAN = ['Ahmad', 'Budi', 'Citra', 'Dewi', 'Eko', 'Fitri', 'Gita', 'Hadi', 'Indah', 'Joko',
+              'Kartika', 'Lestari', 'Made', 'Nur', 'Putu', 'Rina', 'Sari', 'Tono', 'Wati', 'Yusuf']
+NAMA_BELAKANG = ['Saputra', 'Wijaya', 'Lestari', 'Pratama', 'Hidayat', 'Kusuma', 'Santoso',
+                 'Nugroho', 'Rahayu', 'Siregar', 'Harahap', 'Setiawan']
+
+
+def siapkan_dasar():
+    """Admin dan kriteria default jika database masih kosong (seperti reset.py)"""
+    if not User.query.filter_by(username='admin').first():
+        admin = User(username='admin', nama_lengkap='Administrator Sistem', role='admin', active=True)
+        admin.set_password('admin123')
+        db.session.add(admin)
+    if not Kriteria.query.first():
+        for k in KRITERIA_DEFAULT:
+            db.session.add(Kriteria(**k))
+    db.session.commit()
+
+
+def tambah_kriteria(jumlah):
+    """Pastikan ada minimal ``jumlah`` kriteria; kriteria baru S01.. dan bobot diratakan ulang"""
+    kriterias = Kriteria.query.order_by(Kriteria.kode).all()
+    if len(kriterias) >= jumlah:
+        return
+    bobot_baru = sum(k.bobot for k in kriterias) / len(kriterias) if kriterias else 1.0
+    for nomor in range(len(kriterias) + 1, jumlah + 1):
+        kriterias.append(Kriteria(kode=f'S{nomor:02d}', nama=f'Kriteria Sintetis {nomor}',
+                                  atribut='benefit', bobot=bobot_baru, keterangan=RUBRIK_TAMBAHAN))
+        db.session.add(kriterias[-1])
+    total = sum(k.bobot for k in kriterias) or 1.0
+    for k in kriterias:
+        k.bobot = round(k.bobot / total, 4)
+    db.session.commit()
+
+
+# ========== SEBARAN PER KRITERIA ==========
+class SebaranKriteria:
+    """Pembangkit nilai satu kriteria: ``ambil(rng, n) -> (skor, teks mentah atau None)``"""
+
+    def __init__(self, kriteria):
+        self.kode = kriteria.kode
+        self.rubrik = rubrik_kriteria(kriteria)
+        kategori = list(self.rubrik.kategori.items())
+        self.teks_kategori = [teks for teks, _ in kategori]
+        self.skor_kategori = np.array([skor for _, skor in kategori], dtype=float)
+        m = len(kategori)
+        bobot = np.array([math.comb(m - 1, i) + 1 for i in range(m)], dtype=float)
+        self.peluang_kategori = bobot / bobot.sum() if m else bobot
+
+        batas = [b for b in self.rubrik.batas.tolist() if math.isfinite(b) and b > 0]
+        if self.rubrik.atas is not None:
+            batas.append(self.rubrik.atas[0])
+        self.batas = batas
+
+    def _mentah(self, rng, n):
+        """Nilai mentah dalam satuan dasar rubrik (rupiah, tahun, kali)"""
+        if self.rubrik.dimensi == 'kali':
+            return rng.poisson(0.7 * min(self.batas), n).astype(float)
+        log_batas = np.log(self.batas)
+        median = log_batas.mean()
+        sebaran = max(0.5, (log_batas.max() - log_batas.min()) / 2)
+        nilai = np.exp(rng.normal(median, sebaran, n))
+        if self.rubrik.dimensi == 'uang':
+            return np.round(nilai, -4)   # kelipatan Rp 10.000
+        return np.round(nilai, 1 if self.rubrik.dimensi == 'waktu' else 0)
+
+    def ambil(self, rng, n):
+        skor = np.full(n, np.nan)
+        mentah = None
+        if self.batas:
+            mentah = self._mentah(rng, n)
+            skor = self.rubrik.skor_angka(mentah)
+        kosong = np.isnan(skor)
+        if kosong.any() and len(self.skor_kategori):
+            pilihan = rng.choice(len(self.skor_kategori), kosong.sum(), p=self.peluang_kategori)
+            skor[kosong] = self.skor_kategori[pilihan]
+            mentah = np.empty(n, dtype=object) if mentah is None else mentah.astype(object)
+            mentah[kosong] = [self.teks_kategori[i] for i in pilihan]
+        if np.isnan(skor).any():
+            # Rubrik kosong/tidak valid: skor langsung di sekitar 50..90
+            skor = np.where(np.isnan(skor), np.clip(np.round(rng.normal(70, 10, n)), 50, 90), skor)
+            mentah = None
+        return skor, mentah
+
+
+def baris_sintetis(jumlah, seed=0, mentah=False, awalan='S', mulai=1, ukuran_potongan=10_000):
+    """Iterator (nomor_baris, dict) seperti ``impor.baca_file`` untuk ``impor_nasabah``.
+
+    ``mentah=True`` mengisi kolom ``<kode>_mentah`` (mis. 37500000, ``Sering``)
+    agar jalur konversi rubrik ikut teruji.
+    """
+    rng = np.random.default_rng(seed)
+    sebaran = [SebaranKriteria(k) for k in Kriteria.query.order_by(Kriteria.kode).all()]
+    for awal in range(0, jumlah, ukuran_potongan):
+        n = min(ukuran_potongan, jumlah - awal)
+        kolom = {}
+        for s in sebaran:
+            skor, teks = s.ambil(rng, n)
+            if mentah and teks is not None:
+                kolom[s.kode + AKHIRAN_MENTAH] = [str(int(t)) if isinstance(t, float) and t.is_integer()
+                                                  else str(t) for t in teks]
+            else:
+                kolom[s.kode] = [f'{x:g}' for x in skor]
+        depan = rng.integers(len(NAMA_DEPAN), size=n)
+        belakang = rng.integers(len(NAMA_BELAKANG), size=n)
+        telepon = rng.integers(10**9, 10**10, size=n)
+        for i in range(n):
+            nomor = mulai + awal + i
+            row = {
+                'kode': f'{awalan}{nomor:07d}',
+                'nama': f'{NAMA_DEPAN[depan[i]]} {NAMA_BELAKANG[belakang[i]]}',
+                'alamat': f'Jl. Koperasi No. {nomor % 500 + 1}',
+                'telepon': f'08{telepon[i]}',
+            }
+            for nama, nilai in kolom.items():
+                row[nama] = nilai[i]
+            yield awal + i + 2, row
+
+
+def isi_sintetis(jumlah, kriteria=None, seed=0, mentah=False, awalan='S'):
+    """Tambahkan ``jumlah`` nasabah sintetis lewat jalur impor biasa; kembalikan HasilImpor"""
+    siapkan_dasar()
+    if kriteria:
+        tambah_kriteria(kriteria)
+    # Lanjutkan penomoran kode agar bisa dijalankan berulang kali
+    mulai = Nasabah.query.filter(Nasabah.kode.like(f'{awalan}%')).count() + 1
+    return impor_nasabah(baris_sintetis(jumlah, seed=seed, mentah=mentah, awalan=awalan, mulai=mulai))
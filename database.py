@@ -1,5 +1,179 @@
+from functools import wraps
+import os
+from pathlib import Path
+import sqlite3
+import time
+
+from flask import current_app, g, has_app_context, jsonify, request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as SessionFlask
 from flask_login import LoginManager
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool
+
+
+class SesiSPK(SessionFlask):
+    """Session yang mengarahkan query ke pool read-only pada endpoint ``@baca_saja``"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context() and g.get('baca_saja'):
+            engine = engine_baca()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': SesiSPK})
+login_manager = LoginManager()
+
+
+# ========== PROFIL ENGINE SQLITE ==========
+# Nama pengaturan (app.config atau environment variable) dan nilai default
+PENGATURAN_SQLITE = {
+    'SQLITE_JOURNAL_MODE': 'WAL',
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_CACHE_SIZE': -20000,           # negatif = KiB (~20 MB per koneksi)
+    'SQLITE_MMAP_SIZE': 256 * 1024 * 1024,
+    'SQLITE_TEMP_STORE': 'MEMORY',
+    'SQLITE_BUSY_TIMEOUT': 5000,           # milidetik menunggu lock
+    'SQLITE_LOCK_RETRIES': 3,              # ulangi request tulis jika tetap terkunci
+    'SQLITE_READ_POOL_SIZE': 5,            # 0 = tanpa pool read-only
+}
+
+PILIHAN_SQLITE = {
+    'SQLITE_JOURNAL_MODE': {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'},
+    'SQLITE_SYNCHRONOUS': {'OFF', 'NORMAL', 'FULL', 'EXTRA'},
+    'SQLITE_TEMP_STORE': {'DEFAULT', 'FILE', 'MEMORY'},
+}
+
+
+def _baca_pengaturan(app):
+    """Gabungkan app.config, environment dan default lalu validasi nilainya"""
+    pengaturan = {}
+    for nama, default in PENGATURAN_SQLITE.items():
+        nilai = app.config.get(nama, os.environ.get(nama, default))
+        if nama in PILIHAN_SQLITE:
+            nilai = str(nilai).upper()
+            if nilai not in PILIHAN_SQLITE[nama]:
+                raise ValueError(f'{nama} tidak valid: {nilai}')
+        else:
+            try:
+                nilai = int(nilai)
+            except (TypeError, ValueError):
+                raise ValueError(f'{nama} harus berupa bilangan bulat: {nilai}')
+        pengaturan[nama] = nilai
+    return pengaturan
+
+
+def _pragma_umum(cursor, pengaturan):
+    cursor.execute(f"PRAGMA busy_timeout = {pengaturan['SQLITE_BUSY_TIMEOUT']}")
+    cursor.execute(f"PRAGMA cache_size = {pengaturan['SQLITE_CACHE_SIZE']}")
+    cursor.execute(f"PRAGMA mmap_size = {pengaturan['SQLITE_MMAP_SIZE']}")
+    cursor.execute(f"PRAGMA temp_store = {pengaturan['SQLITE_TEMP_STORE']}")
+
+
+def pasang_profil_sqlite(app):
+    """Pasang pragma produksi pada setiap koneksi engine utama.
+
+    Dipanggil setelah ``db.init_app(app)``. Foreign key sengaja tidak
+    diaktifkan: data lama bisa memuat baris yatim dan perilaku hapus
+    akan berubah.
+    """
+    pengaturan = _baca_pengaturan(app)
+    app.config.update(pengaturan)
+    app.register_error_handler(OperationalError, _tangani_operational_error)
+
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _pragma_koneksi(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode = {pengaturan['SQLITE_JOURNAL_MODE']}")
+        cursor.execute(f"PRAGMA synchronous = {pengaturan['SQLITE_SYNCHRONOUS']}")
+        _pragma_umum(cursor, pengaturan)
+        cursor.close()
+
+    path = engine.url.database
+    if pengaturan['SQLITE_READ_POOL_SIZE'] > 0 and path and path != ':memory:':
+        app.extensions['sqlite_baca'] = _buat_engine_baca(path, pengaturan)
+
+
+def _buat_engine_baca(path, pengaturan):
+    """Engine terpisah dengan koneksi ``mode=ro`` (tidak bisa menulis sama sekali)"""
+    uri = Path(path).resolve().as_uri() + '?mode=ro'
+
+    def buka_koneksi():
+        return sqlite3.connect(uri, uri=True, check_same_thread=False,
+                               timeout=pengaturan['SQLITE_BUSY_TIMEOUT'] / 1000)
+
+    engine = create_engine('sqlite://', creator=buka_koneksi, poolclass=QueuePool,
+                           pool_size=pengaturan['SQLITE_READ_POOL_SIZE'], max_overflow=0)
+
+    @event.listens_for(engine, 'connect')
+    def _pragma_koneksi_baca(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA query_only = ON')
+        _pragma_umum(cursor, pengaturan)
+        cursor.close()
+
+    return engine
+
+
+def engine_baca():
+    """Engine read-only aplikasi aktif, atau None jika tidak dipakai"""
+    return current_app.extensions.get('sqlite_baca')
+
+
+# ========== DECORATOR VIEW ==========
+def baca_saja(view):
+    """Jalankan query endpoint ini lewat pool read-only (laporan/ranking berat)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.baca_saja = True
+        try:
+            return view(*args, **kwargs)
+        finally:
+            g.baca_saja = False
+    return wrapper
+
+
+def _terkunci(error):
+    pesan = str(error.orig).lower()
+    return 'database is locked' in pesan or 'database is busy' in pesan
+
+
+def ulangi_jika_terkunci(view):
+    """Ulangi request tulis jika SQLite tetap terkunci setelah busy timeout habis"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        percobaan = current_app.config.get('SQLITE_LOCK_RETRIES', 0)
+        for ke in range(percobaan + 1):
+            try:
+                return view(*args, **kwargs)
+            except OperationalError as e:
+                if ke == percobaan or not _terkunci(e):
+                    raise
+                db.session.rollback()
+                time.sleep(0.05 * 2 ** ke)
+    return wrapper
+
+
+def _tangani_operational_error(error):
+    """Lock yang tetap tertahan setelah semua percobaan -> 503 + Retry-After (bukan 500)"""
+    if not _terkunci(error):
+        raise error   # error lain tetap ditangani Flask seperti biasa (500 + log)
 
-db = SQLAlchemy()
-login_manager = LoginManager()
\ No newline at end of file
+    db.session.rollback()
+    current_app.logger.warning('Database terkunci: %s %s', request.method, request.path)
+    if request.path.startswith('/api/'):
+        response = jsonify({'error': 'Database sedang sibuk, coba lagi'})
+    else:
+        response = current_app.response_class('Database sedang sibuk, silakan coba lagi.', mimetype='text/plain')
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    response.headers['X-SPK-Galat'] = 'database-terkunci'
+    return response
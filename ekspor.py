@@ -0,0 +1,95 @@
+"""Ekspor streaming (CSV / NDJSON) seluruh nasabah, nilai kriteria dan skor"""
+import csv
+import io
+import json
+
+from database import db
+from matriks import muat_matriks
+from models import Nasabah, Kriteria, SkorNasabah
+from saw import kategori_skor, skor_persen
+
+UKURAN_BATCH = 1000
+UKURAN_CHUNK = 64 * 1024  # kirim ke klien setiap ~64 KB
+
+
+def baris_ekspor(ukuran_batch=UKURAN_BATCH, progres=None):
+    """Generator satu dict per nasabah, dibaca dari database per batch id.
+
+    Memori yang dipakai hanya sebesar satu batch, berapapun jumlah nasabah.
+    ``progres(jumlah_baris)`` dipanggil setelah setiap batch.
+    """
+    kriterias = Kriteria.query.order_by(Kriteria.kode).all()
+    id_terakhir = 0
+    jumlah = 0
+
+    while True:
+        ids = [row.id for row in db.session.query(Nasabah.id)
+               .filter(Nasabah.id > id_terakhir)
+               .order_by(Nasabah.id)
+               .limit(ukuran_batch)]
+        if not ids:
+            return
+
+        matriks = muat_matriks(kriterias, nasabah_ids=ids)
+        skor = dict(db.session.query(SkorNasabah.nasabah_id, SkorNasabah.skor)
+                    .filter(SkorNasabah.nasabah_id.in_(ids)))
+
+        for nasabah, nilai in zip(matriks.nasabahs, matriks.nilai):
+            nilai_akhir = skor.get(nasabah.id, 0.0)
+            yield {
+                'kode': nasabah.kode,
+                'nama': nasabah.nama,
+                'alamat': nasabah.alamat,
+                'telepon': nasabah.telepon,
+                'nilai': {k.kode: v for k, v in zip(kriterias, nilai)},
+                'nilai_akhir': nilai_akhir,
+                'kategori': kategori_skor(float(skor_persen(nilai_akhir)))
+            }
+
+        id_terakhir = ids[-1]
+        jumlah += len(ids)
+        if progres is not None:
+            progres(jumlah)
+
+
+def stream_csv(ukuran_batch=UKURAN_BATCH, progres=None):
+    """Generator teks CSV (header lalu satu baris per nasabah)"""
+    kode_kriteria = [k.kode for k in Kriteria.query.order_by(Kriteria.kode).all()]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def ambil():
+        teks = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return teks
+
+    writer.writerow(['kode', 'nama', 'alamat', 'telepon'] + kode_kriteria
+                    + ['nilai_akhir', 'kategori'])
+
+    for row in baris_ekspor(ukuran_batch, progres):
+        writer.writerow(
+            [row['kode'], row['nama'], row['alamat'], row['telepon']]
+            + ['' if row['nilai'].get(kode) is None else row['nilai'][kode] for kode in kode_kriteria]
+            + [row['nilai_akhir'], row['kategori']]
+        )
+        if buffer.tell() >= UKURAN_CHUNK:
+            yield ambil()
+
+    yield ambil()
+
+
+def stream_ndjson(ukuran_batch=UKURAN_BATCH, progres=None):
+    """Generator NDJSON, satu objek JSON per baris"""
+    potongan = []
+    ukuran = 0
+    for row in baris_ekspor(ukuran_batch, progres):
+        baris = json.dumps(row, ensure_ascii=False) + '\n'
+        potongan.append(baris)
+        ukuran += len(baris)
+        if ukuran >= UKURAN_CHUNK:
+            yield ''.join(potongan)
+            potongan = []
+            ukuran = 0
+
+    yield ''.join(potongan)
@@ -0,0 +1,219 @@
+"""Impor massal nasabah + nilai kriteria dari file CSV / XLSX"""
+import csv
+from datetime import datetime
+import io
+import math
+import os
+
+from cache import naikkan_versi_transaksi
+from database import db
+from models import Nasabah, Kriteria
+from rubrik import rubrik_kriteria
+from skor import perbarui_skor
+
+try:
+    import openpyxl
+except ImportError:  # XLSX opsional, CSV tetap bisa dipakai
+    openpyxl = None
+
+UKURAN_BATCH = 5000
+KOLOM_NASABAH = {'kode': 10, 'nama': 100, 'alamat': 200, 'telepon': 15}  # panjang maksimal
+AKHIRAN_MENTAH = '_mentah'  # kolom C1_mentah: nilai mentah yang selalu dikonversi lewat rubrik
+
+
+class ImporError(Exception):
+    """File tidak bisa dibaca sama sekali (format/kolom salah)"""
+
+
+class HasilImpor:
+    def __init__(self):
+        self.jumlah_berhasil = 0
+        self.kesalahan = []  # (nomor baris, pesan)
+
+    def tambah_kesalahan(self, nomor_baris, pesan):
+        self.kesalahan.append((nomor_baris, pesan))
+
+
+# ========== PEMBACA FILE ==========
+def _baris_csv(stream):
+    teks = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    reader = csv.reader(teks)
+    header = next(reader, None)
+    if header is None:
+        raise ImporError('File kosong')
+    yield [h.strip() for h in header]
+    for baris in reader:
+        yield baris
+
+
+def _baris_xlsx(stream):
+    if openpyxl is None:
+        raise ImporError('Impor XLSX membutuhkan paket openpyxl')
+    workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    for baris in workbook.active.iter_rows(values_only=True):
+        yield ['' if sel is None else str(sel).strip() for sel in baris]
+
+
+def baca_file(stream, nama_file):
+    """Iterator (nomor_baris, dict) dari file CSV atau XLSX; baris 1 adalah header"""
+    ekstensi = os.path.splitext(nama_file)[1].lower()
+    if ekstensi == '.csv':
+        baris_iter = _baris_csv(stream)
+    elif ekstensi == '.xlsx':
+        baris_iter = _baris_xlsx(stream)
+    else:
+        raise ImporError('Format file harus .csv atau .xlsx')
+
+    header = next(baris_iter, None)
+    if not header or 'kode' not in header or 'nama' not in header:
+        raise ImporError('Header wajib memuat kolom kode dan nama')
+
+    for nomor, baris in enumerate(baris_iter, start=2):
+        if not any(baris):
+            continue
+        yield nomor, dict(zip(header, baris))
+
+
+# ========== VALIDASI ==========
+def _validasi(row, kriterias):
+    """Kembalikan (data_nasabah, {kriteria_id: nilai}, {kriteria_id: teks mentah}) atau raise ValueError
+
+    ``kriterias`` berupa daftar (kode, id, rentang skor rubrik) agar tidak mengakses
+    atribut ORM per sel. Sama dengan ``rubrik.konversi_nilai``: angka dianggap skor
+    hanya jika berada dalam rentang skor rubrik. Sel lain (``75jt``, ``Sering``,
+    angka di luar rentang) dan kolom ``<kode>_mentah`` dikumpulkan sebagai teks
+    mentah untuk dikonversi per batch.
+    """
+    data = {}
+    for kolom, panjang in KOLOM_NASABAH.items():
+        nilai = (row.get(kolom) or '').strip()
+        if len(nilai) > panjang:
+            raise ValueError(f'{kolom} maksimal {panjang} karakter')
+        data[kolom] = nilai
+    if not data['kode'] or not data['nama']:
+        raise ValueError('kode dan nama wajib diisi')
+
+    nilai_kriteria = {}
+    mentah = {}
+    for kode, kriteria_id, rentang in kriterias:
+        teks = (row.get(kode) or '').strip()
+        if not teks:
+            teks = (row.get(kode + AKHIRAN_MENTAH) or '').strip()
+            if teks:
+                mentah[kriteria_id] = teks
+            continue
+        try:
+            angka = float(teks)
+        except ValueError:
+            mentah[kriteria_id] = teks
+            continue
+        if not math.isfinite(angka):
+            raise ValueError(f'Nilai {kode} harus angka berhingga: {teks}')
+        if rentang is None or rentang[0] <= angka <= rentang[1]:
+            nilai_kriteria[kriteria_id] = angka
+        else:
+            mentah[kriteria_id] = teks
+    return data, nilai_kriteria, mentah
+
+
+def _konversi_mentah(batch, rubriks, hasil):
+    """Konversi semua nilai mentah satu batch per kolom kriteria (vektor), buang baris yang gagal"""
+    gagal = {}
+    for kriteria_id, (kode, rubrik) in rubriks.items():
+        posisi = [i for i, item in enumerate(batch) if kriteria_id in item[3]]
+        if not posisi:
+            continue
+        skor = rubrik.skor_kolom([batch[i][3][kriteria_id] for i in posisi])
+        for i, nilai in zip(posisi, skor.tolist()):
+            if nilai != nilai:  # NaN: tidak cocok dengan rubrik
+                gagal.setdefault(i, f'Nilai {kode} tidak cocok dengan rubrik: {batch[i][3][kriteria_id]}')
+            else:
+                batch[i][2][kriteria_id] = nilai
+
+    for i, pesan in sorted(gagal.items()):
+        hasil.tambah_kesalahan(batch[i][0], pesan)
+    return [(nomor, data, nilai_kriteria)
+            for i, (nomor, data, nilai_kriteria, _) in enumerate(batch) if i not in gagal]
+
+
+# ========== IMPOR ==========
+def _simpan_batch(batch):
+    """Insert satu batch nasabah + nilainya dengan executemany DBAPI, lalu commit"""
+    connection = db.session.connection()
+    sekarang = datetime.utcnow()
+    connection.exec_driver_sql(
+        'INSERT INTO nasabah (kode, nama, alamat, telepon, created_at) VALUES (?, ?, ?, ?, ?)',
+        [(d['kode'], d['nama'], d['alamat'], d['telepon'], sekarang) for _, d, _ in batch]
+    )
+
+    kodes = [data['kode'] for _, data, _ in batch]
+    ids = dict(db.session.query(Nasabah.kode, Nasabah.id).filter(Nasabah.kode.in_(kodes)))
+    nilai_rows = [
+        (ids[data['kode']], kriteria_id, nilai)
+        for _, data, nilai_kriteria in batch
+        for kriteria_id, nilai in nilai_kriteria.items()
+    ]
+    if nilai_rows:
+        connection.exec_driver_sql(
+            'INSERT INTO nilai_nasabah (nasabah_id, kriteria_id, nilai) VALUES (?, ?, ?)',
+            nilai_rows
+        )
+
+    # Insert Core tidak melewati event ORM: versi data dan skor diperbarui manual
+    naikkan_versi_transaksi(db.session())
+    perbarui_skor(connection, ids.values())
+    db.session.commit()
+
+
+def impor_nasabah(baris_iter, ukuran_batch=UKURAN_BATCH, progres=None):
+    """Validasi dan simpan baris-baris file. Baris yang salah dilewati dan dicatat.
+
+    ``progres(nomor_baris)`` dipanggil setelah setiap batch tersimpan.
+    """
+    semua_kriteria = Kriteria.query.all()
+    rubriks = {k.id: (k.kode, rubrik_kriteria(k)) for k in semua_kriteria}
+    kriterias = [(kode, kriteria_id, rubrik.rentang_skor) for kriteria_id, (kode, rubrik) in rubriks.items()]
+    hasil = HasilImpor()
+    kode_dipakai = set()
+    batch = []
+
+    def proses_batch():
+        terkonversi = _konversi_mentah(batch, rubriks, hasil)
+        # Cek keunikan kode terhadap database sekali per batch
+        sudah_ada = {
+            row.kode for row in db.session.query(Nasabah.kode)
+            .filter(Nasabah.kode.in_([data['kode'] for _, data, _ in terkonversi]))
+        }
+        valid = []
+        for nomor, data, nilai_kriteria in terkonversi:
+            if data['kode'] in sudah_ada:
+                hasil.tambah_kesalahan(nomor, f"Kode {data['kode']} sudah ada")
+            else:
+                valid.append((nomor, data, nilai_kriteria))
+        if valid:
+            _simpan_batch(valid)
+            hasil.jumlah_berhasil += len(valid)
+        batch.clear()
+
+    for nomor, row in baris_iter:
+        try:
+            data, nilai_kriteria, mentah = _validasi(row, kriterias)
+        except ValueError as e:
+            hasil.tambah_kesalahan(nomor, str(e))
+            continue
+
+        if data['kode'] in kode_dipakai:
+            hasil.tambah_kesalahan(nomor, f"Kode {data['kode']} ganda di dalam file")
+            continue
+        kode_dipakai.add(data['kode'])
+
+        batch.append((nomor, data, nilai_kriteria, mentah))
+        if len(batch) >= ukuran_batch:
+            proses_batch()
+            if progres is not None:
+                progres(nomor)
+
+    if batch:
+        proses_batch()
+
+    return hasil
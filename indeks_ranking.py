@@ -0,0 +1,99 @@
+"""Indeks ranking terurut yang diperbarui per nasabah (tanpa hitung ulang semua)"""
+from bisect import bisect_left, insort
+import threading
+
+from cache import versi_data
+from database import db
+from models import SkorNasabah
+
+
+class IndeksRanking:
+    """Daftar terurut (-skor, nasabah_id) untuk satu versi data.
+
+    Pencarian posisi memakai bisect (O(log n)); perubahan satu nasabah
+    hanya menggeser entri milik nasabah tersebut.
+    """
+
+    def __init__(self):
+        self.versi = None
+        self._skor = {}
+        self._urutan = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._urutan)
+
+    def bangun(self, nasabah_ids, nilai_preferensi, versi):
+        """Bangun ulang indeks dari seluruh hasil perhitungan"""
+        with self._lock:
+            self._skor = dict(zip(nasabah_ids, nilai_preferensi))
+            self._urutan = sorted((-skor, nasabah_id) for nasabah_id, skor in self._skor.items())
+            self.versi = versi
+
+    def perbarui(self, nasabah_id, skor, versi):
+        """Geser satu nasabah ke posisi barunya (skor None = hapus dari indeks)"""
+        with self._lock:
+            lama = self._skor.pop(nasabah_id, None)
+            if lama is not None:
+                i = bisect_left(self._urutan, (-lama, nasabah_id))
+                del self._urutan[i]
+            if skor is not None:
+                self._skor[nasabah_id] = skor
+                insort(self._urutan, (-skor, nasabah_id))
+            self.versi = versi
+
+    def skor(self, nasabah_id):
+        return self._skor.get(nasabah_id)
+
+    def posisi(self, nasabah_id):
+        """Peringkat (mulai dari 1) nasabah, atau None jika tidak ada"""
+        skor = self._skor.get(nasabah_id)
+        if skor is None:
+            return None
+        return bisect_left(self._urutan, (-skor, nasabah_id)) + 1
+
+    def urutan(self, mulai=0, jumlah=None):
+        """Daftar (nasabah_id, skor) dari peringkat tertinggi"""
+        akhir = None if jumlah is None else mulai + jumlah
+        return [(nasabah_id, -skor) for skor, nasabah_id in self._urutan[mulai:akhir]]
+
+
+indeks_ranking = IndeksRanking()
+
+
+def _muat_skor(nasabah_ids=None):
+    """Skor tersimpan (tabel skor_nasabah) sebagai (daftar id, daftar skor)"""
+    query = db.session.query(SkorNasabah.nasabah_id, SkorNasabah.skor)
+    if nasabah_ids is not None:
+        query = query.filter(SkorNasabah.nasabah_id.in_(nasabah_ids))
+    rows = query.all()
+    return [r.nasabah_id for r in rows], [r.skor for r in rows]
+
+
+def pastikan_indeks():
+    """Kembalikan indeks yang sesuai versi data saat ini, bangun ulang bila perlu"""
+    versi = versi_data()
+    if indeks_ranking.versi != versi:
+        nasabah_ids, skor = _muat_skor()
+        indeks_ranking.bangun(nasabah_ids, skor, versi)
+    return indeks_ranking
+
+
+def commit_dan_perbarui(*nasabah_ids):
+    """Commit perubahan beberapa nasabah lalu perbarui posisinya di indeks.
+
+    Versi dibaca sebelum commit, saat transaksi tulis masih memegang lock.
+    Jika indeks berada tepat satu versi di belakang dan hanya skor
+    nasabah-nasabah ini yang berubah, cukup skor mereka yang dibaca ulang;
+    selain itu indeks dibangun ulang saat dibutuhkan.
+    """
+    db.session.flush()
+    versi_baru = versi_data()
+    # Acuan normalisasi ikut berubah: semua skor dihitung ulang (lihat skor.py)
+    semua_berubah = db.session.connection().info.pop('skor_semua_berubah', False)
+    db.session.commit()
+
+    if indeks_ranking.versi == versi_baru - 1 and not semua_berubah:
+        skor_baru = dict(zip(*_muat_skor(nasabah_ids=nasabah_ids)))
+        for nasabah_id in nasabah_ids:
+            indeks_ranking.perbarui(nasabah_id, skor_baru.get(nasabah_id), versi_baru)
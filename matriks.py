@@ -0,0 +1,104 @@
+"""Pemuat matriks keputusan SAW (nasabah x kriteria)"""
+from collections import namedtuple
+
+from sqlalchemy.dialects.sqlite import insert
+
+from cache import naikkan_versi_transaksi
+from database import db
+from models import Nasabah, Kriteria, NilaiNasabah
+from skor import perbarui_skor
+
+# Data ringan nasabah untuk template (tanpa objek ORM)
+InfoNasabah = namedtuple('InfoNasabah', ['id', 'kode', 'nama', 'alamat', 'telepon'])
+
+
+class MatriksKeputusan:
+    """Matriks keputusan ringkas: daftar id nasabah, id kriteria dan grid nilai.
+
+    ``nilai[i][j]`` adalah nilai nasabah ke-i untuk kriteria ke-j,
+    atau ``None`` jika nilainya belum diisi.
+    """
+
+    def __init__(self, nasabahs, kriterias, nilai):
+        self.nasabahs = nasabahs
+        self.kriterias = kriterias
+        self.nasabah_ids = [n.id for n in nasabahs]
+        self.kriteria_ids = [k.id for k in kriterias]
+        self.nilai = nilai
+
+    def __len__(self):
+        return len(self.nasabahs)
+
+    def baris_dict(self, i, default=0):
+        """Nilai nasabah ke-i sebagai dict {kriteria_id: nilai}"""
+        return {
+            kriteria_id: (nilai if nilai is not None else default)
+            for kriteria_id, nilai in zip(self.kriteria_ids, self.nilai[i])
+        }
+
+
+def muat_matriks(kriterias=None, nasabah_ids=None):
+    """Bangun matriks keputusan dari SATU query join Nasabah-NilaiNasabah.
+
+    Menggantikan pola ``NilaiNasabah.query.filter_by(...).first()`` per sel
+    yang menghasilkan N x K query.
+    """
+    if kriterias is None:
+        kriterias = Kriteria.query.order_by(Kriteria.kode).all()
+    kolom = {k.id: j for j, k in enumerate(kriterias)}
+
+    query = db.session.query(
+        Nasabah.id, Nasabah.kode, Nasabah.nama, Nasabah.alamat, Nasabah.telepon,
+        NilaiNasabah.kriteria_id, NilaiNasabah.nilai
+    ).outerjoin(NilaiNasabah, NilaiNasabah.nasabah_id == Nasabah.id)
+
+    if nasabah_ids is not None:
+        query = query.filter(Nasabah.id.in_(nasabah_ids))
+
+    nasabahs = []
+    nilai = []
+    id_terakhir = None
+    for row in query.order_by(Nasabah.id):
+        if row.id != id_terakhir:
+            nasabahs.append(InfoNasabah(row.id, row.kode, row.nama, row.alamat, row.telepon))
+            nilai.append([None] * len(kriterias))
+            id_terakhir = row.id
+
+        j = kolom.get(row.kriteria_id)
+        if j is not None:
+            nilai[-1][j] = row.nilai
+
+    return MatriksKeputusan(nasabahs, kriterias, nilai)
+
+
+def simpan_nilai(perubahan):
+    """Simpan banyak sel nilai sekaligus dengan SATU upsert, tanpa commit.
+
+    ``perubahan`` berisi tuple (nasabah_id, kriteria_id, nilai). Baris baru
+    di-insert dan baris lama di-update lewat constraint
+    ``unique_nasabah_kriteria`` (INSERT ... ON CONFLICT DO UPDATE).
+    Mengembalikan himpunan id nasabah yang berubah.
+    """
+    # Sel yang sama muncul dua kali: ambil nilai terakhir
+    sel = {(nasabah_id, kriteria_id): nilai for nasabah_id, kriteria_id, nilai in perubahan}
+    if not sel:
+        return set()
+
+    # Satu statement dieksekusi sebagai executemany: tidak terbentur batas
+    # jumlah parameter SQLite walau grid yang dikirim besar
+    stmt = insert(NilaiNasabah.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['nasabah_id', 'kriteria_id'],
+        set_={'nilai': stmt.excluded.nilai}
+    )
+    connection = db.session.connection()
+    connection.execute(stmt, [
+        {'nasabah_id': nasabah_id, 'kriteria_id': kriteria_id, 'nilai': nilai}
+        for (nasabah_id, kriteria_id), nilai in sel.items()
+    ])
+
+    # Statement Core tidak melewati event ORM: versi data dan skor diperbarui manual
+    nasabah_ids = {nasabah_id for nasabah_id, _ in sel}
+    naikkan_versi_transaksi(db.session())
+    perbarui_skor(connection, nasabah_ids)
+    return nasabah_ids
@@ -0,0 +1,229 @@
+"""Registry metode MCDM (SAW, TOPSIS, WP, MOORA) di atas satu matriks keputusan bersama"""
+from collections import namedtuple
+
+import numpy as np
+
+from cache import cache_ranking, versi_data
+from matriks import muat_matriks
+from saw import matriks_ke_array, normalisasi, preferensi
+from statistik import nilai_acuan
+
+# Data kriteria yang cukup untuk perhitungan (tanpa objek ORM di cache)
+InfoKriteria = namedtuple('InfoKriteria', ['id', 'kode', 'nama', 'atribut', 'bobot'])
+Metode = namedtuple('Metode', ['kode', 'nama', 'hitung'])
+
+METODE = {}
+
+
+def daftarkan(kode, nama):
+    """Decorator: daftarkan fungsi ``hitung(konteks, W) -> skor (n x k)``.
+
+    ``W`` berisi k vektor bobot (k x m); skor lebih tinggi = lebih baik.
+    """
+    def decorator(fungsi):
+        METODE[kode] = Metode(kode, nama, fungsi)
+        return fungsi
+    return decorator
+
+
+class KonteksKeputusan:
+    """Matriks keputusan X beserta normalisasi yang dipakai bersama antar metode.
+
+    Setiap bentuk normalisasi dihitung sekali (saat pertama diminta) lalu
+    disimpan, sehingga TOPSIS dan MOORA berbagi normalisasi vektor yang sama.
+    """
+
+    def __init__(self, nasabahs, kriterias, X, acuan):
+        self.nasabahs = nasabahs
+        self.kriterias = kriterias
+        self.X = X
+        self.acuan = acuan
+        self.kode = [k.kode for k in kriterias]
+        self.bobot = np.array([k.bobot for k in kriterias], dtype=float)
+        self.benefit = np.array([k.atribut == 'benefit' for k in kriterias], dtype=bool)
+        self._normal = {}
+
+    def __len__(self):
+        return len(self.nasabahs)
+
+    def normal(self, jenis):
+        R = self._normal.get(jenis)
+        if R is None:
+            R = self._normal[jenis] = NORMALISASI[jenis](self)
+            R.setflags(write=False)
+        return R
+
+
+def _normal_ideal(konteks):
+    """Normalisasi SAW terhadap acuan per kriteria (lihat ``statistik.nilai_acuan``)"""
+    return normalisasi(konteks.X, konteks.kriterias, konteks.acuan)
+
+
+def _normal_vektor(konteks):
+    """r_ij = x_ij / sqrt(sum_i x_ij^2), kolom tanpa nilai menjadi 0"""
+    norma = np.sqrt((konteks.X ** 2).sum(axis=0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(norma > 0, konteks.X / norma, 0.0)
+
+
+def _normal_log(konteks):
+    """ln x_ij untuk WP; sel kosong (0) menjadi -inf"""
+    with np.errstate(divide='ignore'):
+        return np.log(np.where(konteks.X > 0, konteks.X, 0.0))
+
+
+NORMALISASI = {
+    'ideal': _normal_ideal,
+    'vektor': _normal_vektor,
+    'log': _normal_log,
+}
+
+
+def konteks_keputusan():
+    """Konteks seluruh nasabah, dimuat dengan SATU query per versi data"""
+    def muat():
+        matriks = muat_matriks()
+        kriterias = [InfoKriteria(k.id, k.kode, k.nama, k.atribut, k.bobot)
+                     for k in matriks.kriterias]
+        return KonteksKeputusan(matriks.nasabahs, kriterias, matriks_ke_array(matriks),
+                                nilai_acuan())
+
+    return cache_ranking.ambil_atau_hitung(('konteks-keputusan',), versi_data(), muat)
+
+
+# ========== METODE ==========
+@daftarkan('saw', 'Simple Additive Weighting')
+def skor_saw(konteks, W):
+    R = konteks.normal('ideal')
+    # Per vektor bobot lewat saw.preferensi agar identik dengan skor tersimpan
+    return np.column_stack([preferensi(R, w) for w in W])
+
+
+@daftarkan('topsis', 'TOPSIS')
+def skor_topsis(konteks, W):
+    """Kedekatan relatif ke solusi ideal positif, C_i = D-_i / (D+_i + D-_i)"""
+    R = konteks.normal('vektor')
+    skor = np.empty((len(konteks), len(W)))
+    for c, w in enumerate(W):
+        V = R * w
+        if not len(V):
+            continue
+        ideal_positif = np.where(konteks.benefit, V.max(axis=0), V.min(axis=0))
+        ideal_negatif = np.where(konteks.benefit, V.min(axis=0), V.max(axis=0))
+        d_positif = np.sqrt(((V - ideal_positif) ** 2).sum(axis=1))
+        d_negatif = np.sqrt(((V - ideal_negatif) ** 2).sum(axis=1))
+        total = d_positif + d_negatif
+        with np.errstate(divide='ignore', invalid='ignore'):
+            skor[:, c] = np.where(total > 0, d_negatif / total, 0.0)
+    return skor
+
+
+@daftarkan('wp', 'Weighted Product')
+def skor_wp(konteks, W):
+    """Vektor S_i = prod x_ij^(+/-w_j), pangkat negatif untuk cost; V_i = S_i / sum S.
+
+    Nasabah dengan sel kosong mendapat S = 0 (paling bawah).
+    """
+    L = konteks.normal('log')
+    lengkap = np.isfinite(L).all(axis=1)
+    L = np.where(lengkap[:, None], L, 0.0)
+
+    total = W.sum(axis=1, keepdims=True)
+    total[total == 0] = 1.0
+    pangkat = (W / total) * np.where(konteks.benefit, 1.0, -1.0)
+    S = np.where(lengkap[:, None], np.exp(L @ pangkat.T), 0.0)
+
+    jumlah = S.sum(axis=0)
+    jumlah[jumlah == 0] = 1.0
+    return S / jumlah
+
+
+@daftarkan('moora', 'MOORA (ratio system)')
+def skor_moora(konteks, W):
+    """y_i = sum w_j r_ij (benefit) - sum w_j r_ij (cost), normalisasi vektor"""
+    tanda = np.where(konteks.benefit, 1.0, -1.0)
+    return konteks.normal('vektor') @ (W * tanda).T
+
+
+# ========== PERBANDINGAN ==========
+def peringkat_kolom(P):
+    """Peringkat (1 = terbaik) per kolom; nilai sama diurutkan menurut urutan baris (id)"""
+    n = P.shape[0]
+    urutan = np.argsort(-P, axis=0, kind='stable')
+    peringkat = np.empty(P.shape, dtype=np.int64)
+    np.put_along_axis(peringkat, urutan, np.arange(1, n + 1)[:, None], axis=0)
+    return peringkat
+
+
+def pilih_metode(kode_metode):
+    """Validasi daftar kode metode; None = semua metode terdaftar"""
+    if not kode_metode:
+        return list(METODE)
+    tidak_dikenal = [kode for kode in kode_metode if kode not in METODE]
+    if tidak_dikenal:
+        raise ValueError(f'Metode tidak dikenal: {", ".join(tidak_dikenal)}')
+    return list(dict.fromkeys(kode_metode))
+
+
+def hitung_metode(kode_metode=None, bobot=None, konteks=None):
+    """Skor beberapa metode dalam satu kali jalan: {kode: array skor (n)}.
+
+    Semua metode memakai konteks (dan normalisasi) yang sama; ``bobot``
+    default adalah bobot kriteria tersimpan.
+    """
+    if konteks is None:
+        konteks = konteks_keputusan()
+    W = (konteks.bobot if bobot is None else np.asarray(bobot, dtype=float)).reshape(1, -1)
+    return {kode: METODE[kode].hitung(konteks, W)[:, 0] for kode in pilih_metode(kode_metode)}
+
+
+def korelasi_spearman(peringkat_a, peringkat_b):
+    """Spearman rho dari dua vektor peringkat tanpa nilai kembar"""
+    n = len(peringkat_a)
+    if n < 2:
+        return 1.0
+    d = (peringkat_a - peringkat_b).astype(float)
+    return 1 - 6 * float((d * d).sum()) / (n * (n * n - 1))
+
+
+def bandingkan(kode_metode=None, top=20):
+    """Peringkat berdampingan dan korelasi peringkat antar metode.
+
+    Baris yang dikembalikan adalah ``top`` teratas menurut metode pertama.
+    """
+    konteks = konteks_keputusan()
+    daftar = pilih_metode(kode_metode)
+    skor = hitung_metode(daftar, konteks=konteks)
+    if not len(konteks):
+        return {'metode': _info_metode(daftar), 'total': 0, 'korelasi': [], 'nasabah': []}
+
+    peringkat = peringkat_kolom(np.column_stack([skor[kode] for kode in daftar]))
+    korelasi = []
+    for a in range(len(daftar)):
+        for b in range(a + 1, len(daftar)):
+            korelasi.append({
+                'metode': [daftar[a], daftar[b]],
+                'spearman': round(korelasi_spearman(peringkat[:, a], peringkat[:, b]), 4),
+                # Porsi top-N metode pertama yang juga masuk top-N metode kedua
+                'irisan_top': round(float(((peringkat[:, a] <= top) & (peringkat[:, b] <= top)).sum())
+                                    / min(top, len(konteks)), 4),
+            })
+
+    indeks = np.argsort(peringkat[:, 0], kind='stable')[:top]
+    return {
+        'metode': _info_metode(daftar),
+        'total': len(konteks),
+        'top': top,
+        'korelasi': korelasi,
+        'nasabah': [{
+            'id': konteks.nasabahs[i].id,
+            'kode': konteks.nasabahs[i].kode,
+            'nama': konteks.nasabahs[i].nama,
+            'peringkat': {kode: int(peringkat[i, j]) for j, kode in enumerate(daftar)},
+            'skor': {kode: round(float(skor[kode][i]), 6) for kode in daftar},
+        } for i in indeks]
+    }
+
+
+def _info_metode(daftar):
+    return [{'kode': kode, 'nama': METODE[kode].nama} for kode in daftar]
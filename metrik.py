@@ -0,0 +1,225 @@
+"""Instrumentasi per request: jumlah/waktu query SQL, waktu render, latensi total.
+
+Setiap response mendapat header ``Server-Timing`` (terlihat di tab Network
+browser). Agregat per endpoint disimpan sebagai histogram di memori proses
+dan diekspor dalam format teks Prometheus lewat ``/metrics`` (hanya aktif
+jika ``METRIK_TOKEN`` diisi); dengan beberapa worker gunicorn setiap worker
+melaporkan angkanya sendiri.
+"""
+from bisect import bisect_left
+import hmac
+import logging
+import os
+import threading
+import time
+
+from flask import Response, abort, g, has_request_context, request, template_rendered, before_render_template
+from sqlalchemy import event
+
+from database import db
+
+log_lambat = logging.getLogger('metrik.sql_lambat')
+
+# Nama pengaturan (app.config atau environment variable) dan nilai default
+PENGATURAN_METRIK = {
+    'METRIK_AKTIF': 1,
+    'METRIK_SERVER_TIMING': 1,   # kirim header Server-Timing
+    'METRIK_LAMBAT_MS': 200,     # query selama ini atau lebih ditulis ke log (0 = mati)
+    'METRIK_TOKEN': '',          # /metrics butuh "Authorization: Bearer <token>"; kosong = 404
+}
+
+BUCKET_DETIK = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKET_QUERY = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Histogram:
+    """Histogram kumulatif ala Prometheus per kombinasi label"""
+
+    def __init__(self, nama, keterangan, bucket, label):
+        self.nama = nama
+        self.keterangan = keterangan
+        self.bucket = bucket
+        self.label = label
+        self.data = {}   # nilai label -> [jumlah per bucket (+Inf terakhir), total, count]
+
+    def catat(self, nilai, *label):
+        baris = self.data.get(label)
+        if baris is None:
+            baris = self.data[label] = [[0] * (len(self.bucket) + 1), 0.0, 0]
+        baris[0][bisect_left(self.bucket, nilai)] += 1
+        baris[1] += nilai
+        baris[2] += 1
+
+    def teks(self):
+        yield f'# HELP {self.nama} {self.keterangan}'
+        yield f'# TYPE {self.nama} histogram'
+        for label, (per_bucket, total, count) in sorted(self.data.items()):
+            dasar = _label(self.label, label)
+            kumulatif = 0
+            for batas, jumlah in zip(self.bucket + ('+Inf',), per_bucket):
+                kumulatif += jumlah
+                yield f'{self.nama}_bucket{{{dasar},le="{batas}"}} {kumulatif}'
+            yield f'{self.nama}_sum{{{dasar}}} {total:.6f}'
+            yield f'{self.nama}_count{{{dasar}}} {count}'
+
+
+class Counter:
+    def __init__(self, nama, keterangan, label):
+        self.nama = nama
+        self.keterangan = keterangan
+        self.label = label
+        self.data = {}
+
+    def tambah(self, *label, jumlah=1):
+        self.data[label] = self.data.get(label, 0) + jumlah
+
+    def teks(self):
+        yield f'# HELP {self.nama} {self.keterangan}'
+        yield f'# TYPE {self.nama} counter'
+        for label, nilai in sorted(self.data.items()):
+            yield f'{self.nama}{{{_label(self.label, label)}}} {nilai}'
+
+
+def _label(nama, nilai):
+    return ','.join(f'{n}="{str(v)}"' for n, v in zip(nama, nilai))
+
+
+class Registry:
+    """Semua metrik satu proses; dicatat dan dibaca di bawah satu lock"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.request_total = Counter('spk_request_total', 'Jumlah request HTTP',
+                                     ('endpoint', 'method', 'status'))
+        self.durasi = Histogram('spk_request_durasi_detik', 'Latensi total request (sampai response dibuat)',
+                                BUCKET_DETIK, ('endpoint', 'method'))
+        self.sql_detik = Histogram('spk_sql_detik_per_request', 'Total waktu query SQL per request',
+                                   BUCKET_DETIK, ('endpoint',))
+        self.sql_query = Histogram('spk_sql_query_per_request', 'Jumlah query SQL per request',
+                                   BUCKET_QUERY, ('endpoint',))
+        self.render = Histogram('spk_render_detik', 'Waktu render template per request',
+                                BUCKET_DETIK, ('endpoint',))
+        self.sql_lambat = Counter('spk_sql_lambat_total', 'Query SQL melewati METRIK_LAMBAT_MS',
+                                  ('endpoint',))
+
+    def catat_request(self, endpoint, method, status, total, ukur):
+        with self.lock:
+            self.request_total.tambah(endpoint, method, status)
+            self.durasi.catat(total, endpoint, method)
+            self.sql_detik.catat(ukur['sql'], endpoint)
+            self.sql_query.catat(ukur['query'], endpoint)
+            if ukur['render']:
+                self.render.catat(ukur['render'], endpoint)
+
+    def catat_lambat(self, endpoint):
+        with self.lock:
+            self.sql_lambat.tambah(endpoint)
+
+    def teks(self):
+        with self.lock:
+            baris = []
+            for metrik in (self.request_total, self.durasi, self.sql_detik, self.sql_query,
+                           self.render, self.sql_lambat):
+                baris.extend(metrik.teks())
+        return '\n'.join(baris) + '\n'
+
+
+registry = Registry()
+
+
+def _endpoint():
+    return request.endpoint or 'tidak_ditemukan'
+
+
+def ukuran_request():
+    """Angka request aktif {'query', 'sql', 'render'}, atau None di luar request"""
+    return g.get('metrik') if has_request_context() else None
+
+
+# ========== EVENT SQLALCHEMY ==========
+def _pasang_engine(engine, pengaturan):
+    batas_lambat = pengaturan['METRIK_LAMBAT_MS'] / 1000
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _sebelum_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrik_mulai', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _setelah_query(conn, cursor, statement, parameters, context, executemany):
+        durasi = time.perf_counter() - conn.info['metrik_mulai'].pop()
+        ukur = ukuran_request()
+        if ukur is not None:
+            ukur['query'] += 1
+            ukur['sql'] += durasi
+        if batas_lambat and durasi >= batas_lambat:
+            endpoint = _endpoint() if has_request_context() else 'latar'
+            registry.catat_lambat(endpoint)
+            log_lambat.warning('%.1f ms [%s] %s', durasi * 1000, endpoint, ' '.join(statement.split())[:500])
+
+    @event.listens_for(engine, 'handle_error')
+    def _query_gagal(context):
+        # after_cursor_execute tidak dipanggil untuk query yang gagal
+        if context.connection is not None and context.connection.info.get('metrik_mulai'):
+            context.connection.info['metrik_mulai'].pop()
+
+
+# ========== HOOK FLASK ==========
+def _server_timing(ukur, total):
+    return (f'sql;dur={ukur["sql"] * 1000:.1f};desc="{ukur["query"]} query", '
+            f'render;dur={ukur["render"] * 1000:.1f}, total;dur={total * 1000:.1f}')
+
+
+def pasang_metrik(app):
+    """Pasang event SQLAlchemy, hook request dan route /metrics. Dipanggil setelah pasang_profil_sqlite."""
+    pengaturan = {}
+    for nama, default in PENGATURAN_METRIK.items():
+        nilai = app.config.get(nama, os.environ.get(nama, default))
+        pengaturan[nama] = nilai if isinstance(default, str) else int(nilai)
+    app.config.update(pengaturan)
+    if not pengaturan['METRIK_AKTIF']:
+        return
+
+    with app.app_context():
+        _pasang_engine(db.engine, pengaturan)
+    if 'sqlite_baca' in app.extensions:
+        _pasang_engine(app.extensions['sqlite_baca'], pengaturan)
+
+    @app.before_request
+    def _mulai_ukur():
+        g.metrik = {'mulai': time.perf_counter(), 'query': 0, 'sql': 0.0, 'render': 0.0}
+
+    @before_render_template.connect_via(app)
+    def _mulai_render(sender, template, context, **extra):
+        ukur = ukuran_request()
+        if ukur is not None:
+            ukur['render_mulai'] = time.perf_counter()
+
+    @template_rendered.connect_via(app)
+    def _selesai_render(sender, template, context, **extra):
+        ukur = ukuran_request()
+        if ukur is not None and 'render_mulai' in ukur:
+            ukur['render'] += time.perf_counter() - ukur.pop('render_mulai')
+
+    @app.after_request
+    def _selesai_ukur(response):
+        ukur = ukuran_request()
+        if ukur is None:
+            return response
+        total = time.perf_counter() - ukur['mulai']
+        # Query di dalam template terhitung sebagai SQL dan render sekaligus
+        if pengaturan['METRIK_SERVER_TIMING']:
+            response.headers['Server-Timing'] = _server_timing(ukur, total)
+        if request.endpoint != 'metrics':
+            registry.catat_request(_endpoint(), request.method, response.status_code, total, ukur)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        token = pengaturan['METRIK_TOKEN']
+        if not token:
+            abort(404)
+        # Dibandingkan sebagai bytes: compare_digest menolak str non-ASCII
+        diberikan = request.headers.get('Authorization', '').encode()
+        if not hmac.compare_digest(diberikan, f'Bearer {token}'.encode()):
+            abort(401)
+        return Response(registry.teks(), mimetype='text/plain; version=0.0.4')
@@ -12,6 +12,9 @@ class User(db.Model, UserMixin):
     active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Cap versi sesi (tabel versi_user), ikut disimpan di session lewat get_id()
+    versi_sesi = 0
+    
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
     
@@ -23,7 +26,12 @@ class User(db.Model, UserMixin):
     
     # Flask-Login required methods
     def get_id(self):
-        return str(self.id)
+        return f'{self.id}:{self.versi_sesi}'
+    
+    @property
+    def is_active(self):
+        # NULL pada data lama dianggap aktif
+        return self.active is not False
     
     @property
     def is_active_status(self):
@@ -66,4 +74,122 @@ class NilaiNasabah(db.Model):
     __table_args__ = (db.UniqueConstraint('nasabah_id', 'kriteria_id', name='unique_nasabah_kriteria'),)
     
     def __repr__(self):
-        return f'<NilaiNasabah {self.nasabah_id}-{self.kriteria_id}>'
\ No newline at end of file
+        return f'<NilaiNasabah {self.nasabah_id}-{self.kriteria_id}>'
+
+class VersiData(db.Model):
+    """Penanda versi data ranking (satu baris), naik setiap data berubah"""
+    id = db.Column(db.Integer, primary_key=True)
+    versi = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<VersiData {self.versi}>'
+
+class VersiUser(db.Model):
+    """Cap versi per user; naik saat password diubah atau user dihapus.
+
+    Sengaja tanpa foreign key: baris tetap ada setelah user dihapus agar
+    id yang dipakai ulang SQLite tidak mewarisi session lama.
+    """
+    user_id = db.Column(db.Integer, primary_key=True)
+    versi = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<VersiUser {self.user_id}:{self.versi}>'
+
+class SkorNasabah(db.Model):
+    """Skor akhir SAW per nasabah, agar top-N, filter kategori dan paging lewat SQL"""
+    nasabah_id = db.Column(db.Integer, db.ForeignKey('nasabah.id', ondelete='CASCADE'), primary_key=True)
+    skor = db.Column(db.Float, nullable=False)
+    
+    __table_args__ = (db.Index('ix_skor_nasabah_urutan', skor.desc(), nasabah_id),)
+    
+    def __repr__(self):
+        return f'<SkorNasabah {self.nasabah_id}: {self.skor}>'
+
+class StatistikKriteria(db.Model):
+    """Agregat nilai per kriteria, dijaga trigger SQLite pada nilai_nasabah (lihat statistik.py)"""
+    kriteria_id = db.Column(db.Integer, primary_key=True)
+    jumlah = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Float, nullable=False, default=0.0)
+    total_kuadrat = db.Column(db.Float, nullable=False, default=0.0)
+    minimum = db.Column(db.Float)
+    maksimum = db.Column(db.Float)
+    
+    def __repr__(self):
+        return f'<StatistikKriteria {self.kriteria_id}: n={self.jumlah}>'
+
+class NormalisasiKriteria(db.Model):
+    """Cara normalisasi satu kriteria: skala tetap atau min/max hasil observasi"""
+    kriteria_id = db.Column(db.Integer, primary_key=True)
+    mode = db.Column(db.String(10), nullable=False, default='observasi')  # skala/observasi
+    skala_min = db.Column(db.Float)
+    skala_max = db.Column(db.Float)
+    
+    def __repr__(self):
+        return f'<NormalisasiKriteria {self.kriteria_id}: {self.mode}>'
+
+class AcuanSkor(db.Model):
+    """Nilai acuan normalisasi yang dipakai saat tabel skor_nasabah terakhir dihitung"""
+    kriteria_id = db.Column(db.Integer, primary_key=True)
+    minimum = db.Column(db.Float)
+    maksimum = db.Column(db.Float)
+    
+    def __repr__(self):
+        return f'<AcuanSkor {self.kriteria_id}: {self.minimum}-{self.maksimum}>'
+
+class DistribusiSkor(db.Model):
+    """Jumlah nasabah per kategori skor, dijaga trigger SQLite pada skor_nasabah (lihat skor.py)"""
+    kategori = db.Column(db.String(20), primary_key=True)
+    jumlah = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<DistribusiSkor {self.kategori}: {self.jumlah}>'
+
+class Pekerjaan(db.Model):
+    """Antrian pekerjaan latar (hitung ulang skor, impor, ekspor), lihat pekerjaan.py"""
+    id = db.Column(db.Integer, primary_key=True)
+    jenis = db.Column(db.String(30), nullable=False)
+    kunci = db.Column(db.String(100))  # pekerjaan antri dengan kunci sama digabung
+    parameter = db.Column(db.Text)     # JSON
+    status = db.Column(db.String(10), nullable=False, default='antri')  # antri/jalan/selesai/gagal
+    progres = db.Column(db.Float, nullable=False, default=0.0)
+    pesan = db.Column(db.String(200))
+    hasil = db.Column(db.Text)         # JSON
+    user_id = db.Column(db.Integer)
+    pemilik = db.Column(db.String(50)) # proses:thread yang menjalankan
+    dibuat = db.Column(db.DateTime, default=datetime.utcnow)
+    mulai = db.Column(db.DateTime)
+    selesai = db.Column(db.DateTime)
+    detak = db.Column(db.DateTime)     # tanda hidup terakhir saat status jalan
+    
+    __table_args__ = (
+        db.Index('ix_pekerjaan_status', 'status', 'id'),
+        db.Index('ix_pekerjaan_kunci_antri', 'kunci', unique=True,
+                 sqlite_where=db.text("status = 'antri'")),
+    )
+    
+    def __repr__(self):
+        return f'<Pekerjaan {self.id} {self.jenis}: {self.status}>'
+
+class SnapshotRanking(db.Model):
+    """Ranking yang dibekukan: bobot (JSON) + array terkemas per snapshot, bukan satu baris per nasabah.
+
+    Kolom blob (lihat snapshot.py) berurutan menurut peringkat dan di-defer
+    agar daftar snapshot tidak ikut memuatnya.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    nama = db.Column(db.String(100), nullable=False)
+    dibuat = db.Column(db.DateTime, default=datetime.utcnow)
+    user_id = db.Column(db.Integer)
+    jumlah = db.Column(db.Integer, nullable=False, default=0)
+    ukuran = db.Column(db.Integer, nullable=False, default=0)  # total byte blob
+    bobot = db.Column(db.Text, nullable=False)                 # JSON [{kode, nama, atribut, bobot}]
+    ids = db.deferred(db.Column(db.LargeBinary, nullable=False))        # int64 little-endian, zlib
+    skor = db.deferred(db.Column(db.LargeBinary, nullable=False))       # float64 little-endian, zlib
+    identitas = db.deferred(db.Column(db.LargeBinary, nullable=False))  # "kode\tnama" per baris, zlib
+    
+    # Id tidak pernah dipakai ulang: hasil dekode di-cache per id di setiap worker
+    __table_args__ = {'sqlite_autoincrement': True}
+    
+    def __repr__(self):
+        return f'<SnapshotRanking {self.id} {self.nama}: {self.jumlah}>'
@@ -0,0 +1,96 @@
+"""Paginasi keyset (cursor) agar ukuran respons tetap walau nasabah bertambah"""
+import base64
+import binascii
+import json
+import math
+
+from sqlalchemy import and_, or_
+
+from models import SkorNasabah
+
+UKURAN_DEFAULT = 50
+UKURAN_MAKS = 500
+
+
+class Halaman:
+    """Satu halaman hasil: daftar baris + cursor halaman berikutnya (None jika habis)"""
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def ukuran_halaman(args, default=UKURAN_DEFAULT):
+    """Baca parameter ``limit`` dan batasi ke rentang 1..UKURAN_MAKS"""
+    try:
+        limit = int(args.get('limit', default))
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, UKURAN_MAKS))
+
+
+def buat_cursor(*nilai):
+    return base64.urlsafe_b64encode(json.dumps(nilai).encode()).decode().rstrip('=')
+
+
+def baca_cursor(cursor, panjang=None):
+    """Decode cursor berupa daftar angka (sebanyak ``panjang`` jika diisi);
+    cursor kosong, rusak atau berbentuk lain dianggap halaman pertama (None)
+    """
+    if not cursor:
+        return None
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        posisi = json.loads(data)
+    except (ValueError, binascii.Error):
+        return None
+    if not isinstance(posisi, list) or not posisi or (panjang is not None and len(posisi) != panjang):
+        return None
+    return posisi if all(_angka_cursor(nilai) for nilai in posisi) else None
+
+
+def _angka_cursor(nilai):
+    """Angka berhingga yang muat di kolom INTEGER/REAL SQLite"""
+    if isinstance(nilai, bool):
+        return False
+    if isinstance(nilai, int):
+        return -2 ** 63 <= nilai < 2 ** 63
+    return isinstance(nilai, float) and math.isfinite(nilai)
+
+
+def halaman_id(query, kolom_id, cursor, limit):
+    """Halaman berdasarkan id naik: WHERE id > :terakhir ORDER BY id LIMIT n"""
+    posisi = baca_cursor(cursor, 1)
+    if posisi:
+        query = query.filter(kolom_id > posisi[0])
+    rows = query.order_by(kolom_id).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = buat_cursor(rows[-1].id)
+    return Halaman(rows, next_cursor)
+
+
+def halaman_skor(query, cursor, limit):
+    """Halaman ranking (skor turun, id naik) untuk query dari ``skor.query_ranking``"""
+    posisi = baca_cursor(cursor, 2)
+    if posisi:
+        skor, nasabah_id = posisi
+        query = query.filter(or_(
+            SkorNasabah.skor < skor,
+            and_(SkorNasabah.skor == skor, SkorNasabah.nasabah_id > nasabah_id)
+        ))
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = buat_cursor(rows[-1].skor, rows[-1].id)
+    return Halaman(rows, next_cursor)
@@ -0,0 +1,321 @@
+"""Pekerjaan latar: antrian di SQLite + thread pelari di dalam proses (tanpa broker)"""
+from datetime import datetime, timedelta
+import json
+import logging
+import os
+import threading
+import uuid
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from cache import naikkan_versi_transaksi
+from database import db
+from models import Pekerjaan, Nasabah
+
+log = logging.getLogger(__name__)
+
+# Nama pengaturan (app.config atau environment variable) dan nilai default
+PENGATURAN_PEKERJAAN = {
+    'PEKERJAAN_THREAD': 1,         # SQLite hanya punya satu penulis, satu thread cukup
+    'PEKERJAAN_INTERVAL': 2.0,     # detik antar pemeriksaan antrian dari proses lain
+    'PEKERJAAN_BATAS_DETAK': 300,  # detik tanpa progres sebelum pekerjaan dianggap yatim
+    'PEKERJAAN_SIMPAN_HARI': 7,    # pekerjaan selesai dan file hasilnya dihapus setelahnya
+}
+
+STATUS_AKTIF = ('antri', 'jalan')
+TUGAS = {}
+
+
+def tugas(jenis):
+    """Decorator: daftarkan fungsi ``fungsi(pekerjaan: KonteksPekerjaan, **parameter) -> hasil``"""
+    def decorator(fungsi):
+        TUGAS[jenis] = fungsi
+        return fungsi
+    return decorator
+
+
+def folder_pekerjaan(app=None):
+    """Folder file unggahan dan hasil pekerjaan (instance/pekerjaan)"""
+    app = app or pelari.app
+    folder = os.path.join(app.instance_path, 'pekerjaan')
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _sekarang():
+    return datetime.utcnow()
+
+
+# ========== ANTRIAN ==========
+def masukkan_antrian(connection, jenis, parameter=None, kunci=None, user_id=None):
+    """Sisipkan pekerjaan di transaksi ``connection`` tanpa commit; kembalikan id-nya.
+
+    Pekerjaan dengan ``kunci`` sama yang masih antri tidak digandakan: id
+    pekerjaan yang sudah ada dikembalikan (indeks unik parsial pada kunci).
+    Pelari mengambilnya paling lambat setelah PEKERJAAN_INTERVAL.
+    """
+    if jenis not in TUGAS:
+        raise ValueError(f'Jenis pekerjaan tidak dikenal: {jenis}')
+    tabel = Pekerjaan.__table__
+    hasil = connection.execute(
+        insert(tabel).values(
+            jenis=jenis, kunci=kunci, status='antri', progres=0.0, user_id=user_id,
+            parameter=json.dumps(parameter or {}), dibuat=_sekarang()
+        ).on_conflict_do_nothing()
+    )
+    if hasil.rowcount:
+        return hasil.inserted_primary_key[0]
+    return connection.execute(
+        select(tabel.c.id).where(tabel.c.kunci == kunci, tabel.c.status == 'antri')
+    ).scalar_one()
+
+
+def antrikan(jenis, parameter=None, kunci=None, user_id=None):
+    """Masukkan pekerjaan ke antrian lalu commit dan bangunkan pelari; kembalikan id-nya"""
+    pekerjaan_id = masukkan_antrian(db.session.connection(), jenis, parameter, kunci, user_id)
+    db.session.commit()
+    pelari.bangunkan()
+    return pekerjaan_id
+
+
+def pekerjaan_terakhir(kunci):
+    """Pekerjaan terbaru dengan ``kunci`` tertentu (status apa pun), atau None"""
+    return Pekerjaan.query.filter_by(kunci=kunci).order_by(Pekerjaan.id.desc()).first()
+
+
+def status_pekerjaan(pekerjaan):
+    """Representasi JSON satu pekerjaan untuk API"""
+    return {
+        'id': pekerjaan.id,
+        'jenis': pekerjaan.jenis,
+        'status': pekerjaan.status,
+        'progres': round(pekerjaan.progres or 0.0, 4),
+        'pesan': pekerjaan.pesan,
+        'hasil': json.loads(pekerjaan.hasil) if pekerjaan.hasil else None,
+        'dibuat': pekerjaan.dibuat.isoformat() if pekerjaan.dibuat else None,
+        'mulai': pekerjaan.mulai.isoformat() if pekerjaan.mulai else None,
+        'selesai': pekerjaan.selesai.isoformat() if pekerjaan.selesai else None,
+    }
+
+
+class KonteksPekerjaan:
+    """Diberikan ke fungsi tugas untuk melaporkan progres"""
+
+    def __init__(self, pekerjaan_id):
+        self.id = pekerjaan_id
+
+    def progres(self, nilai, pesan=None):
+        """Catat progres 0..1 lewat koneksi terpisah (jangan dipanggil di tengah transaksi tulis)"""
+        nilai = min(max(float(nilai), 0.0), 1.0)
+        perubahan = {'progres': nilai, 'detak': _sekarang()}
+        if pesan is not None:
+            perubahan['pesan'] = pesan[:200]
+        _perbarui(self.id, **perubahan)
+
+
+def _perbarui(pekerjaan_id, **kolom):
+    tabel = Pekerjaan.__table__
+    with db.engine.begin() as connection:
+        connection.execute(update(tabel).where(tabel.c.id == pekerjaan_id).values(**kolom))
+
+
+# ========== PELARI ==========
+class PelariPekerjaan:
+    """Thread pelari per proses; setiap thread mengklaim pekerjaan dari tabel antrian.
+
+    Klaim memakai satu ``UPDATE ... RETURNING`` sehingga aman dijalankan di
+    banyak worker gunicorn sekaligus. Thread dimulai saat pertama dibutuhkan
+    (dan dimulai ulang setelah fork) agar tidak ada thread yang ikut tersalin.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.pengaturan = dict(PENGATURAN_PEKERJAAN)
+        self._pid = None
+        self._bangun = threading.Event()
+        self._lock = threading.Lock()
+
+    def pasang(self, app):
+        self.app = app
+        for nama, default in PENGATURAN_PEKERJAAN.items():
+            self.pengaturan[nama] = type(default)(app.config.get(nama, os.environ.get(nama, default)))
+
+    def pastikan_jalan(self):
+        if self.app is None or self.app.testing or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            for nomor in range(self.pengaturan['PEKERJAAN_THREAD']):
+                threading.Thread(target=self._putaran, name=f'pekerjaan-{nomor}', daemon=True).start()
+
+    def bangunkan(self):
+        self.pastikan_jalan()
+        self._bangun.set()
+
+    def _putaran(self):
+        with self.app.app_context():
+            bersihkan_pekerjaan_lama(self.pengaturan['PEKERJAAN_SIMPAN_HARI'])
+        while True:
+            try:
+                with self.app.app_context():
+                    ada = self.jalankan_satu()
+            except Exception:
+                log.exception('Pelari pekerjaan gagal')
+                ada = False
+            if not ada:
+                self._bangun.wait(self.pengaturan['PEKERJAAN_INTERVAL'])
+                self._bangun.clear()
+
+    def _klaim(self):
+        """Ambil satu pekerjaan antri (atau yatim) secara atomik, kembalikan id atau None"""
+        tabel = Pekerjaan.__table__
+        sekarang = _sekarang()
+        batas = sekarang - timedelta(seconds=self.pengaturan['PEKERJAAN_BATAS_DETAK'])
+        bisa_diambil = or_(tabel.c.status == 'antri',
+                           and_(tabel.c.status == 'jalan', tabel.c.detak < batas))
+        calon = select(tabel.c.id).where(bisa_diambil).order_by(tabel.c.id).limit(1).scalar_subquery()
+        with db.engine.begin() as connection:
+            return connection.execute(
+                update(tabel).where(tabel.c.id == calon, bisa_diambil)
+                .values(status='jalan', pemilik=f'{os.getpid()}:{threading.get_ident()}',
+                        mulai=sekarang, detak=sekarang)
+                .returning(tabel.c.id)
+            ).scalar()
+
+    def jalankan_satu(self):
+        """Jalankan satu pekerjaan dari antrian; False jika antrian kosong"""
+        pekerjaan_id = self._klaim()
+        if pekerjaan_id is None:
+            return False
+
+        pekerjaan = db.session.get(Pekerjaan, pekerjaan_id)
+        jenis, parameter = pekerjaan.jenis, json.loads(pekerjaan.parameter or '{}')
+        db.session.rollback()  # jangan tahan transaksi baca selama pekerjaan berjalan
+        try:
+            hasil = TUGAS[jenis](KonteksPekerjaan(pekerjaan_id), **parameter)
+        except Exception as e:
+            db.session.rollback()
+            log.exception('Pekerjaan %s (%s) gagal', pekerjaan_id, jenis)
+            _perbarui(pekerjaan_id, status='gagal', pesan=str(e)[:200], selesai=_sekarang())
+        else:
+            _perbarui(pekerjaan_id, status='selesai', progres=1.0, selesai=_sekarang(),
+                      hasil=json.dumps(hasil) if hasil is not None else None)
+        return True
+
+
+pelari = PelariPekerjaan()
+
+
+def pasang_pekerjaan(app):
+    """Hubungkan pelari ke aplikasi; pekerjaan yang tertinggal dilanjutkan saat request pertama"""
+    pelari.pasang(app)
+
+    @app.before_request
+    def _mulai_pelari():
+        pelari.pastikan_jalan()
+
+
+def bersihkan_pekerjaan_lama(hari):
+    """Hapus pekerjaan selesai/gagal yang lebih tua dari ``hari`` beserta file hasilnya.
+
+    Hitung ulang skor terakhir tetap disimpan: jika gagal, snapshot ditolak
+    sampai hitung ulang berikutnya berhasil (lihat snapshot.buat_snapshot).
+    """
+    batas = _sekarang() - timedelta(days=hari)
+    query = Pekerjaan.query.filter(Pekerjaan.status.notin_(STATUS_AKTIF), Pekerjaan.dibuat < batas)
+    hitung_ulang = pekerjaan_terakhir('hitung-ulang-skor')
+    if hitung_ulang is not None:
+        query = query.filter(Pekerjaan.id != hitung_ulang.id)
+    lama = query.all()
+    for pekerjaan in lama:
+        hasil = json.loads(pekerjaan.hasil) if pekerjaan.hasil else {}
+        if isinstance(hasil, dict) and hasil.get('berkas'):
+            path = os.path.join(folder_pekerjaan(), os.path.basename(hasil['berkas']))
+            if os.path.exists(path):
+                os.remove(path)
+        db.session.delete(pekerjaan)
+    db.session.commit()
+
+
+# ========== TUGAS ==========
+@tugas('hitung-ulang-skor')
+def _tugas_hitung_ulang_skor(pekerjaan):
+    """Hitung ulang seluruh skor tersimpan (setelah bobot berubah), commit per potongan.
+
+    Progres dicatat setelah setiap potongan agar detak tetap baru dan
+    pekerjaan yang lama tidak diklaim ulang sebagai yatim oleh worker lain.
+    """
+    from indeks_ranking import commit_dan_perbarui
+    from skor import hitung_ulang_skor_bertahap
+
+    total = max(db.session.query(Nasabah.id).count(), 1)
+    db.session.rollback()
+    pekerjaan.progres(0.0, 'Menghitung ulang skor')
+    sesi = db.session()
+    jumlah = 0
+    for jumlah in hitung_ulang_skor_bertahap(sesi):
+        # Statement Core tidak melewati event ORM: versi data dinaikkan manual
+        naikkan_versi_transaksi(sesi)
+        commit_dan_perbarui()
+        pekerjaan.progres(jumlah / total, f'{jumlah} skor dihitung ulang')
+    return {'jumlah': jumlah}
+
+
+@tugas('impor-nasabah')
+def _tugas_impor(pekerjaan, berkas, nama_file):
+    """Impor file unggahan yang sudah disimpan ke folder pekerjaan"""
+    from impor import baca_file, impor_nasabah
+
+    path = os.path.join(folder_pekerjaan(), os.path.basename(berkas))
+    with open(path, 'rb') as f:
+        total = max(sum(potongan.count(b'\n') for potongan in iter(lambda: f.read(1 << 20), b'')), 1)
+        f.seek(0)
+        hasil = impor_nasabah(
+            baca_file(f, nama_file),
+            progres=lambda nomor: pekerjaan.progres(nomor / total, f'{nomor} baris diproses')
+        )
+    os.remove(path)
+    return {
+        'jumlah_berhasil': hasil.jumlah_berhasil,
+        'jumlah_gagal': len(hasil.kesalahan),
+        'kesalahan': hasil.kesalahan[:200],
+    }
+
+
+@tugas('ekspor-nasabah')
+def _tugas_ekspor(pekerjaan, format):
+    """Tulis ekspor lengkap ke file; diunduh lewat /api/jobs/<id>/berkas"""
+    from ekspor import stream_csv, stream_ndjson
+
+    total = max(db.session.query(Nasabah.id).count(), 1)
+    nama = f'ekspor-{uuid.uuid4().hex}.{format}'
+    path = os.path.join(folder_pekerjaan(), nama)
+    pembuat = {'csv': stream_csv, 'ndjson': stream_ndjson}[format]
+
+    def progres(jumlah):
+        pekerjaan.progres(jumlah / total, f'{jumlah} nasabah ditulis')
+
+    with open(path + '.tmp', 'w', encoding='utf-8', newline='') as f:
+        for potongan in pembuat(progres=progres):
+            f.write(potongan)
+    os.replace(path + '.tmp', path)
+    return {'berkas': nama, 'nama_unduhan': f'nasabah.{format}'}
+
+
+@tugas('ranking-lengkap')
+def _tugas_ranking_lengkap(pekerjaan):
+    """Urutan ranking lengkap ke file CSV dengan memori terbatas (lihat ranking_bertahap.py)"""
+    from ranking_bertahap import ranking_bertahap
+
+    total = max(db.session.query(Nasabah.id).count(), 1)
+    nama = f'ranking-{uuid.uuid4().hex}.csv'
+    path = os.path.join(folder_pekerjaan(), nama)
+    hasil = ranking_bertahap(
+        top=1, berkas=path + '.tmp',
+        progres=lambda jumlah: pekerjaan.progres(jumlah / total, f'{jumlah} nasabah dihitung')
+    )
+    os.replace(path + '.tmp', path)
+    return {'berkas': nama, 'nama_unduhan': 'ranking.csv', 'total': hasil['total']}
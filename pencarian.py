@@ -0,0 +1,101 @@
+"""Pencarian nasabah berbasis indeks SQLite FTS5 (kode, nama, alamat, telepon)"""
+import re
+
+from sqlalchemy import text
+
+from database import db
+from models import Nasabah
+from paginasi import Halaman, baca_cursor, buat_cursor
+
+# Bobot bm25 per kolom: kode dan nama lebih menentukan daripada alamat
+BOBOT_KOLOM = (10.0, 5.0, 1.0, 2.0)
+MAKS_TOKEN = 8
+
+# External content table: teks tidak disimpan dua kali, hanya indeksnya.
+# Trigger menjaga indeks tetap sinkron, termasuk untuk insert Core (impor).
+DDL_FTS = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS nasabah_fts USING fts5(
+        kode, nama, alamat, telepon,
+        content='nasabah', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS nasabah_fts_ai AFTER INSERT ON nasabah BEGIN
+        INSERT INTO nasabah_fts(rowid, kode, nama, alamat, telepon)
+        VALUES (new.id, new.kode, new.nama, new.alamat, new.telepon);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS nasabah_fts_ad AFTER DELETE ON nasabah BEGIN
+        INSERT INTO nasabah_fts(nasabah_fts, rowid, kode, nama, alamat, telepon)
+        VALUES ('delete', old.id, old.kode, old.nama, old.alamat, old.telepon);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS nasabah_fts_au
+    AFTER UPDATE OF kode, nama, alamat, telepon ON nasabah BEGIN
+        INSERT INTO nasabah_fts(nasabah_fts, rowid, kode, nama, alamat, telepon)
+        VALUES ('delete', old.id, old.kode, old.nama, old.alamat, old.telepon);
+        INSERT INTO nasabah_fts(rowid, kode, nama, alamat, telepon)
+        VALUES (new.id, new.kode, new.nama, new.alamat, new.telepon);
+    END""",
+]
+OBJEK_FTS = {'nasabah_fts', 'nasabah_fts_ai', 'nasabah_fts_ad', 'nasabah_fts_au'}
+
+
+def siapkan_pencarian():
+    """Buat tabel FTS dan trigger yang belum ada; isi ulang indeks bila ada yang baru.
+
+    Trigger ikut hilang saat tabel nasabah dibuat ulang, sehingga indeks
+    juga dibangun ulang pada kasus tersebut.
+    """
+    connection = db.session.connection()
+    ada = {row.name for row in connection.execute(text('SELECT name FROM sqlite_master'))}
+    if OBJEK_FTS <= ada:
+        return
+
+    for ddl in DDL_FTS:
+        connection.exec_driver_sql(ddl)
+    connection.exec_driver_sql("INSERT INTO nasabah_fts(nasabah_fts) VALUES ('rebuild')")
+    db.session.commit()
+
+
+def query_fts(teks):
+    """Ubah input pengguna menjadi query FTS5: semua kata wajib ada, cocok awalan.
+
+    Setiap kata dikutip sehingga operator FTS5 (OR, NOT, *, ") dari input
+    tidak pernah ditafsirkan. Mengembalikan None jika tidak ada kata.
+    """
+    token = re.findall(r'\w+', teks or '')[:MAKS_TOKEN]
+    if not token:
+        return None
+    return ' '.join(f'"{t}"*' for t in token)
+
+
+def halaman_pencarian(teks, cursor, limit):
+    """Satu halaman hasil pencarian, terurut dari yang paling relevan.
+
+    Keyset pada (skor bm25, id) seperti ``paginasi.halaman_skor``.
+    """
+    match = query_fts(teks)
+    if match is None:
+        return Halaman([], None)
+
+    params = {'match': match, 'limit': limit + 1}
+    lanjutan = ''
+    posisi = baca_cursor(cursor, 2)
+    if posisi:
+        params['skor'], params['id'] = posisi
+        lanjutan = 'WHERE skor > :skor OR (skor = :skor AND id > :id)'
+
+    bobot = ', '.join(str(b) for b in BOBOT_KOLOM)
+    rows = db.session.execute(text(f"""
+        SELECT id, skor FROM (
+            SELECT rowid AS id, bm25(nasabah_fts, {bobot}) AS skor
+            FROM nasabah_fts WHERE nasabah_fts MATCH :match
+        ) {lanjutan}
+        ORDER BY skor, id LIMIT :limit
+    """), params).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = buat_cursor(rows[-1].skor, rows[-1].id)
+
+    nasabahs = {n.id: n for n in Nasabah.query.filter(Nasabah.id.in_([r.id for r in rows]))}
+    return Halaman([nasabahs[r.id] for r in rows if r.id in nasabahs], next_cursor)
@@ -0,0 +1,200 @@
+"""Ranking bertahap (out-of-core): matriks keputusan dibaca per potongan id nasabah.
+
+Memori puncak hanya sebesar satu potongan + heap top-k + histogram skor,
+berapapun jumlah nasabah. Urutan lengkap (jika diminta) ditulis ke file
+lewat external merge sort: setiap potongan diurutkan dan disimpan sebagai
+run di folder sementara, lalu semua run digabung dengan ``heapq.merge``.
+"""
+import csv
+import heapq
+import os
+import tempfile
+
+import numpy as np
+from sqlalchemy import select
+
+from database import db
+from models import Kriteria, Nasabah, NilaiNasabah
+from saw import KATEGORI, kategori_skor, normalisasi, preferensi, skor_persen
+from statistik import nilai_acuan
+
+UKURAN_POTONGAN = 20_000
+MAKS_RUN = 200        # run yang digabung sekaligus (batas file terbuka)
+JUMLAH_BIN = 101      # histogram skor persen 0..100, lebar 1 poin
+
+tabel_nasabah = Nasabah.__table__
+tabel_nilai = NilaiNasabah.__table__
+
+
+def potongan_matriks(kriterias, ukuran=UKURAN_POTONGAN, connection=None):
+    """Generator (ids, kode, nama, X) per potongan id nasabah naik.
+
+    Nilai dibaca dengan rentang id (``BETWEEN``), bukan ``IN``, sehingga
+    ukuran potongan tidak dibatasi jumlah parameter SQLite. Sel kosong = 0,
+    sama seperti ``saw.matriks_ke_array``.
+    """
+    executor = db.session if connection is None else connection
+    kolom = {k.id: j for j, k in enumerate(kriterias)}
+    n, v = tabel_nasabah.c, tabel_nilai.c
+    id_terakhir = 0
+
+    while True:
+        rows = executor.execute(
+            select(n.id, n.kode, n.nama).where(n.id > id_terakhir).order_by(n.id).limit(ukuran)
+        ).all()
+        if not rows:
+            return
+        ids = np.fromiter((row.id for row in rows), dtype=np.int64, count=len(rows))
+        X = np.zeros((len(ids), len(kriterias)))
+
+        sel = executor.execute(
+            select(v.nasabah_id, v.kriteria_id, v.nilai)
+            .where(v.nasabah_id.between(int(ids[0]), int(ids[-1])), v.nilai.isnot(None))
+        ).all()
+        if sel:
+            nasabah_id, kriteria_id, nilai = zip(*sel)
+            j = np.fromiter((kolom.get(k, -1) for k in kriteria_id), dtype=np.int64, count=len(sel))
+            nasabah_id = np.array(nasabah_id, dtype=np.int64)
+            i = np.minimum(np.searchsorted(ids, nasabah_id), len(ids) - 1)
+            ada = (j >= 0) & (ids[i] == nasabah_id)
+            X[i[ada], j[ada]] = np.array(nilai, dtype=float)[ada]
+
+        yield ids, [row.kode for row in rows], [row.nama for row in rows], X
+        id_terakhir = int(ids[-1])
+
+
+def distribusi_histogram(histogram):
+    """Jumlah nasabah per kategori dari histogram skor persen: [(kode, label, jumlah)]"""
+    histogram = np.asarray(histogram)
+    hasil = []
+    atas = JUMLAH_BIN
+    for kode, batas, label in KATEGORI:
+        bawah = max(int(batas), 0)
+        hasil.append((kode, label, int(histogram[bawah:atas].sum())))
+        atas = bawah
+    return hasil
+
+
+def ranking_bertahap(bobot=None, top=100, ukuran=UKURAN_POTONGAN, berkas=None, progres=None):
+    """Ranking SAW seluruh nasabah langsung dari nilai_nasabah, per potongan.
+
+    ``bobot`` opsional (urut kode kriteria) untuk what-if; default bobot
+    tersimpan. Acuan normalisasi diambil dari tabel statistik sehingga tidak
+    perlu lintasan tambahan. ``berkas``: path CSV urutan lengkap (opsional).
+    ``progres(jumlah)`` dipanggil setelah setiap potongan.
+    """
+    kriterias = Kriteria.query.order_by(Kriteria.kode).all()
+    acuan = nilai_acuan()
+    w = (np.array([k.bobot for k in kriterias], dtype=float) if bobot is None
+         else np.asarray(bobot, dtype=float))
+    if w.shape != (len(kriterias),):
+        raise ValueError(f'Vektor bobot harus berisi {len(kriterias)} nilai')
+
+    top = max(int(top), 1)
+    heap = []   # min-heap (skor, -id, kode, nama): elemen terlemah di heap[0]
+    histogram = np.zeros(JUMLAH_BIN, dtype=np.int64)
+    total = 0
+
+    with tempfile.TemporaryDirectory(prefix='ranking-') as folder:
+        runs = []
+        for ids, kode, nama, X in potongan_matriks(kriterias, ukuran):
+            P = preferensi(normalisasi(X, kriterias, acuan), w)
+            total += len(ids)
+            histogram += np.bincount(np.clip(np.floor(skor_persen(P)).astype(np.int64), 0, JUMLAH_BIN - 1),
+                                     minlength=JUMLAH_BIN)
+            _masukkan_top(heap, top, P, ids, kode, nama)
+            if berkas is not None:
+                runs.append(_tulis_run(folder, len(runs), P, ids, kode, nama))
+            if progres is not None:
+                progres(total)
+
+        if berkas is not None:
+            _tulis_urutan(folder, runs, berkas)
+
+    urutan = sorted(heap, key=lambda item: (-item[0], -item[1]))
+    return {
+        'total': total,
+        'top': [{
+            'peringkat': peringkat,
+            'id': -minus_id,
+            'kode': kode,
+            'nama': nama,
+            'nilai_akhir': skor,
+            'skor_persen': float(skor_persen(skor)),
+            'kategori': kategori_skor(float(skor_persen(skor))),
+        } for peringkat, (skor, minus_id, kode, nama) in enumerate(urutan, start=1)],
+        'histogram': histogram.tolist(),
+        'distribusi': distribusi_histogram(histogram),
+    }
+
+
+def _masukkan_top(heap, top, P, ids, kode, nama):
+    """Perbarui heap top-k dengan satu potongan; hanya kandidat yang bisa masuk yang diperiksa"""
+    if len(P) > top:
+        # Semua nilai >= skor ke-k potongan ini (nilai kembar ikut agar id kecil tidak terbuang)
+        batas = np.partition(P, len(P) - top)[len(P) - top]
+        kandidat = np.nonzero(P >= batas)[0]
+    else:
+        kandidat = np.arange(len(P))
+    if len(heap) >= top:
+        kandidat = kandidat[P[kandidat] >= heap[0][0]]
+
+    for i in kandidat:
+        item = (float(P[i]), -int(ids[i]), kode[i], nama[i])
+        if len(heap) < top:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heappushpop(heap, item)
+
+
+# ========== FILE URUTAN LENGKAP ==========
+def _kunci_run(baris):
+    return -float(baris[0]), int(baris[1])
+
+
+def _tulis_run(folder, nomor, P, ids, kode, nama):
+    """Satu potongan terurut (skor turun, id naik) -> file CSV run"""
+    path = os.path.join(folder, f'run-{nomor:06d}.csv')
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        for i in np.lexsort((ids, -P)):
+            writer.writerow((repr(float(P[i])), int(ids[i]), kode[i], nama[i]))
+    return path
+
+
+def _gabung_run(runs, tujuan):
+    """Gabung beberapa run terurut menjadi satu run (k-way merge)"""
+    berkas = [open(path, encoding='utf-8', newline='') for path in runs]
+    try:
+        with open(tujuan, 'w', encoding='utf-8', newline='') as f:
+            csv.writer(f).writerows(heapq.merge(*map(csv.reader, berkas), key=_kunci_run))
+    finally:
+        for b in berkas:
+            b.close()
+    for path in runs:
+        os.remove(path)
+    return tujuan
+
+
+def _tulis_urutan(folder, runs, berkas):
+    """Gabung semua run (bertingkat jika lebih dari MAKS_RUN) lalu tulis CSV akhir"""
+    tingkat = 0
+    while len(runs) > MAKS_RUN:
+        runs = [_gabung_run(runs[awal:awal + MAKS_RUN],
+                            os.path.join(folder, f'gabung-{tingkat}-{awal:06d}.csv'))
+                for awal in range(0, len(runs), MAKS_RUN)]
+        tingkat += 1
+
+    sumber = [open(path, encoding='utf-8', newline='') for path in runs]
+    try:
+        with open(berkas, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['peringkat', 'kode', 'nama', 'nilai_akhir', 'skor_persen', 'kategori'])
+            gabungan = heapq.merge(*map(csv.reader, sumber), key=_kunci_run)
+            for peringkat, (skor, _, kode, nama) in enumerate(gabungan, start=1):
+                persen = float(skor_persen(float(skor)))
+                writer.writerow((peringkat, kode, nama, round(float(skor), 6),
+                                 round(persen, 2), kategori_skor(persen)))
+    finally:
+        for s in sumber:
+            s.close()
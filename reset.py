@@ -2,6 +2,7 @@
 import os
 from app import app, db
 from models import User, Kriteria
+from data_sintetis import KRITERIA_DEFAULT
 
 with app.app_context():
     print("=" * 50)
@@ -32,18 +33,7 @@ with app.app_context():
 
     # Tambah kriteria default
     print("\n📊 Menambahkan kriteria default...")
-    kriteria_list = [
-        {'kode':'C1','nama':'Besarnya Jumlah Pinjaman','atribut':'benefit','bobot':0.25,
-         'keterangan':'>50jt:90\n21–50jt:80\n5–20jt:70\n≤5jt:60'},
-        {'kode':'C2','nama':'Banyak Jumlah Tabungan','atribut':'benefit','bobot':0.15,
-         'keterangan':'≥10jt:85\n5–9jt:70\n<5jt:60'},
-        {'kode':'C3','nama':'Keaktifan','atribut':'cost','bobot':0.15,
-         'keterangan':'Sering:70\nJarang:60\nTidak Pernah:50'},
-        {'kode':'C4','nama':'Lama Keanggotaan','atribut':'benefit','bobot':0.20,
-         'keterangan':'≥5 th:75\n3–4 th:65\n<3 th:55'},
-        {'kode':'C5','nama':'Riwayat Tunggakan','atribut':'benefit','bobot':0.25,
-         'keterangan':'Tidak:80\n1x:70\n≥2x:60'}
-    ]
+    kriteria_list = KRITERIA_DEFAULT
 
     for k in kriteria_list:
         db.session.add(Kriteria(**k))
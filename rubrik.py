@@ -0,0 +1,265 @@
+"""Kompilasi rubrik ``Kriteria.keterangan`` menjadi tabel konversi nilai mentah -> skor.
+
+Setiap baris rubrik berbentuk ``kondisi:skor``. Kondisi berupa interval angka
+(``>50jt``, ``21–50jt``, ``≤ Rp 5.000.000``, ``≥5 th``, ``1x``) atau kategori
+teks (``Sering``, ``Tidak Pernah``). Interval dikompilasi menjadi batas bawah
+terurut sehingga satu nilai dicari dengan bisect dan satu kolom sekaligus
+dengan ``np.searchsorted``.
+"""
+from bisect import bisect_right
+from functools import lru_cache
+import math
+import re
+
+import numpy as np
+
+# Satuan dalam rubrik dan input: (dimensi, faktor ke satuan dasar rupiah/tahun/kali)
+SATUAN = {
+    '': (None, 1),
+    'rp': ('uang', 1), 'rb': ('uang', 1e3), 'ribu': ('uang', 1e3), 'k': ('uang', 1e3),
+    'jt': ('uang', 1e6), 'juta': ('uang', 1e6),
+    'm': ('uang', 1e9), 'milyar': ('uang', 1e9), 'miliar': ('uang', 1e9),
+    'th': ('waktu', 1), 'thn': ('waktu', 1), 'tahun': ('waktu', 1),
+    'bln': ('waktu', 1 / 12), 'bulan': ('waktu', 1 / 12),
+    'x': ('kali', 1), 'kali': ('kali', 1),
+}
+
+_ANGKA = r'(rp\.?\s*)?(\d[\d.,]*)\s*([a-z]*)'
+_POLA_INTERVAL = re.compile(rf'^(<=|>=|<|>)?\s*{_ANGKA}(?:\s*-\s*{_ANGKA})?$')
+_POLA_ANGKA = re.compile(rf'^{_ANGKA}$')
+_GANTI = [('≥', '>='), ('≤', '<='), ('–', '-'), ('—', '-'), ('−', '-')]
+
+
+class RubrikError(ValueError):
+    """Baris rubrik tidak bisa dibaca"""
+
+
+def _rapikan(teks):
+    teks = ' '.join(str(teks).strip().lower().split())
+    for lama, baru in _GANTI:
+        teks = teks.replace(lama, baru)
+    return teks
+
+
+def _angka(rp, digit, satuan):
+    """Angka format Indonesia (``5.000.000``, ``2,5``) -> (nilai dasar, dimensi), atau None"""
+    if satuan not in SATUAN:
+        return None
+    dimensi, faktor = SATUAN[satuan]
+    if rp:
+        if dimensi not in (None, 'uang'):
+            return None
+        dimensi = 'uang'
+    if ',' in digit:
+        digit = digit.replace('.', '').replace(',', '.')
+    elif re.fullmatch(r'\d{1,3}(\.\d{3})+', digit):
+        digit = digit.replace('.', '')
+    try:
+        return float(digit) * faktor, dimensi
+    except ValueError:
+        return None
+
+
+def baca_angka(teks):
+    """Nilai mentah (``75jt``, ``Rp 75.000.000``, ``4 th``) -> (float, dimensi), atau None"""
+    cocok = _POLA_ANGKA.match(_rapikan(teks))
+    return _angka(*cocok.groups()) if cocok else None
+
+
+def _baca_interval(kondisi):
+    """Kondisi -> ((bawah, bawah_inklusif, atas, atas_inklusif), dimensi); None = tak terbatas"""
+    cocok = _POLA_INTERVAL.match(kondisi)
+    if not cocok:
+        return None
+    operator, rp1, digit1, satuan1, rp2, digit2, satuan2 = cocok.groups()
+    if digit2 is not None:
+        if operator:
+            return None
+        # "21–50jt": satuan batas bawah mengikuti batas atas
+        bawah = _angka(rp1, digit1, satuan1 or satuan2 or '')
+        atas = _angka(rp2, digit2, satuan2 or '')
+        if bawah is None or atas is None or bawah[0] > atas[0]:
+            return None
+        return (bawah[0], True, atas[0], True), bawah[1] or atas[1]
+
+    hasil = _angka(rp1, digit1, satuan1)
+    if hasil is None:
+        return None
+    nilai, dimensi = hasil
+    return {
+        None: (nilai, True, nilai, True),
+        '>': (nilai, False, None, False),
+        '>=': (nilai, True, None, False),
+        '<': (None, False, nilai, False),
+        '<=': (None, False, nilai, True),
+    }[operator], dimensi
+
+
+class Rubrik:
+    """Tabel konversi hasil kompilasi satu rubrik.
+
+    Interval diurutkan menurut batas bawah; interval ke-i berlaku untuk
+    ``batas[i] <= x < batas[i + 1]`` (celah antar interval, mis. antara
+    20jt dan 21jt, ikut interval di bawahnya). Batas bawah eksklusif
+    (``>50jt``) digeser ke float berikutnya agar semua batas inklusif.
+    """
+
+    def __init__(self, kategori, interval, dimensi=None):
+        self.kategori = kategori
+        self.dimensi = dimensi  # satuan input harus sedimensi (None = angka tanpa satuan)
+        self.batas = np.array([b for b, _ in interval], dtype=float)
+        self.skor_interval = np.array([s for _, s in interval], dtype=float)
+        self._batas = self.batas.tolist()
+        self.atas = None        # (nilai, inklusif) batas atas interval tertinggi
+
+    def __bool__(self):
+        return bool(self.kategori) or len(self.batas) > 0
+
+    @property
+    def rentang_skor(self):
+        """(min, maks) skor yang bisa dihasilkan rubrik, atau None untuk rubrik kosong"""
+        semua = self.skor_interval.tolist() + list(self.kategori.values())
+        return (min(semua), max(semua)) if semua else None
+
+    def _angka(self, kunci):
+        """Angka input dalam satuan dasar, atau None jika bukan angka / beda dimensi"""
+        hasil = baca_angka(kunci)
+        if hasil is None or hasil[1] not in (None, self.dimensi):
+            return None
+        return hasil[0]
+
+    def _dalam_atas(self, x):
+        if self.atas is None:
+            return True
+        nilai, inklusif = self.atas
+        return x <= nilai if inklusif else x < nilai
+
+    def skor(self, teks):
+        """Skor untuk satu nilai mentah (kategori atau angka), atau None jika tidak cocok"""
+        kunci = _rapikan(teks)
+        if kunci in self.kategori:
+            return self.kategori[kunci]
+        x = self._angka(kunci)
+        if x is None or not len(self.batas):
+            return None
+        i = bisect_right(self._batas, x) - 1
+        if i < 0 or not self._dalam_atas(x):
+            return None
+        return float(self.skor_interval[i])
+
+    def skor_angka(self, X):
+        """Versi vektor untuk satu kolom angka; NaN untuk nilai di luar rubrik"""
+        X = np.asarray(X, dtype=float)
+        hasil = np.full(X.shape, np.nan)
+        if not len(self.batas):
+            return hasil
+        i = np.searchsorted(self.batas, X, side='right') - 1
+        valid = (i >= 0) & ~np.isnan(X)
+        if self.atas is not None:
+            nilai, inklusif = self.atas
+            valid &= (X <= nilai) if inklusif else (X < nilai)
+        hasil[valid] = self.skor_interval[i[valid]]
+        return hasil
+
+    def skor_kolom(self, teks_kolom):
+        """Konversi satu kolom teks mentah sekaligus -> array skor (NaN = tidak cocok).
+
+        Teks diurai sekali per nilai unik; pencarian interval dilakukan untuk
+        seluruh kolom dengan satu ``searchsorted``.
+        """
+        unik = {}
+        kode = np.empty(len(teks_kolom), dtype=np.int64)
+        for j, teks in enumerate(teks_kolom):
+            kode[j] = unik.setdefault(_rapikan(teks), len(unik))
+
+        kunci = list(unik)
+        skor_unik = np.full(len(kunci), np.nan)
+        angka = np.full(len(kunci), np.nan)
+        for u, k in enumerate(kunci):
+            if k in self.kategori:
+                skor_unik[u] = self.kategori[k]
+            else:
+                x = self._angka(k)
+                if x is not None:
+                    angka[u] = x
+        perlu = np.isnan(skor_unik) & ~np.isnan(angka)
+        skor_unik[perlu] = self.skor_angka(angka[perlu])
+        return skor_unik[kode]
+
+
+@lru_cache(maxsize=256)
+def kompilasi(keterangan):
+    """Kompilasi teks rubrik; di-cache per isi teks sehingga otomatis segar setelah diedit"""
+    kategori = {}
+    interval = []
+    dimensi = set()
+    for nomor, baris in enumerate((keterangan or '').splitlines(), start=1):
+        if not baris.strip():
+            continue
+        kondisi, pemisah, skor = baris.rpartition(':')
+        try:
+            skor = float(skor.strip().replace(',', '.'))
+        except ValueError:
+            skor = None
+        if not pemisah or skor is None or not kondisi.strip():
+            raise RubrikError(f'Baris {nomor} rubrik harus berformat kondisi:skor ({baris.strip()})')
+
+        kondisi = _rapikan(kondisi)
+        hasil = _baca_interval(kondisi)
+        if hasil is None:
+            kategori[kondisi] = skor
+        else:
+            interval.append((hasil[0], skor))
+            dimensi.add(hasil[1])
+
+    dimensi.discard(None)
+    if len(dimensi) > 1:
+        raise RubrikError(f'Satuan rubrik tidak seragam: {", ".join(sorted(dimensi))}')
+
+    # Urutkan menurut batas bawah; batas bersama (≤5jt dan 5–20jt) milik interval bawah
+    interval.sort(key=lambda item: -math.inf if item[0][0] is None else item[0][0])
+    daftar = []
+    atas_sebelumnya = None
+    for (bawah, bawah_inklusif, atas, atas_inklusif), skor in interval:
+        mulai = -math.inf if bawah is None else (bawah if bawah_inklusif else np.nextafter(bawah, math.inf))
+        if atas_sebelumnya is not None:
+            nilai, inklusif = atas_sebelumnya
+            mulai = max(mulai, np.nextafter(nilai, math.inf) if inklusif else nilai)
+        daftar.append((float(mulai), skor))
+        atas_sebelumnya = None if atas is None else (atas, atas_inklusif)
+
+    rubrik = Rubrik(kategori, daftar, dimensi.pop() if dimensi else None)
+    rubrik.atas = atas_sebelumnya
+    return rubrik
+
+
+def rubrik_kriteria(kriteria):
+    """Rubrik terkompilasi milik satu kriteria (rubrik kosong jika tidak valid)"""
+    try:
+        return kompilasi(kriteria.keterangan or '')
+    except RubrikError:
+        return kompilasi('')
+
+
+def konversi_nilai(kriteria, teks):
+    """Input form -> skor. Angka biasa dianggap skor hanya jika berada dalam rentang
+    skor rubrik (atau rubrik kosong); selain itu dikonversi lewat rubrik sebagai nilai mentah.
+
+    Raise ValueError jika teks bukan angka berhingga dan tidak cocok dengan rubrik.
+    """
+    teks = str(teks).strip()
+    rubrik = rubrik_kriteria(kriteria)
+    try:
+        angka = float(teks)
+    except ValueError:
+        angka = None
+    if angka is not None:
+        if not math.isfinite(angka):
+            raise ValueError(f'Nilai {kriteria.kode} harus angka berhingga: {teks}')
+        rentang = rubrik.rentang_skor
+        if rentang is None or rentang[0] <= angka <= rentang[1]:
+            return angka
+    skor = rubrik.skor(teks)
+    if skor is None:
+        raise ValueError(f'Nilai {kriteria.kode} tidak cocok dengan rubrik: {teks}')
+    return skor
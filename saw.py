@@ -0,0 +1,114 @@
+"""Mesin perhitungan SAW (Simple Additive Weighting) berbasis NumPy"""
+import numpy as np
+
+# Skala bawaan kriteria C1-C5 (mode normalisasi 'skala' tanpa pengaturan).
+# Acuan yang berlaku dibaca lewat statistik.nilai_acuan().
+NILAI_IDEAL = {
+    'C1': {'max': 90, 'min': 60},  # Skala 60-90
+    'C2': {'max': 85, 'min': 60},  # Skala 60-85
+    'C3': {'max': 70, 'min': 50},  # Skala 50-70 (COST)
+    'C4': {'max': 75, 'min': 55},  # Skala 55-75
+    'C5': {'max': 80, 'min': 60}   # Skala 60-80
+}
+
+# Kode, batas bawah skor (persen) dan label kategori, urut dari tertinggi
+KATEGORI = [
+    ('sangat_baik', 85, 'Sangat Baik 🏆'),
+    ('baik', 70, 'Baik 👍'),
+    ('cukup', 55, 'Cukup ✅'),
+    ('perlu_perbaikan', 0, 'Perlu Perbaikan ⚠️'),
+]
+
+
+class HasilSAW:
+    """Hasil perhitungan SAW untuk satu matriks keputusan.
+
+    Semua atribut berupa array NumPy dengan baris sesuai urutan
+    ``MatriksKeputusan.nasabahs`` dan kolom sesuai urutan kriteria.
+    """
+
+    def __init__(self, nilai, normalisasi, bobot, preferensi):
+        self.nilai = nilai
+        self.normalisasi = normalisasi
+        self.bobot = bobot
+        self.preferensi = preferensi
+
+    def urutan(self):
+        """Indeks baris dari nilai preferensi tertinggi ke terendah"""
+        return urutkan_preferensi(self.preferensi)
+
+    def skor_persen(self):
+        return skor_persen(self.preferensi)
+
+
+def matriks_ke_array(matriks):
+    """Ubah grid nilai matriks keputusan menjadi array float (kosong = 0)"""
+    if not matriks.nilai:
+        return np.zeros((0, len(matriks.kriterias)))
+    X = np.array(matriks.nilai, dtype=float)
+    return np.nan_to_num(X, nan=0.0)
+
+
+def normalisasi(X, kriterias, nilai_ideal=NILAI_IDEAL):
+    """Normalisasi kolom demi kolom.
+
+    Benefit: r_ij = x_ij / max_ideal, Cost: r_ij = min_ideal / x_ij.
+    Sel bernilai 0 atau kriteria tanpa nilai ideal menghasilkan 0.
+    """
+    ideal = [nilai_ideal.get(k.kode) for k in kriterias]
+    ada_ideal = np.array([i is not None for i in ideal], dtype=bool)
+    maks = np.array([i['max'] if i else 0 for i in ideal], dtype=float)
+    mins = np.array([i['min'] if i else 0 for i in ideal], dtype=float)
+    benefit = np.array([k.atribut == 'benefit' for k in kriterias], dtype=bool)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        R = np.where(benefit, X / maks, mins / X)
+
+    valid = ada_ideal & (X != 0) & np.where(benefit, maks > 0, X > 0)
+    return np.where(valid, R, 0.0)
+
+
+def preferensi(R, bobot):
+    """Nilai preferensi V_i = sum(w_j * r_ij) untuk semua baris sekaligus.
+
+    Dijumlahkan per baris (bukan ``R @ bobot``) agar skor satu nasabah
+    identik bit-per-bit dengan skornya dalam perhitungan seluruh populasi.
+    """
+    return (R * bobot).sum(axis=1)
+
+
+def hitung_saw(matriks, nilai_ideal=NILAI_IDEAL):
+    """Hitung normalisasi dan nilai preferensi untuk seluruh matriks keputusan"""
+    X = matriks_ke_array(matriks)
+    bobot = np.array([k.bobot for k in matriks.kriterias], dtype=float)
+    R = normalisasi(X, matriks.kriterias, nilai_ideal)
+    return HasilSAW(X, R, bobot, preferensi(R, bobot))
+
+
+def urutkan_preferensi(nilai_preferensi):
+    """Indeks dari nilai tertinggi ke terendah (stabil untuk nilai sama)"""
+    return np.argsort(-nilai_preferensi, kind='stable')
+
+
+def skor_persen(nilai_preferensi):
+    """Konversi nilai preferensi ke persen (maksimal 100)"""
+    return np.minimum(nilai_preferensi * 100, 100)
+
+
+def kategori_skor(score_percent):
+    """Tentukan kategori dari skor persen"""
+    for _, batas, kategori in KATEGORI:
+        if score_percent >= batas:
+            return kategori
+    return KATEGORI[-1][2]
+
+
+def rentang_kategori(kode):
+    """Rentang nilai preferensi [bawah, atas) untuk kode kategori, atau None"""
+    atas = None
+    for kode_kategori, batas, _ in KATEGORI:
+        if kode_kategori == kode:
+            bawah = batas / 100 if batas > 0 else None
+            return bawah, atas
+        atas = batas / 100
+    return None
@@ -0,0 +1,132 @@
+"""Analisis sensitivitas bobot: banyak vektor bobot dinilai sekaligus (what-if)"""
+import numpy as np
+
+from metode import konteks_keputusan, peringkat_kolom
+
+MAKS_SKENARIO = 1000
+MAKS_TAMPIL = 200
+ELEMEN_PER_POTONGAN = 4_000_000   # ~32 MB float64 per potongan skenario
+
+
+def matriks_normal():
+    """(info nasabah, kode kriteria, bobot tersimpan, matriks normalisasi R) dari konteks bersama"""
+    konteks = konteks_keputusan()
+    return konteks.nasabahs, konteks.kode, konteks.bobot, konteks.normal('ideal')
+
+
+def sampel_monte_carlo(bobot_dasar, jumlah, sebaran=0.1, seed=None):
+    """Vektor bobot acak di sekitar ``bobot_dasar`` (noise log-normal, total bobot dipertahankan)"""
+    rng = np.random.default_rng(seed)
+    bobot_dasar = np.asarray(bobot_dasar, dtype=float)
+    W = bobot_dasar * np.exp(sebaran * rng.standard_normal((jumlah, len(bobot_dasar))))
+    total = W.sum(axis=1, keepdims=True)
+    total[total == 0] = 1.0
+    return W / total * bobot_dasar.sum()
+
+
+def peringkat_skenario(R, W, indeks):
+    """Peringkat nasabah ``indeks`` pada setiap skenario bobot ``W`` (len(indeks) x k).
+
+    R: matriks normalisasi (n x m), W: skenario bobot (k x m). Skor semua
+    skenario dihitung dengan perkalian matriks per potongan skenario agar
+    memori tetap terbatas. Peringkat = 1 + jumlah nasabah dengan skor lebih
+    tinggi (nilai sama mendapat peringkat sama), dicari dengan searchsorted
+    pada skor yang sudah diurutkan, tanpa argsort seluruh populasi.
+    """
+    n, k = R.shape[0], W.shape[0]
+    peringkat = np.empty((len(indeks), k), dtype=np.int64)
+
+    lebar = max(1, ELEMEN_PER_POTONGAN // max(n, 1))
+    for awal in range(0, k, lebar):
+        P = W[awal:awal + lebar] @ R.T          # satu baris per skenario
+        terurut = np.sort(P, axis=1)
+        for c in range(P.shape[0]):
+            lebih_besar = n - np.searchsorted(terurut[c], P[c, indeks], side='right')
+            peringkat[:, awal + c] = lebih_besar + 1
+    return peringkat
+
+
+def analisis(bobot_dasar=None, skenario=None, monte_carlo=None, top=10, tampil=20):
+    """Bandingkan peringkat dengan bobot tersimpan, bobot usulan dan skenario lain.
+
+    Tidak ada yang ditulis ke database. Raise ValueError untuk input tidak valid.
+    """
+    nasabahs, kode_kriteria, bobot_sekarang, R = matriks_normal()
+    m = len(kode_kriteria)
+
+    dasar = bobot_sekarang if bobot_dasar is None else _vektor(bobot_dasar, kode_kriteria)
+    daftar = [] if skenario is None else [_vektor(w, kode_kriteria) for w in skenario]
+    if monte_carlo:
+        jumlah = int(monte_carlo.get('jumlah', 200))
+        if not 0 < jumlah <= MAKS_SKENARIO:
+            raise ValueError(f'Jumlah sampel harus 1..{MAKS_SKENARIO}')
+        sebaran = float(monte_carlo.get('sebaran', 0.1))
+        if not 0 <= sebaran <= 2:
+            raise ValueError('Sebaran harus 0..2')
+        seed = monte_carlo.get('seed')
+        daftar.extend(sampel_monte_carlo(dasar, jumlah, sebaran, None if seed is None else int(seed)))
+    if not daftar:
+        raise ValueError('Tidak ada skenario bobot')
+    if len(daftar) > MAKS_SKENARIO:
+        raise ValueError(f'Maksimal {MAKS_SKENARIO} skenario')
+
+    if not nasabahs:
+        return {'kriteria': kode_kriteria, 'jumlah_skenario': len(daftar),
+                'irisan_top': None, 'nasabah': []}
+
+    top = max(1, int(top))
+    tampil = max(1, min(int(tampil), MAKS_TAMPIL))
+    W = np.vstack(daftar).reshape(-1, m)
+    acuan = peringkat_kolom(R @ np.vstack([bobot_sekarang, dasar]).T)
+    peringkat_sekarang, peringkat_dasar = acuan[:, 0], acuan[:, 1]
+    skor_dasar = (R * dasar).sum(axis=1)
+
+    # Nasabah yang ditampilkan + anggota top-N bobot usulan (untuk irisan top-N)
+    urutan_dasar = np.argsort(peringkat_dasar, kind='stable')
+    indeks = urutan_dasar[:max(tampil, top)]
+    peringkat = peringkat_skenario(R, W, indeks)
+    masuk_top = peringkat <= top
+    irisan = masuk_top[:min(top, len(indeks))].mean(axis=0)
+
+    return {
+        'kriteria': kode_kriteria,
+        'bobot_dasar': dasar.tolist(),
+        'jumlah_skenario': len(W),
+        'top': top,
+        # Porsi top-N bobot usulan yang tetap berada di top-N tiap skenario
+        'irisan_top': {
+            'rata': round(float(irisan.mean()), 4),
+            'min': round(float(irisan.min()), 4),
+        },
+        'nasabah': [{
+            'id': nasabahs[i].id,
+            'kode': nasabahs[i].kode,
+            'nama': nasabahs[i].nama,
+            'peringkat_sekarang': int(peringkat_sekarang[i]),
+            'peringkat_dasar': int(peringkat_dasar[i]),
+            'skor_dasar': round(float(skor_dasar[i]), 4),
+            'peringkat_rata': round(float(baris.mean()), 2),
+            'peringkat_std': round(float(baris.std()), 2),
+            'peringkat_min': int(baris.min()),
+            'peringkat_max': int(baris.max()),
+            'persen_top': round(float(top_baris.mean() * 100), 1),
+        } for i, baris, top_baris in zip(indeks[:tampil], peringkat, masuk_top)]
+    }
+
+
+def _vektor(bobot, kode_kriteria):
+    """Vektor bobot dari list (urut kode kriteria) atau dict {kode: bobot}"""
+    if isinstance(bobot, dict):
+        try:
+            bobot = [bobot[kode] for kode in kode_kriteria]
+        except KeyError as e:
+            raise ValueError(f'Bobot untuk {e.args[0]} tidak ada')
+    try:
+        vektor = np.array(bobot, dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError('Bobot harus berupa angka')
+    if vektor.shape != (len(kode_kriteria),):
+        raise ValueError(f'Vektor bobot harus berisi {len(kode_kriteria)} nilai')
+    if not np.all(np.isfinite(vektor)) or (vektor < 0).any():
+        raise ValueError('Bobot harus angka tidak negatif')
+    return vektor
@@ -0,0 +1,123 @@
+"""Cache user untuk Flask-Login: tanpa query User di setiap request terautentikasi"""
+from collections import OrderedDict
+import os
+import threading
+import time
+
+from sqlalchemy.orm import make_transient_to_detached
+
+from database import db
+from models import User, VersiUser
+
+# Batas umur entri: perubahan dari worker lain (nonaktif, dihapus, ganti
+# password) paling lambat terlihat setelah TTL ini
+TTL_DEFAULT = 30
+MAKS_ENTRI = 1024
+
+
+class CacheUser:
+    """Cache LRU + TTL: user_id -> (salinan User terlepas, versi, kedaluwarsa)"""
+
+    def __init__(self, ttl=TTL_DEFAULT, maks_entri=MAKS_ENTRI):
+        self.ttl = ttl
+        self.maks_entri = maks_entri
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ambil(self, user_id):
+        with self._lock:
+            entri = self._data.get(user_id)
+            if entri is None or entri[2] < time.monotonic():
+                return None
+            self._data.move_to_end(user_id)
+            return entri[0], entri[1]
+
+    def simpan(self, user_id, user, versi):
+        with self._lock:
+            self._data[user_id] = (user, versi, time.monotonic() + self.ttl)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.maks_entri:
+                self._data.popitem(last=False)
+
+    def hapus(self, user_id):
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def kosongkan(self):
+        with self._lock:
+            self._data.clear()
+
+
+cache_user = CacheUser(ttl=int(os.environ.get('USER_CACHE_TTL', TTL_DEFAULT)))
+
+
+def _salinan(user):
+    """Salinan User terlepas dari session, aman disimpan lintas request"""
+    salinan = User(**{kolom.key: getattr(user, kolom.key) for kolom in User.__table__.columns})
+    make_transient_to_detached(salinan)
+    return salinan
+
+
+def _baca_token(token):
+    """``"id:versi"`` dari session -> (id, versi); session lama ``"id"`` dianggap versi 0"""
+    user_id, _, versi = str(token).partition(':')
+    try:
+        return int(user_id), int(versi or 0)
+    except ValueError:
+        return None, None
+
+
+def versi_user(user_id):
+    versi = db.session.query(VersiUser.versi).filter_by(user_id=user_id).scalar()
+    return versi or 0
+
+
+def muat_user(token):
+    """User loader: ambil dari cache, cocokkan cap versi dengan session.
+
+    User nonaktif, terhapus, atau dengan versi berbeda dari session
+    dianggap tidak login.
+    """
+    user_id, versi_session = _baca_token(token)
+    if user_id is None:
+        return None
+
+    entri = cache_user.ambil(user_id)
+    if entri is not None and versi_session > entri[1]:
+        entri = None  # versi dinaikkan di worker lain, cache ini sudah basi
+    if entri is None:
+        row = (db.session.query(User, VersiUser.versi)
+               .outerjoin(VersiUser, VersiUser.user_id == User.id)
+               .filter(User.id == user_id).first())
+        if row is None:
+            return None
+        user, versi = row[0], row[1] or 0
+        cache_user.simpan(user_id, _salinan(user), versi)
+    else:
+        salinan, versi = entri
+        user = db.session.merge(salinan, load=False)
+
+    if versi_session != versi:
+        return None
+    if not user.is_active:
+        return None
+    user.versi_sesi = versi
+    return user
+
+
+def siapkan_login(user):
+    """Isi cap versi sebelum ``login_user`` agar ikut tersimpan di session"""
+    user.versi_sesi = versi_user(user.id)
+    cache_user.hapus(user.id)  # data login baru dibaca, jangan pakai entri lama
+    return user
+
+
+def naikkan_versi_user(user_id):
+    """Cabut semua session user ini (belum di-commit) dan buang dari cache lokal"""
+    versi = db.session.get(VersiUser, user_id)
+    if versi is None:
+        versi = VersiUser(user_id=user_id, versi=0)
+        db.session.add(versi)
+    versi.versi = (versi.versi or 0) + 1
+    cache_user.hapus(user_id)
+    return versi.versi
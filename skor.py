@@ -0,0 +1,283 @@
+"""Sinkronisasi tabel skor_nasabah (skor SAW tersimpan) dengan nilai dan bobot"""
+from sqlalchemy import case, event, func, literal, select, text
+from sqlalchemy.orm import Session
+
+from database import db
+from models import Nasabah, Kriteria, NilaiNasabah, SkorNasabah, NormalisasiKriteria, AcuanSkor, DistribusiSkor
+from pekerjaan import masukkan_antrian
+from saw import KATEGORI, kategori_skor, rentang_kategori, skor_persen
+from statistik import nilai_acuan
+
+tabel_nasabah = Nasabah.__table__
+tabel_kriteria = Kriteria.__table__
+tabel_nilai = NilaiNasabah.__table__
+tabel_skor = SkorNasabah.__table__
+tabel_acuan = AcuanSkor.__table__
+
+
+# ========== EKSPRESI SQL ==========
+def _kontribusi(connection, nilai_ideal):
+    """Ekspresi w_j * r_ij per baris nilai_nasabah, rumus sama dengan saw.normalisasi"""
+    c = tabel_nilai.c
+    cabang = []
+    for k in connection.execute(select(tabel_kriteria)):
+        ideal = nilai_ideal.get(k.kode)
+        if not ideal:
+            continue
+        if k.atribut == 'benefit':
+            if ideal['max'] > 0:
+                cabang.append((c.kriteria_id == k.id,
+                               c.nilai / float(ideal['max']) * k.bobot))
+        else:
+            cabang.append(((c.kriteria_id == k.id) & (c.nilai > 0),
+                           float(ideal['min']) / c.nilai * k.bobot))
+
+    if not cabang:
+        return literal(0.0)
+    return case(*cabang, else_=0.0)
+
+
+def _subquery_skor(connection, kolom_nasabah_id, acuan):
+    return (
+        select(func.coalesce(func.sum(_kontribusi(connection, acuan)), 0.0))
+        .where(tabel_nilai.c.nasabah_id == kolom_nasabah_id)
+        .scalar_subquery()
+    )
+
+
+# ========== SINKRONISASI ==========
+def _acuan_berubah(connection, acuan):
+    """Apakah acuan normalisasi berbeda dari acuan saat skor tersimpan dihitung"""
+    tersimpan = {row.kriteria_id: (row.minimum, row.maksimum)
+                 for row in connection.execute(select(tabel_acuan))}
+    return tersimpan != {a['kriteria_id']: (a['min'], a['max']) for a in acuan.values()}
+
+
+def _simpan_acuan(connection, acuan):
+    connection.execute(tabel_acuan.delete())
+    if acuan:
+        connection.execute(tabel_acuan.insert(), [
+            {'kriteria_id': a['kriteria_id'], 'minimum': a['min'], 'maksimum': a['max']}
+            for a in acuan.values()
+        ])
+    # Penanda untuk indeks_ranking: posisi semua nasabah bisa berubah
+    connection.info['skor_semua_berubah'] = True
+
+
+def perbarui_skor(connection, nasabah_ids):
+    """Hitung ulang skor untuk sebagian nasabah (nasabah yang sudah dihapus ikut dibuang).
+
+    Pada mode normalisasi observasi, perubahan nilai bisa menggeser min/maks
+    kolom; jika acuan berubah skor nasabah lain dihitung ulang lewat pekerjaan
+    latar yang diantrikan di transaksi yang sama, bukan di dalam request.
+    """
+    nasabah_ids = list(nasabah_ids)
+    if not nasabah_ids:
+        return
+    acuan = nilai_acuan(connection)
+    if _acuan_berubah(connection, acuan):
+        # Acuan tersimpan baru diganti setelah pekerjaan selesai, jadi perubahan
+        # berikutnya tetap terdeteksi dan digabung ke pekerjaan yang sama
+        masukkan_antrian(connection, 'hitung-ulang-skor', kunci='hitung-ulang-skor')
+    connection.execute(tabel_skor.delete().where(tabel_skor.c.nasabah_id.in_(nasabah_ids)))
+    pilih = (
+        select(tabel_nasabah.c.id, _subquery_skor(connection, tabel_nasabah.c.id, acuan))
+        .where(tabel_nasabah.c.id.in_(nasabah_ids))
+    )
+    connection.execute(tabel_skor.insert().from_select(['nasabah_id', 'skor'], pilih))
+
+
+def hitung_ulang_semua_skor(connection):
+    """Satu UPDATE berbasis himpunan untuk seluruh nasabah (mis. setelah bobot berubah)"""
+    acuan = nilai_acuan(connection)
+    connection.execute(
+        tabel_skor.update().values(skor=_subquery_skor(connection, tabel_skor.c.nasabah_id, acuan))
+    )
+    _simpan_acuan(connection, acuan)
+
+
+def hitung_ulang_skor_bertahap(session, ukuran=20_000):
+    """Generator: hitung ulang seluruh skor per rentang nasabah_id, yield jumlah skor selesai.
+
+    Pemanggil melakukan commit setelah setiap yield, sehingga write lock
+    hanya dipegang selama satu potongan dan progres bisa dicatat di antara
+    potongan. Acuan dibaca ulang tiap potongan; perubahan nilai yang menggeser
+    acuan di tengah jalan mengantrikan hitung ulang berikutnya (perbarui_skor).
+    """
+    c = tabel_skor.c
+    id_terakhir = 0
+    jumlah = 0
+    while True:
+        connection = session.connection()
+        acuan = nilai_acuan(connection)
+        batas = connection.execute(
+            select(c.nasabah_id).where(c.nasabah_id > id_terakhir)
+            .order_by(c.nasabah_id).offset(ukuran - 1).limit(1)
+        ).scalar()
+        kondisi = c.nasabah_id > id_terakhir
+        if batas is not None:
+            kondisi &= c.nasabah_id <= batas
+        jumlah += connection.execute(
+            tabel_skor.update().where(kondisi).values(skor=_subquery_skor(connection, c.nasabah_id, acuan))
+        ).rowcount
+        if batas is None:
+            _simpan_acuan(connection, acuan)
+        else:
+            connection.info['skor_semua_berubah'] = True
+        yield jumlah
+        if batas is None:
+            return
+        id_terakhir = batas
+
+
+def bangun_skor(connection, acuan=None):
+    """Isi ulang seluruh tabel skor dari nol"""
+    if acuan is None:
+        acuan = nilai_acuan(connection)
+    connection.execute(tabel_skor.delete())
+    pilih = select(tabel_nasabah.c.id, _subquery_skor(connection, tabel_nasabah.c.id, acuan))
+    connection.execute(tabel_skor.insert().from_select(['nasabah_id', 'skor'], pilih))
+    _simpan_acuan(connection, acuan)
+
+
+def sinkronkan_skor_awal():
+    """Bangun tabel skor jika belum sesuai jumlah nasabah atau acuan normalisasi (mis. database lama)"""
+    jumlah_nasabah = db.session.query(func.count(Nasabah.id)).scalar()
+    jumlah_skor = db.session.query(func.count(SkorNasabah.nasabah_id)).scalar()
+    connection = db.session.connection()
+    if jumlah_nasabah != jumlah_skor or _acuan_berubah(connection, nilai_acuan(connection)):
+        bangun_skor(db.session.connection())
+        db.session.commit()
+
+
+# ========== DISTRIBUSI KATEGORI ==========
+def _sql_kategori(kolom):
+    """Ekspresi CASE kode kategori untuk satu kolom skor, batas sama dengan saw.rentang_kategori"""
+    cabang = ' '.join(f"WHEN {kolom} >= {batas / 100!r} THEN '{kode}'"
+                      for kode, batas, _ in KATEGORI if batas > 0)
+    return f"CASE {cabang} ELSE '{KATEGORI[-1][0]}' END"
+
+
+# Trigger menjaga jumlah per kategori untuk semua jalur tulis skor (flush,
+# impor, hitung ulang massal), sehingga dashboard cukup membaca empat baris.
+# UPDATE hanya menyentuh agregat jika kategori nasabah benar-benar berpindah.
+DDL_DISTRIBUSI = {
+    'distribusi_skor_ai': f"""CREATE TRIGGER distribusi_skor_ai AFTER INSERT ON skor_nasabah BEGIN
+        INSERT INTO distribusi_skor (kategori, jumlah) VALUES ({_sql_kategori('new.skor')}, 1)
+        ON CONFLICT (kategori) DO UPDATE SET jumlah = jumlah + 1;
+    END""",
+    'distribusi_skor_ad': f"""CREATE TRIGGER distribusi_skor_ad AFTER DELETE ON skor_nasabah BEGIN
+        UPDATE distribusi_skor SET jumlah = jumlah - 1 WHERE kategori = {_sql_kategori('old.skor')};
+    END""",
+    'distribusi_skor_au': f"""CREATE TRIGGER distribusi_skor_au AFTER UPDATE OF skor ON skor_nasabah
+    WHEN {_sql_kategori('old.skor')} != {_sql_kategori('new.skor')} BEGIN
+        UPDATE distribusi_skor SET jumlah = jumlah - 1 WHERE kategori = {_sql_kategori('old.skor')};
+        INSERT INTO distribusi_skor (kategori, jumlah) VALUES ({_sql_kategori('new.skor')}, 1)
+        ON CONFLICT (kategori) DO UPDATE SET jumlah = jumlah + 1;
+    END""",
+}
+
+
+def bangun_distribusi(connection):
+    """Hitung ulang jumlah per kategori dari skor_nasabah (satu GROUP BY)"""
+    connection.exec_driver_sql('DELETE FROM distribusi_skor')
+    connection.exec_driver_sql(f"""
+        INSERT INTO distribusi_skor (kategori, jumlah)
+        SELECT {_sql_kategori('skor')}, count(*) FROM skor_nasabah GROUP BY 1
+    """)
+
+
+def siapkan_distribusi():
+    """Pasang trigger yang belum ada atau yang batas kategorinya berubah, lalu bangun ulang agregat"""
+    connection = db.session.connection()
+    ada = dict(connection.execute(text("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'")).all())
+    berubah = [nama for nama, ddl in DDL_DISTRIBUSI.items() if ada.get(nama) != ddl]
+    if not berubah:
+        return
+
+    for nama in berubah:
+        connection.exec_driver_sql(f'DROP TRIGGER IF EXISTS {nama}')
+        connection.exec_driver_sql(DDL_DISTRIBUSI[nama])
+    bangun_distribusi(connection)
+    db.session.commit()
+
+
+@event.listens_for(Session, 'after_flush')
+def _skor_setelah_flush(session, flush_context):
+    """Skor ikut diperbarui di transaksi yang sama dengan perubahan nilai/bobot"""
+    nasabah_ids = set()
+    kriteria_berubah = False
+
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, NilaiNasabah):
+            nasabah_ids.add(obj.nasabah_id)
+        elif isinstance(obj, Nasabah):
+            nasabah_ids.add(obj.id)
+        elif isinstance(obj, (Kriteria, NormalisasiKriteria)):
+            kriteria_berubah = True
+
+    for obj in session.dirty:
+        if not session.is_modified(obj):
+            continue
+        if isinstance(obj, NilaiNasabah):
+            nasabah_ids.add(obj.nasabah_id)
+        elif isinstance(obj, (Kriteria, NormalisasiKriteria)):
+            kriteria_berubah = True
+
+    nasabah_ids.discard(None)
+    if nasabah_ids:
+        perbarui_skor(session.connection(), nasabah_ids)
+    # Bobot bisa dihitung ulang lewat pekerjaan latar (lihat update_bobot dan pekerjaan.py)
+    if kriteria_berubah and not session.info.get('tunda_hitung_ulang'):
+        hitung_ulang_semua_skor(session.connection())
+
+
+# ========== QUERY RANKING ==========
+def query_ranking(kategori=None):
+    """Query (id, kode, nama, skor) terurut dari skor tertinggi, memakai indeks skor"""
+    query = db.session.query(
+        Nasabah.id, Nasabah.kode, Nasabah.nama, SkorNasabah.skor
+    ).join(SkorNasabah, SkorNasabah.nasabah_id == Nasabah.id)
+
+    if kategori:
+        rentang = rentang_kategori(kategori)
+        if rentang is None:
+            raise ValueError(f'Kategori tidak dikenal: {kategori}')
+        bawah, atas = rentang
+        if bawah is not None:
+            query = query.filter(SkorNasabah.skor >= bawah)
+        if atas is not None:
+            query = query.filter(SkorNasabah.skor < atas)
+
+    return query.order_by(SkorNasabah.skor.desc(), SkorNasabah.nasabah_id)
+
+
+def distribusi_kategori():
+    """Jumlah nasabah per kategori dari tabel agregat: [(kode, label, jumlah)]"""
+    jumlah = dict(db.session.query(DistribusiSkor.kategori, DistribusiSkor.jumlah))
+    return [(kode, label, jumlah.get(kode, 0)) for kode, _, label in KATEGORI]
+
+
+def ringkasan_dashboard(top=10):
+    """Jumlah nasabah/kriteria, distribusi kategori dan top-N tanpa memindai seluruh nasabah.
+
+    Setiap nasabah punya tepat satu baris skor (lihat sinkronkan_skor_awal),
+    sehingga total nasabah = jumlah distribusi. Top-N memakai indeks skor.
+    """
+    distribusi = distribusi_kategori()
+    teratas = []
+    for nasabah in (query_ranking().limit(top) if top > 0 else []):
+        score_percent = float(skor_persen(nasabah.skor))
+        teratas.append({
+            'id': nasabah.id,
+            'nama': nasabah.nama,
+            'kode': nasabah.kode,
+            'skor': round(score_percent, 1),
+            'kategori': kategori_skor(score_percent)
+        })
+    return {
+        'total_nasabah': sum(jumlah for _, _, jumlah in distribusi),
+        'total_kriteria': db.session.query(func.count(Kriteria.id)).scalar(),
+        'distribusi': [{'kode': kode, 'label': label, 'jumlah': jumlah} for kode, label, jumlah in distribusi],
+        'top': teratas,
+    }
@@ -0,0 +1,226 @@
+"""Snapshot ranking: bobot, skor dan peringkat dibekukan dalam array terkemas.
+
+Satu snapshot = satu baris ``snapshot_ranking``. Id nasabah (int64), skor
+(float64) dan identitas ("kode\\tnama") disimpan sebagai blob zlib dengan
+urutan peringkat, sehingga peringkat = posisi di array. Laporan dan
+perbandingan antar snapshot hanya membaca blob ini, tidak menyentuh tabel
+nasabah/nilai/skor yang sedang berjalan.
+"""
+from collections import namedtuple
+import json
+import zlib
+
+import numpy as np
+
+from cache import CacheHasil
+from database import db
+from models import Kriteria, Pekerjaan, SnapshotRanking
+from pekerjaan import STATUS_AKTIF, pekerjaan_terakhir
+from saw import KATEGORI, kategori_skor, skor_persen
+from skor import query_ranking
+
+LEVEL_ZLIB = 6
+
+# Array hasil dekode satu snapshot (urut peringkat)
+DataSnapshot = namedtuple('DataSnapshot', ['ids', 'skor', 'kode', 'nama'])
+
+# Snapshot tidak pernah berubah dan id-nya tidak dipakai ulang (AUTOINCREMENT):
+# cukup cache per id (versi selalu 0)
+cache_snapshot = CacheHasil(maks_entri=8)
+
+_BATAS_KATEGORI = -np.array([batas for _, batas, _ in KATEGORI], dtype=float)
+
+
+# ========== KEMAS / BONGKAR ==========
+def _kemas_array(array, dtype):
+    return zlib.compress(np.ascontiguousarray(array, dtype=dtype).tobytes(), LEVEL_ZLIB)
+
+
+def _bongkar_array(blob, dtype):
+    return np.frombuffer(zlib.decompress(blob), dtype=dtype)
+
+
+def _kemas_identitas(kode, nama):
+    teks = '\n'.join(f'{k}\t{n}' for k, n in zip(kode, nama))
+    return zlib.compress(teks.encode('utf-8'), LEVEL_ZLIB)
+
+
+def _bongkar_identitas(blob, jumlah):
+    if not jumlah:
+        return [], []
+    baris = [b.split('\t', 1) for b in zlib.decompress(blob).decode('utf-8').split('\n')]
+    return [k for k, _ in baris], [n for _, n in baris]
+
+
+# ========== BUAT / MUAT ==========
+def hitung_ulang_tertunda():
+    """Status hitung ulang skor yang membuat skor tersimpan belum mengikuti bobot
+    terbaru: 'antri'/'jalan', 'gagal' (hitung ulang terakhir gagal), atau None
+    """
+    aktif = db.session.query(Pekerjaan.status).filter(
+        Pekerjaan.kunci == 'hitung-ulang-skor', Pekerjaan.status.in_(STATUS_AKTIF)
+    ).first()
+    if aktif is not None:
+        return aktif.status
+    terakhir = pekerjaan_terakhir('hitung-ulang-skor')
+    return 'gagal' if terakhir is not None and terakhir.status == 'gagal' else None
+
+
+def buat_snapshot(nama, user_id=None, ukuran_potongan=5000):
+    """Bekukan ranking saat ini (skor tersimpan) menjadi snapshot baru; kembalikan SnapshotRanking.
+
+    Tidak melakukan commit. Baris ranking dibaca per potongan lewat indeks skor.
+    Ditolak (ValueError) selama skor tersimpan belum mengikuti bobot terbaru.
+    """
+    nama = (nama or '').strip()
+    if not nama:
+        raise ValueError('Nama snapshot wajib diisi')
+    status = hitung_ulang_tertunda()
+    if status == 'gagal':
+        raise ValueError('Hitung ulang skor terakhir gagal sehingga skor belum mengikuti bobot; '
+                         'simpan ulang bobot untuk mengulanginya')
+    if status is not None:
+        raise ValueError('Skor sedang dihitung ulang setelah bobot berubah; coba lagi setelah selesai')
+
+    bobot = [{'kode': k.kode, 'nama': k.nama, 'atribut': k.atribut, 'bobot': k.bobot}
+             for k in Kriteria.query.order_by(Kriteria.kode)]
+    ids, skor, kode, nama_nasabah = [], [], [], []
+    for row in query_ranking().yield_per(ukuran_potongan):
+        ids.append(row.id)
+        skor.append(row.skor)
+        kode.append(row.kode)
+        # Tab/baris baru dipakai sebagai pemisah di blob identitas
+        nama_nasabah.append(' '.join(row.nama.split()))
+
+    snapshot = SnapshotRanking(
+        nama=nama[:100],
+        user_id=user_id,
+        jumlah=len(ids),
+        bobot=json.dumps(bobot),
+        ids=_kemas_array(ids, '<i8'),
+        skor=_kemas_array(skor, '<f8'),
+        identitas=_kemas_identitas(kode, nama_nasabah),
+    )
+    snapshot.ukuran = len(snapshot.ids) + len(snapshot.skor) + len(snapshot.identitas)
+    db.session.add(snapshot)
+    return snapshot
+
+
+def muat_snapshot(snapshot):
+    """DataSnapshot dari baris SnapshotRanking (hasil dekode di-cache per id)"""
+    def bongkar():
+        kode, nama = _bongkar_identitas(snapshot.identitas, snapshot.jumlah)
+        return DataSnapshot(_bongkar_array(snapshot.ids, '<i8'), _bongkar_array(snapshot.skor, '<f8'),
+                            kode, nama)
+    return cache_snapshot.ambil_atau_hitung(snapshot.id, 0, bongkar)
+
+
+def info_snapshot(snapshot):
+    return {
+        'id': snapshot.id,
+        'nama': snapshot.nama,
+        'dibuat': snapshot.dibuat.isoformat() if snapshot.dibuat else None,
+        'jumlah': snapshot.jumlah,
+        'ukuran': snapshot.ukuran,
+        'bobot': json.loads(snapshot.bobot),
+    }
+
+
+# ========== LAPORAN ==========
+def indeks_kategori(skor):
+    """Indeks KATEGORI (0 = terbaik) untuk array nilai preferensi, sama dengan saw.kategori_skor"""
+    persen = skor_persen(np.asarray(skor, dtype=float))
+    return np.minimum(np.searchsorted(_BATAS_KATEGORI, -persen, side='left'), len(KATEGORI) - 1)
+
+
+def distribusi_snapshot(data):
+    jumlah = np.bincount(indeks_kategori(data.skor), minlength=len(KATEGORI))
+    return [{'kode': kode, 'label': label, 'jumlah': int(n)}
+            for (kode, _, label), n in zip(KATEGORI, jumlah)]
+
+
+def _baris(data, i):
+    persen = float(skor_persen(data.skor[i]))
+    return {
+        'peringkat': int(i) + 1,
+        'id': int(data.ids[i]),
+        'kode': data.kode[i],
+        'nama': data.nama[i],
+        'skor': round(persen, 2),
+        'kategori': kategori_skor(persen),
+    }
+
+
+def halaman_snapshot(data, mulai=0, limit=100):
+    """Baris peringkat ``mulai`` .. ``mulai + limit`` dari snapshot"""
+    akhir = min(mulai + limit, len(data.ids))
+    return [_baris(data, i) for i in range(mulai, akhir)]
+
+
+# ========== PERBANDINGAN ==========
+def _pindah(lama, baru, i_lama, i_baru):
+    persen_lama = float(skor_persen(lama.skor[i_lama]))
+    persen_baru = float(skor_persen(baru.skor[i_baru]))
+    return {
+        'id': int(baru.ids[i_baru]),
+        'kode': baru.kode[i_baru],
+        'nama': baru.nama[i_baru],
+        'peringkat_lama': int(i_lama) + 1,
+        'peringkat_baru': int(i_baru) + 1,
+        'naik': int(i_lama) - int(i_baru),
+        'skor_lama': round(persen_lama, 2),
+        'skor_baru': round(persen_baru, 2),
+        'kategori_lama': kategori_skor(persen_lama),
+        'kategori_baru': kategori_skor(persen_baru),
+    }
+
+
+def bandingkan_snapshot(lama, baru, top=20):
+    """Perubahan dari snapshot ``lama`` ke ``baru`` (DataSnapshot), semua operasi vektor numpy.
+
+    Nasabah dicocokkan lewat id; peringkat = posisi di array. Daftar dibatasi
+    ``top`` baris, jumlah total tetap dilaporkan.
+    """
+    _, i_lama, i_baru = np.intersect1d(lama.ids, baru.ids, assume_unique=True, return_indices=True)
+    naik = i_lama - i_baru
+
+    # Naik terbanyak (seri: peringkat baru lebih tinggi dulu), lalu turun terbanyak
+    urut_naik = np.lexsort((i_baru, -naik))
+    urut_naik = urut_naik[naik[urut_naik] > 0][:top]
+    urut_turun = np.lexsort((i_baru, naik))
+    urut_turun = urut_turun[naik[urut_turun] < 0][:top]
+
+    masuk = np.nonzero(~np.isin(baru.ids, lama.ids, assume_unique=True))[0]
+    keluar = np.nonzero(~np.isin(lama.ids, baru.ids, assume_unique=True))[0]
+
+    kat_lama = indeks_kategori(lama.skor[i_lama])
+    kat_baru = indeks_kategori(baru.skor[i_baru])
+    berubah = np.nonzero(kat_lama != kat_baru)[0]
+    berubah = berubah[np.argsort(i_baru[berubah], kind='stable')]
+    n = len(KATEGORI)
+    transisi = np.bincount(kat_lama * n + kat_baru, minlength=n * n).reshape(n, n)
+
+    return {
+        'jumlah_lama': len(lama.ids),
+        'jumlah_baru': len(baru.ids),
+        'jumlah_sama': len(i_lama),
+        'jumlah_berubah_peringkat': int(np.count_nonzero(naik)),
+        'naik': [_pindah(lama, baru, i_lama[j], i_baru[j]) for j in urut_naik],
+        'turun': [_pindah(lama, baru, i_lama[j], i_baru[j]) for j in urut_turun],
+        'masuk': {'jumlah': len(masuk), 'data': [_baris(baru, i) for i in masuk[:top]]},
+        'keluar': {'jumlah': len(keluar), 'data': [_baris(lama, i) for i in keluar[:top]]},
+        'kategori': {
+            'jumlah': len(berubah),
+            'transisi': [{'dari': KATEGORI[a][2], 'ke': KATEGORI[b][2], 'jumlah': int(transisi[a, b])}
+                         for a in range(n) for b in range(n) if a != b and transisi[a, b]],
+            'data': [_pindah(lama, baru, i_lama[j], i_baru[j]) for j in berubah[:top]],
+        },
+    }
+
+
+def bandingkan_bobot(bobot_lama, bobot_baru):
+    """Bobot per kode kriteria di kedua snapshot (None jika kriteria tidak ada)"""
+    lama = {k['kode']: k['bobot'] for k in bobot_lama}
+    baru = {k['kode']: k['bobot'] for k in bobot_baru}
+    return [{'kode': kode, 'lama': lama.get(kode), 'baru': baru.get(kode)}
+            for kode in sorted(lama.keys() | baru.keys())]
@@ -0,0 +1,38 @@
+/*
+ * Pratinjau konversi nilai mentah (75jt, Rp 5.000.000, Sering) menjadi skor
+ * lewat rubrik kriteria. Input: <input data-konversi-url="...">, hasilnya
+ * ditulis ke elemen .konversi-hasil di sel tabel / card yang sama.
+ */
+(function () {
+    'use strict';
+
+    function pasang(input) {
+        const hasil = input.closest('td, .card-body').querySelector('.konversi-hasil');
+        let timer = null;
+        let pengendali = null;
+
+        input.addEventListener('input', function () {
+            clearTimeout(timer);
+            const teks = input.value.trim();
+            // Angka biasa juga diperiksa: di luar rentang skor rubrik dianggap nilai mentah
+            if (!teks) {
+                hasil.textContent = '';
+                return;
+            }
+            timer = setTimeout(function () {
+                if (pengendali) pengendali.abort();
+                pengendali = new AbortController();
+                fetch(input.dataset.konversiUrl + '?nilai=' + encodeURIComponent(teks),
+                      { credentials: 'same-origin', signal: pengendali.signal })
+                    .then(function (r) { return r.json(); })
+                    .then(function (data) {
+                        hasil.className = 'konversi-hasil d-block small ' + (data.error ? 'text-danger' : 'text-success');
+                        hasil.textContent = data.error ? data.error : '→ skor ' + data.skor;
+                    })
+                    .catch(function () {});
+            }, 300);
+        });
+    }
+
+    document.querySelectorAll('[data-konversi-url]').forEach(pasang);
+})();
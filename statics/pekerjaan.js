@@ -0,0 +1,73 @@
+/*
+ * Pantau pekerjaan latar (lihat pekerjaan.py). Elemen:
+ * <div data-pekerjaan-url="/api/jobs/12"> berisi .progress-bar, .pekerjaan-pesan
+ * dan .pekerjaan-hasil; status dibaca ulang tiap detik sampai selesai/gagal.
+ */
+(function () {
+    'use strict';
+
+    const INTERVAL = 1000;
+
+    function teks(nilai) {
+        const span = document.createElement('span');
+        span.textContent = nilai;
+        return span.innerHTML;
+    }
+
+    function tampilkanHasil(elemen, data) {
+        const hasil = data.hasil || {};
+        const wadah = elemen.querySelector('.pekerjaan-hasil');
+        if (data.status === 'gagal') {
+            wadah.innerHTML = `<div class="alert alert-danger mb-0">Pekerjaan gagal: ${teks(data.pesan || '')}</div>`;
+            return;
+        }
+        if (hasil.berkas) {
+            wadah.innerHTML = `<a class="btn btn-success btn-sm" href="${elemen.dataset.pekerjaanUrl}/berkas">` +
+                `⬇️ Unduh ${teks(hasil.nama_unduhan)}</a>`;
+        } else if (hasil.jumlah_berhasil !== undefined) {
+            let html = `<p class="mb-2"><strong>${hasil.jumlah_berhasil}</strong> nasabah tersimpan, ` +
+                `<strong>${hasil.jumlah_gagal}</strong> baris gagal.</p>`;
+            if (hasil.kesalahan.length) {
+                html += '<div class="table-responsive"><table class="table table-sm table-striped">' +
+                    '<thead><tr><th>Baris</th><th>Kesalahan</th></tr></thead><tbody>';
+                hasil.kesalahan.forEach(function (k) {
+                    html += `<tr><td>${teks(k[0])}</td><td>${teks(k[1])}</td></tr>`;
+                });
+                html += '</tbody></table></div>';
+                if (hasil.jumlah_gagal > hasil.kesalahan.length) {
+                    html += `<small class="text-muted">+ ${hasil.jumlah_gagal - hasil.kesalahan.length} kesalahan lainnya...</small>`;
+                }
+            }
+            wadah.innerHTML = html;
+        } else {
+            wadah.innerHTML = '<span class="text-success">Selesai.</span>';
+        }
+    }
+
+    function pantau(elemen) {
+        const bar = elemen.querySelector('.progress-bar');
+        const pesan = elemen.querySelector('.pekerjaan-pesan');
+
+        function periksa() {
+            fetch(elemen.dataset.pekerjaanUrl, { credentials: 'same-origin', cache: 'no-store' })
+                .then(function (r) { return r.json(); })
+                .then(function (data) {
+                    const persen = Math.round((data.status === 'selesai' ? 1 : data.progres) * 100);
+                    bar.style.width = persen + '%';
+                    bar.textContent = persen + '%';
+                    pesan.textContent = data.status === 'antri' ? 'Menunggu giliran...' : (data.pesan || '');
+                    if (data.status === 'selesai' || data.status === 'gagal') {
+                        bar.classList.remove('progress-bar-animated');
+                        bar.classList.add(data.status === 'selesai' ? 'bg-success' : 'bg-danger');
+                        tampilkanHasil(elemen, data);
+                    } else {
+                        setTimeout(periksa, INTERVAL);
+                    }
+                })
+                .catch(function () { setTimeout(periksa, INTERVAL * 5); });
+        }
+        periksa();
+    }
+
+    document.querySelectorAll('[data-pekerjaan-url]').forEach(pantau);
+})();
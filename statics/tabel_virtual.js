@@ -0,0 +1,123 @@
+/*
+ * Tabel virtual: hanya baris yang terlihat yang dirender ke DOM,
+ * data diambil per potongan (mulai/limit) dari endpoint JSON.
+ */
+(function (global) {
+    'use strict';
+
+    // Sumber data bersama: potongan baris di-cache dan dibagi ke beberapa tabel
+    function SumberBaris(url, total, ukuranPotongan, maksPotongan) {
+        this.url = url;
+        this.total = total;
+        this.ukuran = ukuranPotongan || 100;
+        this.maks = maksPotongan || 40;
+        this.potongan = new Map();   // indeks -> array baris
+        this.dimuat = new Set();     // indeks yang sedang diambil
+        this.pendengar = [];
+    }
+
+    SumberBaris.prototype.dengar = function (fn) {
+        this.pendengar.push(fn);
+    };
+
+    SumberBaris.prototype.baris = function (i) {
+        const p = this.potongan.get(Math.floor(i / this.ukuran));
+        return p ? p[i % this.ukuran] : undefined;
+    };
+
+    SumberBaris.prototype.pastikan = function (awal, akhir) {
+        const pertama = Math.floor(awal / this.ukuran);
+        const terakhir = Math.floor(Math.max(akhir - 1, awal) / this.ukuran);
+        for (let p = pertama; p <= terakhir; p++) {
+            if (!this.potongan.has(p) && !this.dimuat.has(p)) this._ambil(p);
+        }
+        this._buang(pertama, terakhir);
+    };
+
+    SumberBaris.prototype._ambil = function (p) {
+        const self = this;
+        const pemisah = this.url.indexOf('?') === -1 ? '?' : '&';
+        this.dimuat.add(p);
+        fetch(this.url + pemisah + 'mulai=' + (p * this.ukuran) + '&limit=' + this.ukuran,
+              { credentials: 'same-origin' })
+            .then(function (r) { return r.json(); })
+            .then(function (data) {
+                self.potongan.set(p, data.baris);
+                self.total = data.total;
+                self.pendengar.forEach(function (fn) { fn(); });
+            })
+            .finally(function () { self.dimuat.delete(p); });
+    };
+
+    // Batasi memori: buang potongan yang paling jauh dari posisi sekarang
+    SumberBaris.prototype._buang = function (pertama, terakhir) {
+        if (this.potongan.size <= this.maks) return;
+        const tengah = (pertama + terakhir) / 2;
+        const urut = Array.from(this.potongan.keys())
+            .sort(function (a, b) { return Math.abs(b - tengah) - Math.abs(a - tengah); });
+        while (this.potongan.size > this.maks) this.potongan.delete(urut.shift());
+    };
+
+    // Satu tabel virtual di dalam elemen scroll ``wadah`` (tinggi tetap)
+    function TabelVirtual(wadah, sumber, opsi) {
+        this.wadah = wadah;
+        this.sumber = sumber;
+        this.tinggiBaris = opsi.tinggiBaris || 36;
+        this.jumlahKolom = opsi.jumlahKolom;
+        this.sel = opsi.sel;             // fungsi(baris, indeks) -> HTML <td>...
+        this.cadangan = opsi.cadangan || 10;
+        this.tbody = wadah.querySelector('tbody');
+        this._dijadwalkan = false;
+
+        const self = this;
+        wadah.addEventListener('scroll', function () { self.jadwalkan(); });
+        sumber.dengar(function () { self.jadwalkan(); });
+        this.render();
+    }
+
+    TabelVirtual.prototype.jadwalkan = function () {
+        if (this._dijadwalkan) return;
+        this._dijadwalkan = true;
+        const self = this;
+        requestAnimationFrame(function () {
+            self._dijadwalkan = false;
+            self.render();
+        });
+    };
+
+    TabelVirtual.prototype.render = function () {
+        const total = this.sumber.total;
+        const terlihat = Math.ceil(this.wadah.clientHeight / this.tinggiBaris);
+        const awal = Math.max(0, Math.floor(this.wadah.scrollTop / this.tinggiBaris) - this.cadangan);
+        const akhir = Math.min(total, awal + terlihat + 2 * this.cadangan);
+        this.sumber.pastikan(awal, akhir);
+
+        const html = [this._pengisi(awal * this.tinggiBaris)];
+        for (let i = awal; i < akhir; i++) {
+            const baris = this.sumber.baris(i);
+            html.push('<tr style="height:' + this.tinggiBaris + 'px">' +
+                (baris ? this.sel(baris, i)
+                       : '<td colspan="' + this.jumlahKolom + '" class="text-muted">memuat…</td>') +
+                '</tr>');
+        }
+        html.push(this._pengisi((total - akhir) * this.tinggiBaris));
+        this.tbody.innerHTML = html.join('');
+    };
+
+    TabelVirtual.prototype._pengisi = function (tinggi) {
+        return tinggi > 0
+            ? '<tr style="height:' + tinggi + 'px"><td colspan="' + this.jumlahKolom +
+              '" class="p-0 border-0"></td></tr>'
+            : '';
+    };
+
+    function escapeHtml(teks) {
+        return String(teks == null ? '' : teks).replace(/[&<>"']/g, function (c) {
+            return { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' }[c];
+        });
+    }
+
+    global.SumberBaris = SumberBaris;
+    global.TabelVirtual = TabelVirtual;
+    global.escapeHtml = escapeHtml;
+})(window);
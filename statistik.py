@@ -0,0 +1,171 @@
+"""Statistik per kriteria dan nilai acuan normalisasi (skala tetap atau observasi)"""
+import math
+
+from sqlalchemy import select, text
+
+from database import db
+from models import Kriteria, NormalisasiKriteria, StatistikKriteria
+from saw import NILAI_IDEAL
+
+MODE_NORMALISASI = {
+    'skala': 'Skala tetap',
+    'observasi': 'Min/maks data',
+}
+
+# Trigger menjaga agregat tetap sinkron untuk semua jalur tulis (ORM, upsert
+# grid, impor Core). Min/maks hanya dicari ulang jika nilai yang hilang adalah
+# nilai ekstrem; indeks (kriteria_id, nilai) membuat pencarian itu O(log n).
+DDL_STATISTIK = [
+    """CREATE INDEX IF NOT EXISTS ix_nilai_nasabah_kriteria_nilai
+    ON nilai_nasabah (kriteria_id, nilai)""",
+    """CREATE TRIGGER IF NOT EXISTS statistik_kriteria_ai AFTER INSERT ON nilai_nasabah BEGIN
+        INSERT INTO statistik_kriteria (kriteria_id, jumlah, total, total_kuadrat, minimum, maksimum)
+        VALUES (new.kriteria_id, 1, new.nilai, new.nilai * new.nilai, new.nilai, new.nilai)
+        ON CONFLICT (kriteria_id) DO UPDATE SET
+            jumlah = jumlah + 1,
+            total = total + excluded.total,
+            total_kuadrat = total_kuadrat + excluded.total_kuadrat,
+            minimum = coalesce(min(minimum, excluded.minimum), excluded.minimum),
+            maksimum = coalesce(max(maksimum, excluded.maksimum), excluded.maksimum);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS statistik_kriteria_ad AFTER DELETE ON nilai_nasabah BEGIN
+        UPDATE statistik_kriteria SET
+            jumlah = jumlah - 1,
+            total = total - old.nilai,
+            total_kuadrat = total_kuadrat - old.nilai * old.nilai,
+            minimum = CASE WHEN old.nilai <= minimum THEN
+                (SELECT min(nilai) FROM nilai_nasabah WHERE kriteria_id = old.kriteria_id)
+                ELSE minimum END,
+            maksimum = CASE WHEN old.nilai >= maksimum THEN
+                (SELECT max(nilai) FROM nilai_nasabah WHERE kriteria_id = old.kriteria_id)
+                ELSE maksimum END
+        WHERE kriteria_id = old.kriteria_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS statistik_kriteria_au
+    AFTER UPDATE OF nilai, kriteria_id ON nilai_nasabah BEGIN
+        UPDATE statistik_kriteria SET
+            jumlah = jumlah - 1,
+            total = total - old.nilai,
+            total_kuadrat = total_kuadrat - old.nilai * old.nilai,
+            minimum = CASE WHEN old.nilai <= minimum THEN
+                (SELECT min(nilai) FROM nilai_nasabah WHERE kriteria_id = old.kriteria_id)
+                ELSE minimum END,
+            maksimum = CASE WHEN old.nilai >= maksimum THEN
+                (SELECT max(nilai) FROM nilai_nasabah WHERE kriteria_id = old.kriteria_id)
+                ELSE maksimum END
+        WHERE kriteria_id = old.kriteria_id;
+        INSERT INTO statistik_kriteria (kriteria_id, jumlah, total, total_kuadrat, minimum, maksimum)
+        VALUES (new.kriteria_id, 1, new.nilai, new.nilai * new.nilai, new.nilai, new.nilai)
+        ON CONFLICT (kriteria_id) DO UPDATE SET
+            jumlah = jumlah + 1,
+            total = total + excluded.total,
+            total_kuadrat = total_kuadrat + excluded.total_kuadrat,
+            minimum = coalesce(min(minimum, excluded.minimum), excluded.minimum),
+            maksimum = coalesce(max(maksimum, excluded.maksimum), excluded.maksimum);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS statistik_kriteria_hapus AFTER DELETE ON kriteria BEGIN
+        DELETE FROM statistik_kriteria WHERE kriteria_id = old.id;
+        DELETE FROM normalisasi_kriteria WHERE kriteria_id = old.id;
+    END""",
+]
+OBJEK_STATISTIK = {'ix_nilai_nasabah_kriteria_nilai', 'statistik_kriteria_ai',
+                   'statistik_kriteria_ad', 'statistik_kriteria_au', 'statistik_kriteria_hapus'}
+
+
+def bangun_statistik(connection):
+    """Hitung ulang seluruh agregat dari nilai_nasabah (satu GROUP BY)"""
+    connection.exec_driver_sql('DELETE FROM statistik_kriteria')
+    connection.exec_driver_sql("""
+        INSERT INTO statistik_kriteria (kriteria_id, jumlah, total, total_kuadrat, minimum, maksimum)
+        SELECT kriteria_id, count(*), total(nilai), total(nilai * nilai), min(nilai), max(nilai)
+        FROM nilai_nasabah GROUP BY kriteria_id
+    """)
+
+
+def siapkan_statistik():
+    """Buat indeks dan trigger yang belum ada; bangun ulang agregat bila ada yang baru"""
+    connection = db.session.connection()
+    ada = {row.name for row in connection.execute(text('SELECT name FROM sqlite_master'))}
+    if OBJEK_STATISTIK <= ada:
+        return
+
+    for ddl in DDL_STATISTIK:
+        connection.exec_driver_sql(ddl)
+    bangun_statistik(connection)
+    db.session.commit()
+
+
+# ========== NILAI ACUAN ==========
+def _query_acuan():
+    k, n, s = Kriteria.__table__.c, NormalisasiKriteria.__table__.c, StatistikKriteria.__table__.c
+    return (
+        select(k.id, k.kode, k.atribut, n.mode, n.skala_min, n.skala_max, s.minimum, s.maksimum)
+        .select_from(Kriteria.__table__
+                     .outerjoin(NormalisasiKriteria.__table__, n.kriteria_id == k.id)
+                     .outerjoin(StatistikKriteria.__table__, s.kriteria_id == k.id))
+    )
+
+
+def mode_default(kode):
+    """Kriteria bawaan memakai skala NILAI_IDEAL, kriteria baru memakai data observasi"""
+    return 'skala' if kode in NILAI_IDEAL else 'observasi'
+
+
+def nilai_acuan(connection=None):
+    """Acuan normalisasi per kode kriteria: {kode: {'min', 'max', 'mode', 'kriteria_id'}}.
+
+    Bentuknya sama dengan ``saw.NILAI_IDEAL`` sehingga bisa langsung dipakai
+    ``saw.normalisasi`` dan ``skor._kontribusi``. Hanya membaca dua tabel
+    kecil (satu baris per kriteria), tanpa memindai nilai_nasabah. Kriteria
+    tanpa acuan (belum ada nilai, skala belum diisi) tidak dimasukkan.
+    """
+    executor = db.session if connection is None else connection
+    acuan = {}
+    for row in executor.execute(_query_acuan()):
+        mode = row.mode or mode_default(row.kode)
+        if mode == 'skala':
+            if row.mode:
+                bawah, atas = row.skala_min, row.skala_max
+            else:
+                bawah, atas = NILAI_IDEAL[row.kode]['min'], NILAI_IDEAL[row.kode]['max']
+        else:
+            bawah, atas = row.minimum, row.maksimum
+        if bawah is None or atas is None:
+            continue
+        acuan[row.kode] = {'min': bawah, 'max': atas, 'mode': mode, 'kriteria_id': row.id}
+    return acuan
+
+
+def statistik_kriteria():
+    """{kriteria_id: {jumlah, min, max, rata, std}} dari tabel agregat"""
+    hasil = {}
+    for s in StatistikKriteria.query.filter(StatistikKriteria.jumlah > 0):
+        rata = s.total / s.jumlah
+        varians = max(s.total_kuadrat / s.jumlah - rata * rata, 0.0)
+        hasil[s.kriteria_id] = {'jumlah': s.jumlah, 'min': s.minimum, 'max': s.maksimum,
+                                'rata': rata, 'std': math.sqrt(varians)}
+    return hasil
+
+
+def simpan_normalisasi(kriteria, mode, skala_min=None, skala_max=None):
+    """Set cara normalisasi satu kriteria (tanpa commit). Raise ValueError untuk input tidak valid."""
+    if mode not in MODE_NORMALISASI:
+        raise ValueError(f'Mode normalisasi tidak dikenal: {mode}')
+    if mode == 'skala':
+        try:
+            skala_min, skala_max = float(skala_min), float(skala_max)
+        except (TypeError, ValueError):
+            raise ValueError('Skala minimum dan maksimum harus diisi angka')
+        if not 0 < skala_min <= skala_max:
+            raise ValueError('Skala harus 0 < minimum <= maksimum')
+    else:
+        skala_min = skala_max = None
+
+    pengaturan = db.session.get(NormalisasiKriteria, kriteria.id)
+    if pengaturan is None:
+        pengaturan = NormalisasiKriteria(kriteria_id=kriteria.id)
+        db.session.add(pengaturan)
+    pengaturan.mode = mode
+    pengaturan.skala_min = skala_min
+    pengaturan.skala_max = skala_max
+    return pengaturan
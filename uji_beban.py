@@ -0,0 +1,279 @@
+"""Uji beban: gunicorn multi-worker di database sementara + banyak pengguna simulasi.
+
+Skenario campuran meniru jam sibuk koperasi: teller membuka dan menyimpan
+form nilai (``/nilai/edit``) sementara manajer membuka dashboard, mem-poll
+``/api/ranking-visual`` dan membuka ``/laporan``. Per skenario dilaporkan
+throughput, latensi p50/p95/p99, rasio error dan rasio "database is locked"
+(respons 503 dengan header ``X-SPK-Galat: database-terkunci``).
+
+    python uji_beban.py --worker 4 --pengguna 40 --durasi 60 --ukuran 20000
+    python uji_beban.py --teller 0.7 --json hasil.json
+
+Butuh gunicorn (``pip install gunicorn``). Pengguna simulasi berjalan
+sebagai thread di proses ini; untuk ratusan pengguna jalankan beberapa
+proses uji_beban terhadap ``--port`` yang sama dengan ``--tanpa-server``.
+"""
+import argparse
+from collections import defaultdict
+import http.cookiejar
+import json
+import os
+import random
+import re
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+FOLDER_APP = os.path.dirname(os.path.abspath(__file__))
+POLA_NILAI = re.compile(r'name="(nilai_\d+)"')
+
+
+# ========== SERVER ==========
+def port_bebas():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def siapkan_database(ukuran, env):
+    """Database sementara berisi ``ukuran`` nasabah sintetis (lihat data_sintetis.py)"""
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'isi-sintetis', str(ukuran)],
+                   cwd=FOLDER_APP, env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def jalankan_gunicorn(port, worker, env):
+    proses = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', str(worker), '-b', f'127.0.0.1:{port}',
+         '--timeout', '120', '--log-level', 'warning', 'app:app'],
+        cwd=FOLDER_APP, env=env
+    )
+    batas = time.time() + 60
+    while time.time() < batas:
+        if proses.poll() is not None:
+            raise SystemExit('gunicorn berhenti sebelum siap')
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/login', timeout=2).close()
+            return proses
+        except (urllib.error.URLError, ConnectionError, socket.timeout):
+            time.sleep(0.3)
+    proses.terminate()
+    raise SystemExit('gunicorn tidak siap dalam 60 detik')
+
+
+# ========== PENGGUNA SIMULASI ==========
+class Catatan:
+    """Hasil semua request: skenario -> daftar (latensi detik, jenis hasil)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = defaultdict(list)
+
+    def tambah(self, skenario, latensi, hasil):
+        with self.lock:
+            self.data[skenario].append((latensi, hasil))
+
+
+class TanpaRedirect(urllib.request.HTTPRedirectHandler):
+    """Redirect tidak diikuti: latensi POST tidak ikut menghitung halaman tujuan"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+def buka_browser():
+    return urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+                                       TanpaRedirect())
+
+
+class Pengguna:
+    """Satu browser: cookie sendiri, login lalu mengulang persona sampai waktu habis"""
+
+    def __init__(self, basis, catatan, rng):
+        self.basis = basis
+        self.catatan = catatan
+        self.rng = rng
+        self.opener = buka_browser()
+
+    def request(self, skenario, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        mulai = time.perf_counter()
+        try:
+            with self.opener.open(self.basis + path, data=body, timeout=60) as response:
+                isi = response.read()
+            hasil = 'ok'
+        except urllib.error.HTTPError as e:
+            isi = e.read()
+            if 300 <= e.code < 400:
+                # Redirect ke /login berarti sesi hilang, selain itu sukses (mis. setelah simpan)
+                hasil = 'sesi_hilang' if '/login' in e.headers.get('Location', '') else 'redirect'
+            elif e.headers.get('X-SPK-Galat') == 'database-terkunci' or b'database is locked' in isi:
+                hasil = 'terkunci'
+            else:
+                hasil = f'http_{e.code}'
+        except (urllib.error.URLError, ConnectionError, socket.timeout):
+            isi = b''
+            hasil = 'koneksi'
+        self.catatan.tambah(skenario, time.perf_counter() - mulai, hasil)
+        return hasil, isi
+
+    def login(self):
+        return self.request('login', '/login', {'username': 'admin', 'password': 'admin123'})[0] == 'redirect'
+
+    def jeda(self, rata):
+        time.sleep(self.rng.expovariate(1 / rata) if rata > 0 else 0)
+
+
+def persona_teller(pengguna, ukuran, jeda):
+    """Buka form nilai satu nasabah lalu simpan nilai baru"""
+    nasabah_id = pengguna.rng.randint(1, ukuran)
+    hasil, isi = pengguna.request('nilai-form', f'/nilai/edit/{nasabah_id}')
+    if hasil != 'ok':
+        return
+    pengguna.jeda(jeda)
+    data = {nama: str(pengguna.rng.choice([60, 70, 80, 90])) for nama in POLA_NILAI.findall(isi.decode())}
+    pengguna.request('nilai-simpan', f'/nilai/edit/{nasabah_id}', data)
+
+
+def persona_manajer(pengguna, ukuran, jeda):
+    """Dashboard, beberapa kali poll ranking, kadang membuka laporan"""
+    pengguna.request('dashboard', '/')
+    for _ in range(pengguna.rng.randint(1, 4)):
+        pengguna.jeda(jeda)
+        pengguna.request('ranking-visual', '/api/ranking-visual')
+    if pengguna.rng.random() < 0.3:
+        pengguna.request('laporan', '/laporan')
+        pengguna.request('laporan-data', '/api/laporan-data')
+
+
+def jalankan_pengguna(basis, catatan, selesai, persona, ukuran, jeda, seed):
+    pengguna = Pengguna(basis, catatan, random.Random(seed))
+    while not pengguna.login():
+        if selesai.is_set():
+            return
+        time.sleep(0.5)
+    while not selesai.is_set():
+        persona(pengguna, ukuran, jeda)
+        pengguna.jeda(jeda)
+        # Sesekali login ulang (pergantian shift)
+        if pengguna.rng.random() < 0.02:
+            pengguna.opener = buka_browser()
+            pengguna.login()
+
+
+# ========== LAPORAN ==========
+def persentil(terurut, p):
+    if not terurut:
+        return 0.0
+    return terurut[min(len(terurut) - 1, int(round(p * (len(terurut) - 1))))]
+
+
+def ringkas(catatan, durasi):
+    """{skenario: angka} termasuk baris 'total'"""
+    hasil = {}
+    semua = []
+    for skenario, data in sorted(catatan.data.items()):
+        semua.extend(data)
+        hasil[skenario] = _angka(data, durasi)
+    hasil['total'] = _angka(semua, durasi)
+    return hasil
+
+
+def _angka(data, durasi):
+    latensi = sorted(l for l, _ in data)
+    jumlah = len(data)
+    per_hasil = defaultdict(int)
+    for _, h in data:
+        per_hasil[h] += 1
+    return {
+        'jumlah': jumlah,
+        'per_detik': round(jumlah / durasi, 2),
+        'p50_ms': round(persentil(latensi, 0.50) * 1000, 1),
+        'p95_ms': round(persentil(latensi, 0.95) * 1000, 1),
+        'p99_ms': round(persentil(latensi, 0.99) * 1000, 1),
+        'error_persen': round(100 * (jumlah - per_hasil['ok'] - per_hasil['redirect']) / jumlah, 2) if jumlah else 0.0,
+        'terkunci_persen': round(100 * per_hasil['terkunci'] / jumlah, 2) if jumlah else 0.0,
+        'hasil': dict(per_hasil),
+    }
+
+
+def cetak(ringkasan, args):
+    print(f'\n{args.worker} worker, {args.pengguna} pengguna ({args.teller:.0%} teller), '
+          f'{args.durasi} s, {args.ukuran} nasabah')
+    print(f'{"skenario":<16}{"jumlah":>8}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}'
+          f'{"error %":>9}{"locked %":>10}')
+    for skenario, a in ringkasan.items():
+        print(f'{skenario:<16}{a["jumlah"]:>8}{a["per_detik"]:>9}{a["p50_ms"]:>9}{a["p95_ms"]:>9}'
+              f'{a["p99_ms"]:>9}{a["error_persen"]:>9}{a["terkunci_persen"]:>10}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Uji beban SPK Koperasi di bawah gunicorn')
+    parser.add_argument('--worker', type=int, default=4, help='jumlah worker gunicorn')
+    parser.add_argument('--pengguna', type=int, default=20, help='pengguna simulasi bersamaan')
+    parser.add_argument('--durasi', type=float, default=30, help='lama uji (detik)')
+    parser.add_argument('--ukuran', type=int, default=5000, help='jumlah nasabah sintetis')
+    parser.add_argument('--teller', type=float, default=0.5, help='porsi pengguna teller (sisanya manajer)')
+    parser.add_argument('--jeda', type=float, default=0.2, help='rata-rata jeda antar aksi (detik)')
+    parser.add_argument('--port', type=int, default=None)
+    parser.add_argument('--tanpa-server', action='store_true',
+                        help='pakai server yang sudah berjalan di --port (database tidak disiapkan)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='simpan ringkasan ke file JSON')
+    args = parser.parse_args()
+
+    port = args.port or port_bebas()
+    proses = None
+    folder = tempfile.TemporaryDirectory(prefix='spk-beban-')
+    try:
+        if not args.tanpa_server:
+            try:
+                import gunicorn  # noqa: F401
+            except ImportError:
+                raise SystemExit('Uji beban membutuhkan gunicorn: pip install gunicorn')
+            env = dict(os.environ, SPK_DATABASE_URI='sqlite:///' + os.path.join(folder.name, 'beban.db'))
+            print(f'Menyiapkan {args.ukuran} nasabah...', file=sys.stderr)
+            siapkan_database(args.ukuran, env)
+            proses = jalankan_gunicorn(port, args.worker, env)
+
+        catatan = Catatan()
+        selesai = threading.Event()
+        jumlah_teller = round(args.pengguna * args.teller)
+        threads = [
+            threading.Thread(
+                target=jalankan_pengguna, daemon=True,
+                args=(f'http://127.0.0.1:{port}', catatan, selesai,
+                      persona_teller if i < jumlah_teller else persona_manajer,
+                      args.ukuran, args.jeda, args.seed * 100003 + i))
+            for i in range(args.pengguna)
+        ]
+        print(f'Menjalankan {args.pengguna} pengguna selama {args.durasi} detik...', file=sys.stderr)
+        mulai = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(args.durasi)
+        selesai.set()
+        for thread in threads:
+            thread.join(timeout=65)
+        durasi = time.perf_counter() - mulai
+    finally:
+        if proses is not None:
+            proses.send_signal(signal.SIGTERM)
+            proses.wait(timeout=30)
+        folder.cleanup()
+
+    ringkasan = ringkas(catatan, durasi)
+    cetak(ringkasan, args)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'pengaturan': vars(args), 'hasil': ringkasan}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()